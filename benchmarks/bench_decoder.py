@@ -0,0 +1,59 @@
+"""
+Micro-benchmark: legacy per-response decode vs ResponseDecoder
+
+Usage: python benchmarks/bench_decoder.py [--pages 200] [--per-page 20]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import zstandard as zstd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from response_decoder import ResponseDecoder, legacy_decode, orjson  # noqa: E402
+from synthetic_listings import page_bytes  # noqa: E402
+
+
+def time_it(fn, bodies, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for body in bodies:
+            fn(body)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(pages: int = 200, per_page: int = 20, repeat: int = 5) -> dict:
+    compressor = zstd.ZstdCompressor(level=3)
+    bodies = [compressor.compress(page_bytes(page, pages, per_page)) for page in range(1, pages + 1)]
+    decoder = ResponseDecoder()
+
+    legacy = time_it(lambda body: legacy_decode(body, 'zstd'), bodies, repeat)
+    unified = time_it(lambda body: decoder.parse_json(decoder.decompress(body, 'zstd')), bodies, repeat)
+    return {
+        'pages': pages,
+        'per_page': per_page,
+        'compressed_bytes': sum(len(body) for body in bodies),
+        'json_backend': 'orjson' if orjson is not None else 'json',
+        'legacy_seconds': round(legacy, 4),
+        'decoder_seconds': round(unified, 4),
+        'speedup': round(legacy / unified, 2) if unified else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.pages, args.per_page, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Benchmark suite for the scraper hot paths and chart generation
+
+Times each stage separately on synthetic datasets shaped like /announcement/list
+payloads and writes the results as JSON, so runs from different commits can be
+compared with --compare.
+
+Usage: python benchmarks/run_benchmarks.py --sizes 10000 100000 --output bench.json
+       python benchmarks/run_benchmarks.py --sizes 100000 --stages memory
+       python benchmarks/run_benchmarks.py --sizes 1000 --stages hedging
+       python benchmarks/run_benchmarks.py --sizes 2000 --stages transport
+       python benchmarks/run_benchmarks.py --sizes 10000 --compare bench.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import zstandard as zstd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from listing_record import ListingRecord  # noqa: E402
+from mock_server import MockMyHomeAPI, start_mock_server  # noqa: E402
+from myhome_scraper import MyHomeScraper  # noqa: E402
+from rate_limiter import AdaptiveRateLimiter  # noqa: E402
+from response_decoder import ResponseDecoder  # noqa: E402
+from synthetic_listings import page_bytes  # noqa: E402
+from transport import TransportConfig  # noqa: E402
+
+STAGES = ['decode', 'extract', 'memory', 'save_csv', 'save_excel', 'crawl', 'transport', 'hedging', 'charts']
+PER_PAGE = 20
+
+
+def timed(fn) -> Dict:
+    started = time.perf_counter()
+    result = fn()
+    return {'seconds': round(time.perf_counter() - started, 4), 'result': result}
+
+
+def bench_decode(size: int) -> Dict:
+    compressor = zstd.ZstdCompressor(level=3)
+    pages = max(1, size // PER_PAGE)
+    bodies = [compressor.compress(page_bytes(page, pages, PER_PAGE)) for page in range(1, pages + 1)]
+    decoder = ResponseDecoder()
+
+    def decode():
+        listings = []
+        for body in bodies:
+            listings.extend(decoder.parse_json(decoder.decompress(body, 'zstd'))['data'])
+        return listings
+
+    run = timed(decode)
+    run['bytes'] = sum(len(body) for body in bodies)
+    return run
+
+
+def bench_extract(listings: List[Dict]) -> Dict:
+    scraper = MyHomeScraper()
+    return timed(lambda: [scraper.extract_listing_data(listing, 1 + listing['id'] % 2, '(050) 000-00-00')
+                          for listing in listings])
+
+
+def traced_bytes(build) -> int:
+    """Bytes still allocated after build() returns, i.e. the size of what it built"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        built = build()  # noqa: F841 - kept alive until measured
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_memory(listings: List[Dict]) -> Dict:
+    """Retained bytes per listing for extracted dict rows versus ListingRecord rows"""
+    scraper = MyHomeScraper()
+    count = max(1, len(listings))
+    dict_bytes = traced_bytes(lambda: [scraper.extract_listing_data(listing, 1 + listing['id'] % 2, '')
+                                       for listing in listings])
+    record_bytes = traced_bytes(lambda: [
+        ListingRecord.from_row(scraper.extract_listing_data(listing, 1 + listing['id'] % 2, ''))
+        for listing in listings])
+    return {
+        'dict_bytes_per_listing': round(dict_bytes / count),
+        'record_bytes_per_listing': round(record_bytes / count),
+        'ratio': round(dict_bytes / record_bytes, 2) if record_bytes else None,
+    }
+
+
+def bench_save(rows: List[Dict], workdir: Path, kind: str) -> Dict:
+    scraper = MyHomeScraper()
+    scraper.all_listings = rows
+    if kind == 'csv':
+        run = timed(lambda: scraper.save_to_csv(str(workdir / 'bench.csv')))
+    else:
+        run = timed(lambda: scraper.save_to_excel(str(workdir / 'bench.xlsx')))
+    run['bytes'] = Path(run.pop('result')).stat().st_size
+    return run
+
+
+def bench_crawl(size: int, transport: str = 'aiohttp', config: Optional[TransportConfig] = None,
+                latency: float = 0.0) -> Dict:
+    async def crawl():
+        api = MockMyHomeAPI(pages=max(1, size // PER_PAGE), per_page=PER_PAGE, latency=latency)
+        runner, base_url = await start_mock_server(api)
+        try:
+            limiter = AdaptiveRateLimiter(initial_rate=10000.0, max_rate=10000.0)
+            async with MyHomeScraper(base_url=base_url, rate_limiter=limiter, phone_workers=16,
+                                     keep_listings=False, transport=transport,
+                                     transport_config=config) as scraper:
+                await scraper.scrape_announcement_type(1)
+                return scraper.counters.total
+        finally:
+            await runner.cleanup()
+
+    run = timed(lambda: asyncio.run(crawl()))
+    run['listings'] = run.pop('result')
+    run['listings_per_second'] = round(run['listings'] / run['seconds'], 1) if run['seconds'] else None
+    return run
+
+
+# Transport setups compared by the 'transport' stage
+TRANSPORT_SETUPS = {
+    'aiohttp': ('aiohttp', TransportConfig()),
+    'aiohttp_wide_pool': ('aiohttp', TransportConfig(pool_size=32, per_host=32)),
+    'httpx': ('httpx', TransportConfig(pool_size=32, per_host=32)),
+}
+
+
+def bench_transports(size: int, latency: float = 0.01) -> Dict:
+    """End-to-end crawls through the mock with each transport; unavailable backends are reported as skipped"""
+    results = {}
+    for label, (name, config) in TRANSPORT_SETUPS.items():
+        try:
+            results[label] = bench_crawl(size, transport=name, config=config, latency=latency)
+        except ImportError as e:
+            results[label] = {'skipped': str(e)}
+    return results
+
+
+def bench_hedging(lookups: int, tail_rate: float = 0.02, tail_latency: float = 0.5) -> Dict:
+    """Phone lookup latency against a mock whose responses have a slow tail, with and without hedging"""
+    async def lookups_with(hedge_quantile):
+        api = MockMyHomeAPI(phone_latency=0.01, tail_rate=tail_rate, tail_latency=tail_latency, seed=1)
+        runner, base_url = await start_mock_server(api)
+        try:
+            limiter = AdaptiveRateLimiter(initial_rate=10000.0, max_rate=10000.0)
+            async with MyHomeScraper(base_url=base_url, rate_limiter=limiter,
+                                     hedge_quantile=hedge_quantile) as scraper:
+                ids = iter(range(1, lookups + 1))
+                durations = []
+
+                async def worker():
+                    for listing_id in ids:
+                        started = time.perf_counter()
+                        await scraper.fetch_phone_number(listing_id)
+                        durations.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(scraper.phone_workers)))
+                durations.sort()
+                return {
+                    'seconds': round(time.perf_counter() - started, 4),
+                    'p50': round(durations[len(durations) // 2], 4),
+                    'p99': round(durations[min(len(durations) - 1, int(len(durations) * 0.99))], 4),
+                    'hedged_requests': int(scraper.metrics.hedged.get(endpoint='phone')),
+                }
+        finally:
+            await runner.cleanup()
+
+    plain = asyncio.run(lookups_with(None))
+    hedged = asyncio.run(lookups_with(0.95))
+    return {'lookups': lookups, 'unhedged': plain, 'hedged': hedged,
+            'p99_ratio': round(plain['p99'] / hedged['p99'], 2) if hedged['p99'] else None}
+
+
+def bench_charts(rows: List[Dict], workdir: Path) -> Dict:
+    snapshot = workdir / 'myhome_listings_20250929_003143.csv'
+    scraper = MyHomeScraper()
+    scraper.all_listings = rows
+    scraper.save_to_csv(str(snapshot))
+    command = [sys.executable, str(ROOT / 'generate_charts.py')]
+    run = timed(lambda: subprocess.run(command, cwd=workdir, capture_output=True, text=True))
+    completed = run.pop('result')
+    run['ok'] = completed.returncode == 0
+    if not run['ok']:
+        run['error'] = completed.stderr.strip().splitlines()[-1:]
+    return run
+
+
+def run_size(size: int, stages: List[str], crawl_limit: int, hedge_limit: int = 1000) -> Dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        decoded = bench_decode(size)
+        listings = decoded.pop('result')
+        if 'decode' in stages:
+            results['decode'] = decoded
+        extracted = bench_extract(listings)
+        rows = extracted.pop('result')
+        if 'extract' in stages:
+            results['extract'] = extracted
+        if 'memory' in stages:
+            results['memory'] = bench_memory(listings)
+        del listings
+        # ru_maxrss is in KiB on Linux; it only grows, so later sizes report the running peak
+        results['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+        if 'save_csv' in stages:
+            results['save_csv'] = bench_save(rows, workdir, 'csv')
+        if 'save_excel' in stages:
+            results['save_excel'] = bench_save(rows, workdir, 'excel')
+        if 'charts' in stages:
+            results['charts'] = bench_charts(rows, workdir)
+        del rows
+        if 'crawl' in stages:
+            results['crawl'] = bench_crawl(min(size, crawl_limit))
+        if 'transport' in stages:
+            results['transport'] = bench_transports(min(size, crawl_limit))
+        if 'hedging' in stages:
+            results['hedging'] = bench_hedging(min(size, hedge_limit))
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+
+def compare(current: Dict, baseline: Dict):
+    """Print the time ratio of every stage against a previous results file"""
+    print(f"\nComparison against {baseline.get('revision') or 'baseline'}:")
+    for size, stages in current['results'].items():
+        for stage, result in stages.items():
+            before = baseline.get('results', {}).get(size, {}).get(stage)
+            if not isinstance(result, dict) or not isinstance(before, dict):
+                continue
+            if 'seconds' in result and before.get('seconds'):
+                ratio = result['seconds'] / before['seconds']
+                print(f"  {size:>8} {stage:<11} {before['seconds']:>9.3f}s -> {result['seconds']:>9.3f}s "
+                      f"({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scraper stages and chart generation")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--crawl-limit', type=int, default=100000,
+                        help="Largest dataset crawled end-to-end through the mock server (default: %(default)s)")
+    parser.add_argument('--hedge-limit', type=int, default=1000,
+                        help="Most phone lookups timed for the hedging stage (default: %(default)s)")
+    parser.add_argument('--output', help="Write results JSON here (default: stdout only)")
+    parser.add_argument('--compare', help="Previous results JSON to compare against")
+    args = parser.parse_args()
+    # Per-request and access logs would dominate the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('aiohttp.access').setLevel(logging.WARNING)
+
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {},
+    }
+    for size in args.sizes:
+        print(f"Benchmarking {size:,} listings...", file=sys.stderr)
+        report['results'][str(size)] = run_size(size, args.stages, args.crawl_limit, args.hedge_limit)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + '\n', encoding='utf-8')
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
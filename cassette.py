@@ -0,0 +1,79 @@
+"""
+Record/replay cassettes for MyHome.az API responses
+Raw bodies (still compressed) are stored on disk with an index of status and headers
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Response headers worth keeping to replay a response faithfully
+RECORDED_HEADERS = ('content-encoding', 'content-type', 'retry-after')
+
+
+class Cassette:
+    """Directory of recorded responses keyed by request path, e.g. 'list?announcementType=1&page=3'
+
+    Layout:
+      index.json      key -> list of {status, headers, body}
+      bodies/<sha1>   raw response bytes, shared between identical bodies
+
+    A key can hold several responses (a 429 followed by a 200); replay walks
+    through them in order and then keeps returning the last one.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.bodies_dir = self.path / 'bodies'
+        self.index: Dict[str, List[Dict]] = {}
+        self._replay_positions: Dict[str, int] = {}
+        self._unsaved = 0
+        index_path = self.path / 'index.json'
+        if index_path.exists():
+            with open(index_path, encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def record(self, key: str, status: int, headers, body: bytes):
+        self.bodies_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha1(body).hexdigest()
+        body_path = self.bodies_dir / digest
+        if not body_path.exists():
+            body_path.write_bytes(body)
+        kept_headers = {name: headers[name] for name in RECORDED_HEADERS if headers.get(name)}
+        self.index.setdefault(key, []).append({'status': status, 'headers': kept_headers, 'body': digest})
+        self._unsaved += 1
+        if self._unsaved >= 100:
+            self.save()
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """Next recorded response for a key as {status, headers, body: bytes}, or None"""
+        responses = self.index.get(key)
+        if not responses:
+            return None
+        position = self._replay_positions.get(key, 0)
+        entry = responses[min(position, len(responses) - 1)]
+        self._replay_positions[key] = position + 1
+        return {
+            'status': entry['status'],
+            'headers': entry['headers'],
+            'body': (self.bodies_dir / entry['body']).read_bytes(),
+        }
+
+    def keys(self) -> List[str]:
+        return list(self.index)
+
+    def save(self):
+        if not self.index:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path / 'index.json.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path / 'index.json')
+        self._unsaved = 0
+        logger.info(f"Saved cassette index with {len(self.index)} requests to {self.path}")
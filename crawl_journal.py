@@ -0,0 +1,87 @@
+"""
+Append-only crawl journal for MyHome.az scraping
+Records enriched listings and completed pages so a crashed crawl can resume
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlJournal:
+    """JSON-lines journal of crawl progress per announcement type
+
+    Two kinds of records are appended:
+      {"event": "listing", "type": 1, "page": 3, "pos": 0, "row": {...}}
+      {"event": "page", "type": 1, "page": 3}
+    A page record is only written once every listing on that page has been
+    enriched, so a resumed crawl can skip it entirely.
+    """
+
+    def __init__(self, path: str = 'myhome_journal.jsonl', resume: bool = False):
+        self.path = Path(path)
+        self.completed_pages: Dict[int, Set[int]] = {}
+        self.rows: Dict[int, Dict[int, Tuple[int, int, Dict]]] = {}  # type -> id -> (page, pos, row)
+        if resume and self.path.exists():
+            self.load()
+        self.file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def load(self):
+        """Rebuild progress from an existing journal, ignoring a torn last line"""
+        with open(self.path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable journal line {line_number} in {self.path}")
+                    continue
+                announcement_type = record['type']
+                if record['event'] == 'page':
+                    self.completed_pages.setdefault(announcement_type, set()).add(record['page'])
+                elif record['event'] == 'listing':
+                    row = record['row']
+                    self.rows.setdefault(announcement_type, {})[row['id']] = (record['page'], record['pos'], row)
+        restored = sum(len(rows) for rows in self.rows.values())
+        pages = sum(len(pages) for pages in self.completed_pages.values())
+        logger.info(f"Resuming from {self.path}: {pages} completed pages, {restored} enriched listings")
+
+    def _append(self, record: Dict, sync: bool = False):
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        self.file.flush()
+        if sync:
+            os.fsync(self.file.fileno())
+
+    def record_listing(self, announcement_type: int, page: int, pos: int, row: Dict):
+        self.rows.setdefault(announcement_type, {})[row['id']] = (page, pos, row)
+        self._append({'event': 'listing', 'type': announcement_type, 'page': page, 'pos': pos, 'row': row})
+
+    def record_page(self, announcement_type: int, page: int):
+        self.completed_pages.setdefault(announcement_type, set()).add(page)
+        self._append({'event': 'page', 'type': announcement_type, 'page': page}, sync=True)
+
+    def is_page_done(self, announcement_type: int, page: int) -> bool:
+        return page in self.completed_pages.get(announcement_type, ())
+
+    def stored_phone(self, announcement_type: int, listing_id: int) -> str:
+        entry = self.rows.get(announcement_type, {}).get(listing_id)
+        return entry[2].get('phone_number', '') if entry else ''
+
+    def completed_rows(self, announcement_type: int):
+        """Yield (page, pos, row) for listings on completed pages"""
+        done = self.completed_pages.get(announcement_type, set())
+        for page, pos, row in self.rows.get(announcement_type, {}).values():
+            if page in done:
+                yield page, pos, row
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def discard(self):
+        """Remove the journal once a crawl's outputs are safely written"""
+        self.close()
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,108 @@
+"""
+Pagination drift detection for MyHome.az list crawls
+New listings are inserted at the top of /announcement/list while a crawl runs, so older
+listings slide to later pages. Pages fetched out of order can then miss the listings
+that slid across their boundary, and the tail slides past the last page read.
+
+Page 1 is re-read every few pages to measure how many listings were inserted above the
+crawl; from the fetch order of neighbouring pages, the detector works out which listing
+positions may have been skipped and which pages hold them now.
+"""
+
+import bisect
+import math
+from typing import Dict, List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def inserted_above(old_head: Sequence, new_head: Sequence) -> Optional[int]:
+    """Listings inserted above old_head's items by the time new_head was read
+
+    None when none of old_head's ids is on new_head any more, i.e. more than a page
+    was inserted (or old_head's listings were all removed).
+    """
+    positions = {listing_id: index for index, listing_id in enumerate(new_head)}
+    for index, listing_id in enumerate(old_head):
+        if listing_id in positions:
+            return max(0, positions[listing_id] - index)
+    return None
+
+
+class PageDriftDetector:
+    """Tracks when each page was read against how far the list had shifted at the time"""
+
+    def __init__(self, per_page: int):
+        self.per_page = max(1, per_page)
+        self.sequence = 0
+        self.page_sequence: Dict[int, int] = {}
+        # (sequence, listings inserted since the crawl started), one entry per head sample
+        self.sample_sequences: List[int] = []
+        self.sample_shifts: List[int] = []
+        self.head: Optional[List] = None
+        self.uncertain = False
+
+    @property
+    def inserted(self) -> int:
+        return self.sample_shifts[-1] if self.sample_shifts else 0
+
+    def record_page(self, page: int):
+        self.sequence += 1
+        self.page_sequence[page] = self.sequence
+
+    def record_head(self, ids: Sequence) -> int:
+        """Feed a fresh read of page 1; returns the listings inserted since the previous one"""
+        ids = list(ids)
+        shift = 0
+        if self.head is not None:
+            shift = inserted_above(self.head, ids)
+            if shift is None:
+                # More than a page slid in between samples; count one page and widen the re-fetch
+                logger.warning("Listings shifted by more than a page between drift samples")
+                self.uncertain = True
+                shift = len(ids)
+        self.head = ids
+        self.sample_sequences.append(self.sequence)
+        self.sample_shifts.append(self.inserted + shift)
+        return shift
+
+    def _shift_at_most(self, sequence: int) -> int:
+        """Upper bound of the shift when the read with this sequence happened: the next sample"""
+        index = bisect.bisect_left(self.sample_sequences, sequence)
+        return self.sample_shifts[index] if index < len(self.sample_shifts) else self.inserted
+
+    def _shift_at_least(self, sequence: int) -> int:
+        """Lower bound: the last sample taken before that read; a sample at the same sequence came after it"""
+        index = bisect.bisect_right(self.sample_sequences, sequence - 1) - 1
+        return self.sample_shifts[index] if index >= 0 else 0
+
+    def _pages_now(self, start: int, end: int) -> range:
+        """Pages holding what were list positions [start, end) when the crawl started"""
+        start, end = max(0, start + self.inserted), end + self.inserted
+        return range(start // self.per_page + 1, math.ceil(end / self.per_page) + 1)
+
+    def pages_to_refetch(self, last_page: int) -> List[int]:
+        """Pages to read again, as of the latest head sample, to cover every skipped position
+
+        A boundary between pages p and p + 1 loses listings when p + 1 was read before p
+        and listings were inserted in between; the page after last_page counts as read
+        at the very start. New listings at the top are covered by the leading pages.
+        """
+        if not self.inserted:
+            return []
+        margin = self.per_page if self.uncertain else 0
+        pages = set(self._pages_now(-self.inserted - margin, 0))
+        for page in range(1, last_page + 1):
+            if page not in self.page_sequence:
+                continue
+            after = self.page_sequence.get(page + 1, 0) if page < last_page else 0
+            before = self.page_sequence[page]
+            if after > before:
+                continue
+            # Positions [page * N - shift(before), page * N - shift(after)) slid past both reads
+            start = page * self.per_page - self._shift_at_most(before) - margin
+            end = page * self.per_page - self._shift_at_least(after) + margin
+            if end > start:
+                pages.update(self._pages_now(start, end))
+        return sorted(pages)
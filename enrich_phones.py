@@ -0,0 +1,177 @@
+"""
+Deferred phone enrichment for listing snapshots
+A crawl run with --no-phones costs one request per page; this command then resolves
+phones only for the listings matching a filter and merges them back into the snapshot.
+
+Usage: python enrich_phones.py                      # latest snapshot, every listing without a phone
+       python enrich_phones.py myhome_listings_20250929_003143.csv --city Bakı --rooms 2 3 \\
+           --min-price 100000 --max-price 250000 --type sale
+"""
+
+import argparse
+import asyncio
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from myhome_scraper import MyHomeScraper
+from parquet_export import to_float, to_int
+from sinks import SINKS, read_rows
+from snapshots import latest_snapshot
+
+logger = logging.getLogger(__name__)
+
+TYPE_NAMES = {'sale': 'Sale', 'rent': 'Rent'}
+
+
+@dataclass
+class ListingFilter:
+    """Which snapshot rows get a phone; empty sets and None bounds match everything"""
+    cities: Set[str] = field(default_factory=set)
+    regions: Set[str] = field(default_factory=set)
+    room_counts: Set[int] = field(default_factory=set)
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    announcement_types: Set[str] = field(default_factory=set)  # 'Sale' / 'Rent', as in the snapshot
+
+    def __post_init__(self):
+        self.cities = {city.casefold() for city in self.cities}
+        self.regions = {region.casefold() for region in self.regions}
+
+    def matches(self, row: Dict) -> bool:
+        if self.announcement_types and row.get('announcement_type') not in self.announcement_types:
+            return False
+        if self.cities and (row.get('city') or '').casefold() not in self.cities:
+            return False
+        if self.regions and (row.get('region') or '').casefold() not in self.regions:
+            return False
+        if self.room_counts and to_int(row.get('room_count')) not in self.room_counts:
+            return False
+        if self.min_price is not None or self.max_price is not None:
+            price = to_float(row.get('price'))
+            if price is None:
+                return False
+            if self.min_price is not None and price < self.min_price:
+                return False
+            if self.max_price is not None and price > self.max_price:
+                return False
+        return True
+
+
+def snapshot_format(path: Path) -> Tuple[str, bool]:
+    """(sink format, compressed) from a name like myhome_listings_<ts>.jsonl.zst"""
+    compress = path.name.endswith('.zst')
+    name = path.name[:-len('.zst')] if compress else path.name
+    return ('jsonl' if name.endswith('.jsonl') else 'csv'), compress
+
+
+def select_listings(path, listing_filter: ListingFilter, refresh: bool = False) -> Tuple[int, Dict[int, Optional[int]]]:
+    """Count rows and pick matching listing ids (mapped to their user_id) that still need a phone"""
+    total = 0
+    targets = {}
+    for row in read_rows(path):
+        total += 1
+        if (refresh or not row.get('phone_number')) and listing_filter.matches(row):
+            listing_id = to_int(row.get('id'))
+            if listing_id is not None:
+                targets.setdefault(listing_id, to_int(row.get('user_id')))
+    return total, targets
+
+
+async def resolve_phones(scraper: MyHomeScraper, targets: Dict[int, Optional[int]]) -> Dict[int, str]:
+    """Phones for the targeted ids through the scraper's resolver, phone_workers at a time"""
+    phones = {}
+    pending = iter(targets.items())
+
+    async def worker():
+        for listing_id, user_id in pending:
+            phones[listing_id] = await scraper.phone_resolver.resolve(listing_id, user_id)
+            scraper.metrics.phone_lookups.inc(result='success' if phones[listing_id] else 'empty')
+            if len(phones) % 500 == 0:
+                logger.info(f"Resolved {len(phones)} of {len(targets)} phones")
+
+    await asyncio.gather(*(worker() for _ in range(scraper.phone_workers)))
+    return phones
+
+
+def merge_phones(path, phones: Dict[int, str], output=None) -> int:
+    """Rewrite the snapshot with the resolved phones filled in; returns the rows updated
+
+    The result is written next to the output and renamed over it, so an interrupted
+    merge never leaves a truncated snapshot behind.
+    """
+    path = Path(path)
+    output = Path(output) if output else path
+    fmt, compress = snapshot_format(output)
+    tmp_path = output.with_name(output.name + '.tmp')
+    updated = 0
+    with SINKS[fmt](tmp_path, compress=compress) as sink:
+        for row in read_rows(path):
+            phone = phones.get(to_int(row.get('id')))
+            if phone:
+                row['phone_number'] = phone
+                updated += 1
+            sink.write(row)
+    os.replace(tmp_path, output)
+    return updated
+
+
+async def enrich_snapshot(scraper: MyHomeScraper, path, listing_filter: ListingFilter, output=None,
+                          refresh: bool = False) -> Dict:
+    total, targets = select_listings(path, listing_filter, refresh)
+    logger.info(f"{len(targets):,} of {total:,} listings match the filter and need a phone")
+    phones = await resolve_phones(scraper, targets)
+    updated = merge_phones(path, phones, output) if phones else 0
+    return {
+        'rows': total,
+        'matched': len(targets),
+        'updated': updated,
+        'requests': scraper.phone_resolver.requests,
+    }
+
+
+def build_filter(args) -> ListingFilter:
+    return ListingFilter(cities=set(args.city or ()), regions=set(args.region or ()),
+                         room_counts=set(args.rooms or ()), min_price=args.min_price, max_price=args.max_price,
+                         announcement_types={TYPE_NAMES[name] for name in args.type or ()})
+
+
+async def run(args):
+    path = Path(args.snapshot) if args.snapshot else latest_snapshot()
+    listing_filter = build_filter(args)
+    if args.dry_run:
+        total, targets = select_listings(path, listing_filter, args.refresh)
+        print(f"{path.name}: {len(targets):,} of {total:,} listings would be enriched")
+        return
+    kwargs = {'base_url': args.base_url} if args.base_url else {}
+    async with MyHomeScraper(phone_workers=args.phone_workers, phone_cache_path=args.phone_cache,
+                             **kwargs) as scraper:
+        result = await enrich_snapshot(scraper, path, listing_filter, args.output, args.refresh)
+    print(f"{path.name}: {result['matched']:,} of {result['rows']:,} listings matched, "
+          f"{result['updated']:,} phones filled in with {result['requests']:,} phone requests")
+    print(f"Snapshot: {args.output or path}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Fill in phone numbers for a filtered subset of a snapshot")
+    parser.add_argument('snapshot', nargs='?', help="CSV/JSONL snapshot, optionally .zst (default: latest)")
+    parser.add_argument('--city', nargs='+', help="City names, e.g. Bakı")
+    parser.add_argument('--region', nargs='+', help="Region names, e.g. Yasamal")
+    parser.add_argument('--rooms', type=int, nargs='+', help="Room counts")
+    parser.add_argument('--min-price', type=float)
+    parser.add_argument('--max-price', type=float)
+    parser.add_argument('--type', nargs='+', choices=sorted(TYPE_NAMES), help="Announcement types")
+    parser.add_argument('--refresh', action='store_true', help="Also look up listings that already have a phone")
+    parser.add_argument('--output', help="Write the enriched snapshot here instead of updating it in place")
+    parser.add_argument('--dry-run', action='store_true', help="Only count the listings that would be looked up")
+    parser.add_argument('--phone-workers', type=int, default=2, help="Concurrent phone lookups")
+    parser.add_argument('--phone-cache', default='myhome_phone_cache.json')
+    parser.add_argument('--base-url', help="API root, e.g. a local mock_server.py")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,131 @@
+"""
+Persistent listing index for incremental MyHome.az crawls
+Stores one row per listing id with its date, price, content hash and phone number
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields that change without the listing itself changing
+VOLATILE_FIELDS = ('is_favorite',)
+
+
+def content_hash(listing: Dict) -> str:
+    """Stable hash of a raw API listing, ignoring volatile fields"""
+    stable = {key: value for key, value in listing.items() if key not in VOLATILE_FIELDS}
+    payload = json.dumps(stable, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class ListingIndex:
+    """SQLite-backed index of listings seen by previous crawls"""
+
+    def __init__(self, path: str = 'myhome_index.sqlite', commit_every: int = 500):
+        self.path = Path(path)
+        self.commit_every = commit_every
+        self._pending = 0
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS listings (
+                id INTEGER PRIMARY KEY,
+                announcement_type TEXT,
+                formatted_date TEXT,
+                price TEXT,
+                content_hash TEXT,
+                user_id INTEGER,
+                phone_number TEXT,
+                first_seen REAL,
+                last_seen REAL
+            )
+        ''')
+        self.conn.commit()
+
+    def get(self, listing_id: int) -> Optional[Dict]:
+        cursor = self.conn.execute(
+            'SELECT id, announcement_type, formatted_date, price, content_hash, user_id, phone_number '
+            'FROM listings WHERE id = ?', (listing_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        keys = ('id', 'announcement_type', 'formatted_date', 'price', 'content_hash', 'user_id', 'phone_number')
+        return dict(zip(keys, row))
+
+    def is_unchanged(self, listing: Dict, listing_hash: Optional[str] = None) -> bool:
+        """True if the listing is known and its content hash has not changed"""
+        known = self.get(listing.get('id'))
+        if known is None:
+            return False
+        return known['content_hash'] == (listing_hash or content_hash(listing))
+
+    def get_phone(self, listing_id: int) -> str:
+        known = self.get(listing_id)
+        if known and known['phone_number']:
+            return known['phone_number']
+        return ''
+
+    def upsert(self, row: Dict, listing_hash: str):
+        """Store an extracted listing row (as produced by extract_listing_data)"""
+        now = time.time()
+        self.conn.execute('''
+            INSERT INTO listings (id, announcement_type, formatted_date, price, content_hash,
+                                  user_id, phone_number, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                announcement_type = excluded.announcement_type,
+                formatted_date = excluded.formatted_date,
+                price = excluded.price,
+                content_hash = excluded.content_hash,
+                user_id = excluded.user_id,
+                phone_number = CASE WHEN excluded.phone_number != '' THEN excluded.phone_number
+                                    ELSE listings.phone_number END,
+                last_seen = excluded.last_seen
+        ''', (row['id'], row['announcement_type'], row['formatted_date'], row['price'],
+              listing_hash, row['user_id'], row['phone_number'] or '', now, now))
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM listings').fetchone()[0]
+
+    def commit(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class UnchangedPageTracker:
+    """Finds the point where pagination reaches a run of pages with nothing new
+
+    Pages complete out of order, so results are buffered until the run of
+    contiguous pages starting at page 1 can be extended.
+    """
+
+    def __init__(self, stop_after: int):
+        self.stop_after = stop_after
+        self.results = {}
+        self.next_page = 1
+        self.run = 0
+        self.stop_page = None
+
+    def record(self, page: int, unchanged: bool) -> Optional[int]:
+        """Record a page result; returns the last page worth fetching once known"""
+        self.results[page] = unchanged
+        while self.stop_page is None and self.next_page in self.results:
+            self.run = self.run + 1 if self.results.pop(self.next_page) else 0
+            if self.run >= self.stop_after:
+                self.stop_page = self.next_page
+            self.next_page += 1
+        return self.stop_page
@@ -0,0 +1,66 @@
+"""
+Compact in-memory representation of extracted MyHome.az listings
+A __slots__ record instead of a 37-key dict per listing, with repeated category
+strings interned, so crawls that keep their rows hold them in a fraction of the memory.
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Dict, Iterable, List
+
+from parquet_export import COLUMN_TYPES
+
+FIELDS = tuple(COLUMN_TYPES)
+_FIELD_SET = frozenset(FIELDS)
+
+# City, region, village, metro and type names repeat across listings; one string object each
+INTERNED_FIELDS = frozenset(name for name, kind in COLUMN_TYPES.items() if kind == 'category')
+
+
+class ListingRecord(Mapping):
+    """Read-only listing row with the same keys as extract_listing_data
+
+    Being a Mapping, it works wherever rows are read as dicts: csv.DictWriter,
+    the sinks, the Excel export and row['field'] lookups.
+    """
+
+    __slots__ = FIELDS
+
+    @classmethod
+    def from_row(cls, row: Dict) -> 'ListingRecord':
+        record = cls.__new__(cls)
+        for name in FIELDS:
+            value = row.get(name)
+            if name in INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(record, name, value)
+        return record
+
+    def __getitem__(self, key):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def __repr__(self):
+        return f"ListingRecord(id={self.id!r}, announcement_type={self.announcement_type!r})"
+
+
+def records_to_frame(records: Iterable[Mapping]):
+    """Build a DataFrame column by column, with category dtypes for the interned fields"""
+    import pandas as pd
+
+    records = list(records)
+    columns: Dict[str, List] = {name: [record[name] for record in records] for name in FIELDS}
+    df = pd.DataFrame(columns, columns=list(FIELDS))
+    for name in INTERNED_FIELDS:
+        df[name] = df[name].astype('category')
+    return df
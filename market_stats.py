@@ -0,0 +1,92 @@
+"""
+Single-pass aggregation of listing snapshots for the market charts
+A handful of vectorized groupbys turn millions of rows into a few small tables
+that every chart reads from, so chart time stays flat as the dataset grows.
+"""
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+SALE_PRICE_BINS = [0, 50000, 100000, 150000, 200000, 300000, 500000, 1000000]
+SALE_PRICE_LABELS = ['<50K', '50-100K', '100-150K', '150-200K', '200-300K', '300-500K', '500K+']
+FLAG_COLUMNS = ['is_vip', 'is_premium', 'is_price_decreased', 'credit_possible']
+
+
+@dataclass
+class MarketStats:
+    """Aggregates behind the charts; all tables are small enough to ship to worker processes
+
+    by_type_rooms: listings, priced (non-null price count) and median price per (announcement_type, room_count)
+    by_city_region: listings and median price per (city, region)
+    by_type_flags: listings, sums of FLAG_COLUMNS and listings without credit per announcement_type
+    sale_price_bins: Sale listings per SALE_PRICE_LABELS range, prices outside (0, 1M) excluded
+    """
+    total: int
+    by_type_rooms: pd.DataFrame
+    by_city_region: pd.DataFrame
+    by_type_flags: pd.DataFrame
+    sale_price_bins: pd.Series
+
+    def type_counts(self) -> pd.Series:
+        counts = self.by_type_flags['listings']
+        return counts[counts.index.notna()].sort_values(ascending=False, kind='stable')
+
+    def room_counts(self, announcement_type=None) -> pd.Series:
+        """Listings per room count, over one announcement type or all of them"""
+        table = self.by_type_rooms
+        if announcement_type is not None:
+            table = table[table['announcement_type'] == announcement_type]
+        return table.groupby('room_count')['listings'].sum().sort_index()
+
+    def room_prices(self, announcement_type) -> pd.DataFrame:
+        """Median price and priced-listing count per room count, as groupby().agg(['median', 'count'])"""
+        table = self.by_type_rooms[(self.by_type_rooms['announcement_type'] == announcement_type)
+                                   & self.by_type_rooms['room_count'].notna()]
+        return (table.set_index('room_count')[['median', 'priced']]
+                .rename(columns={'priced': 'count'}).sort_index())
+
+    def city_counts(self) -> pd.Series:
+        return self.by_city_region.groupby('city')['listings'].sum().sort_values(ascending=False, kind='stable')
+
+    def regions(self, city: str) -> pd.DataFrame:
+        """Listings and median price per region of one city, largest first"""
+        table = self.by_city_region[(self.by_city_region['city'] == city)
+                                    & self.by_city_region['region'].notna()]
+        return (table.set_index('region')[['listings', 'median']]
+                .sort_values('listings', ascending=False, kind='stable'))
+
+    def flag_total(self, column: str) -> int:
+        return int(self.by_type_flags[column].sum())
+
+    def flags(self, announcement_type) -> pd.Series:
+        return self.by_type_flags.loc[announcement_type]
+
+
+def aggregate(df: pd.DataFrame) -> MarketStats:
+    """Compute every chart statistic from a snapshot loaded with numeric prices"""
+    by_type_rooms = (df.groupby(['announcement_type', 'room_count'], dropna=False, observed=True)
+                     .agg(listings=('price', 'size'), priced=('price', 'count'),
+                          median=('price', 'median'))
+                     .reset_index())
+    by_city_region = (df.groupby(['city', 'region'], dropna=False, observed=True)
+                      .agg(listings=('price', 'size'), median=('price', 'median'))
+                      .reset_index())
+
+    flags = df[FLAG_COLUMNS].fillna(0).astype('int64')
+    flags['no_credit'] = (df['credit_possible'] == 0).astype('int64')
+    flags['listings'] = 1
+    by_type_flags = flags.groupby(df['announcement_type'], dropna=False, observed=True).sum()
+
+    sale_prices = df.loc[df['announcement_type'] == 'Sale', 'price']
+    sale_prices = sale_prices[(sale_prices > 0) & (sale_prices < 1000000)]
+    sale_price_bins = (pd.cut(sale_prices, bins=SALE_PRICE_BINS, labels=SALE_PRICE_LABELS)
+                       .value_counts().sort_index())
+
+    return MarketStats(
+        total=len(df),
+        by_type_rooms=by_type_rooms,
+        by_city_region=by_city_region,
+        by_type_flags=by_type_flags,
+        sale_price_bins=sale_price_bins,
+    )
@@ -0,0 +1,212 @@
+"""
+Scraper metrics in the Prometheus text exposition format
+Counters, gauges and latency histograms per endpoint, served on /metrics or written to a textfile
+"""
+
+import bisect
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> LabelValues:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                                for key, value in sorted(self.values.items())]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[LabelValues, float] = {}
+        self.functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Optional[Callable[[], float]], **labels):
+        """Sample the value from a callable at render time, e.g. a queue's qsize; None removes it"""
+        key = self._key(labels)
+        with self._lock:
+            if function is None:
+                self.functions.pop(key, None)
+            else:
+                self.functions[key] = function
+
+    def get(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self.functions:
+            return self.functions[key]()
+        return self.values.get(key, 0)
+
+    def render(self) -> List[str]:
+        samples = dict(self.values)
+        for key, function in list(self.functions.items()):
+            samples[key] = function()
+        return self.header() + [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                                for key, value in sorted(samples.items())]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self.counts: Dict[LabelValues, List[int]] = {}
+        self.sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self.counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sums[key] = self.sums.get(key, 0.0) + value
+
+    def count(self, **labels) -> int:
+        return sum(self.counts.get(self._key(labels), ()))
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key in sorted(self.counts):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), self.counts[key]):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {self.sums[key]!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class ScraperMetrics:
+    """All metrics the scraper exports, under the myhome_ prefix"""
+
+    def __init__(self):
+        self.requests = Counter('myhome_requests_total', "HTTP requests by endpoint, type and status",
+                                ('endpoint', 'announcement_type', 'status'))
+        self.latency = Histogram('myhome_request_duration_seconds', "Time to response headers",
+                                 ('endpoint', 'announcement_type'))
+        self.response_bytes = Counter('myhome_response_bytes_total', "Decompressed response body bytes",
+                                      ('endpoint',))
+        self.retries = Counter('myhome_retries_total', "Request attempts after the first", ('endpoint',))
+        self.throttled = Counter('myhome_throttled_total', "Responses with HTTP 429", ('endpoint',))
+        self.errors = Counter('myhome_request_errors_total', "Requests failing without a response",
+                              ('endpoint',))
+        self.in_flight = Gauge('myhome_in_flight_requests', "Requests currently waiting for a response",
+                               ('endpoint',))
+        self.hedged = Counter('myhome_hedged_requests_total', "Duplicate requests sent after the hedge delay",
+                              ('endpoint',))
+        self.circuit_open = Gauge('myhome_circuit_open', "1 while an endpoint's circuit breaker holds calls back",
+                                  ('endpoint',))
+        self.phone_lookups = Counter('myhome_phone_lookups_total', "Phone lookups by outcome", ('result',))
+        self.queue_depth = Gauge('myhome_queue_depth', "Items waiting in pipeline queues",
+                                 ('queue', 'announcement_type'))
+        self.listings = Counter('myhome_listings_total', "Listings emitted to sinks", ('announcement_type',))
+
+    def all(self) -> List[_Metric]:
+        return [value for value in vars(self).values() if isinstance(value, _Metric)]
+
+    def observe_response(self, endpoint: str, announcement_type, status: int, latency: float):
+        self.requests.inc(endpoint=endpoint, announcement_type=announcement_type or '', status=status)
+        self.latency.observe(latency, endpoint=endpoint, announcement_type=announcement_type or '')
+        if status == 429:
+            self.throttled.inc(endpoint=endpoint)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.all():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """Write a snapshot for node_exporter's textfile collector, atomically"""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(self.render(), encoding='utf-8')
+        os.replace(tmp_path, path)
+        logger.info(f"Metrics snapshot written to {path}")
+
+
+async def start_metrics_server(metrics: ScraperMetrics, host: str = '127.0.0.1', port: int = 9108):
+    """Serve metrics on http://host:port/metrics; returns the runner to clean up"""
+    async def handle(request):
+        return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,194 @@
+"""
+Local mock of the MyHome.az announcement API
+Replays a recorded cassette or serves synthetic pages, with configurable latency, slow tail
+responses, 429s and 5xx errors, and optionally new listings appearing at the top mid-crawl
+
+Usage: python mock_server.py --pages 200 --latency 0.05 --rate-429 0.02 [--cassette DIR]
+       python myhome_scraper.py --base-url http://127.0.0.1:8080/api/announcement
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+from typing import List, Optional
+import logging
+
+from aiohttp import web
+import zstandard as zstd
+
+from cassette import Cassette
+from synthetic_listings import make_listings, make_page
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api/announcement'
+
+# List query parameters the mock filters on -> address field whose id they match
+FILTER_PARAMS = {'city_id': 'city', 'region_id': 'region'}
+
+
+class MockMyHomeAPI:
+    """aiohttp application serving /list and /phone/{id} like api.myhome.az"""
+
+    def __init__(self, cassette: Optional[Cassette] = None, pages: int = 50, per_page: int = 20,
+                 latency: float = 0.0, phone_latency: Optional[float] = None, rate_429: float = 0.0,
+                 retry_after: int = 1, seed: int = 0, compress: bool = True,
+                 tail_rate: float = 0.0, tail_latency: float = 0.0, rate_500: float = 0.0,
+                 insert_every: int = 0, insert_limit: Optional[int] = None):
+        self.cassette = cassette
+        self.pages = pages
+        self.per_page = per_page
+        self.latency = latency
+        self.phone_latency = latency if phone_latency is None else phone_latency
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.tail_rate = tail_rate  # Fraction of responses delayed a further tail_latency seconds
+        self.tail_latency = tail_latency
+        self.rate_500 = rate_500
+        # Every insert_every list requests of a type, a new listing is published at the top of it
+        self.insert_every = insert_every
+        self.insert_limit = insert_limit
+        self.inserted: List[int] = []
+        self._list_requests = {}
+        self.seed = seed
+        self.compress = compress
+        self.rng = random.Random(seed)
+        self.compressor = zstd.ZstdCompressor(level=3)
+        self.requests = {'list': 0, 'phone': 0, '429': 0, '500': 0}
+        self._catalogues = {}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get(f'{API_PREFIX}/list', self.handle_list)
+        app.router.add_get(f'{API_PREFIX}/phone/{{listing_id}}', self.handle_phone)
+        return app
+
+    def _body_response(self, payload: bytes, content_type: str) -> web.Response:
+        headers = {'content-type': content_type}
+        if self.compress:
+            payload = self.compressor.compress(payload)
+            headers['content-encoding'] = 'zstd'
+        return web.Response(body=payload, headers=headers)
+
+    async def _throttle(self, delay: float) -> Optional[web.Response]:
+        if self.tail_rate and self.rng.random() < self.tail_rate:
+            delay += self.tail_latency
+        if delay:
+            await asyncio.sleep(delay)
+        if self.rate_429 and self.rng.random() < self.rate_429:
+            self.requests['429'] += 1
+            return web.Response(status=429, headers={'retry-after': str(self.retry_after)})
+        if self.rate_500 and self.rng.random() < self.rate_500:
+            self.requests['500'] += 1
+            return web.Response(status=500, text="Internal Server Error")
+        return None
+
+    def _replay(self, key: str) -> web.Response:
+        recorded = self.cassette.lookup(key)
+        if recorded is None:
+            return web.Response(status=404, text=f"Not in cassette: {key}")
+        return web.Response(status=recorded['status'], body=recorded['body'], headers=recorded['headers'])
+
+    def catalogue(self, announcement_type: int) -> List[dict]:
+        """Every synthetic listing of a type, in list order"""
+        if announcement_type not in self._catalogues:
+            self._catalogues[announcement_type] = [
+                listing for page in range(1, self.pages + 1)
+                for listing in make_page(page, self.pages, self.per_page,
+                                         seed=self.seed * 10 + announcement_type)['data']]
+        return self._catalogues[announcement_type]
+
+    def _publish(self, announcement_type: int):
+        count = self._list_requests[announcement_type] = self._list_requests.get(announcement_type, 0) + 1
+        if count % self.insert_every or (self.insert_limit is not None and len(self.inserted) >= self.insert_limit):
+            return
+        listing_id = 10 ** 7 + len(self.inserted)
+        self.catalogue(announcement_type).insert(0, make_listings(1, seed=listing_id, start_id=listing_id)[0])
+        self.inserted.append(listing_id)
+
+    def list_payload(self, request: web.Request) -> dict:
+        """Synthetic list page, narrowed by the city_id / region_id filters when given"""
+        announcement_type = int(request.query.get('announcementType', 1))
+        page = int(request.query.get('page', 1))
+        filters = {field: int(request.query[name]) for name, field in FILTER_PARAMS.items() if name in request.query}
+        if self.insert_every:
+            self._publish(announcement_type)
+        if not filters and not self.insert_every:
+            if page > self.pages:
+                return {'data': [], 'meta': {'current_page': page, 'last_page': self.pages,
+                                             'total': self.pages * self.per_page}}
+            payload = make_page(page, self.pages, self.per_page, seed=self.seed * 10 + announcement_type)
+            payload['meta']['total'] = self.pages * self.per_page
+            return payload
+        matching = [listing for listing in self.catalogue(announcement_type)
+                    if all((listing['address'].get(field) or {}).get('id') == value
+                           for field, value in filters.items())]
+        start = (page - 1) * self.per_page
+        return {'data': matching[start:start + self.per_page],
+                'meta': {'current_page': page, 'last_page': max(1, math.ceil(len(matching) / self.per_page)),
+                         'per_page': self.per_page, 'total': len(matching)}}
+
+    async def handle_list(self, request: web.Request) -> web.Response:
+        self.requests['list'] += 1
+        throttled = await self._throttle(self.latency)
+        if throttled is not None:
+            return throttled
+        if self.cassette is not None:
+            return self._replay(f"list?{request.query_string}")
+        payload = json.dumps(self.list_payload(request), ensure_ascii=False).encode('utf-8')
+        return self._body_response(payload, 'application/json')
+
+    async def handle_phone(self, request: web.Request) -> web.Response:
+        self.requests['phone'] += 1
+        throttled = await self._throttle(self.phone_latency)
+        if throttled is not None:
+            return throttled
+        listing_id = request.match_info['listing_id']
+        if self.cassette is not None:
+            return self._replay(f"phone/{listing_id}")
+        phone = f"(050) {int(listing_id) % 1000:03d}-{int(listing_id) // 1000 % 100:02d}-00"
+        return self._body_response(phone.encode('utf-8'), 'text/plain')
+
+
+async def start_mock_server(api: MockMyHomeAPI, host: str = '127.0.0.1', port: int = 0):
+    """Start the mock in the running loop; returns (runner, base_url for MyHomeScraper)"""
+    runner = web.AppRunner(api.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}{API_PREFIX}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local mock of the MyHome.az API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--cassette', help="Replay responses recorded with myhome_scraper.py --record")
+    parser.add_argument('--pages', type=int, default=50, help="Synthetic pages per announcement type")
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds added to list responses")
+    parser.add_argument('--phone-latency', type=float, help="Seconds added to phone responses")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument('--tail-rate', type=float, default=0.0, help="Fraction of responses slowed down")
+    parser.add_argument('--tail-latency', type=float, default=0.0, help="Seconds added to slowed responses")
+    parser.add_argument('--rate-500', type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument('--insert-every', type=int, default=0,
+                        help="Publish a new listing at the top every N list requests per type")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    api = MockMyHomeAPI(cassette=Cassette(args.cassette) if args.cassette else None,
+                        pages=args.pages, per_page=args.per_page, latency=args.latency,
+                        phone_latency=args.phone_latency, rate_429=args.rate_429, seed=args.seed,
+                        tail_rate=args.tail_rate, tail_latency=args.tail_latency, rate_500=args.rate_500,
+                        insert_every=args.insert_every)
+    print(f"Mock MyHome API on http://{args.host}:{args.port}{API_PREFIX}")
+    web.run_app(api.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -5,24 +5,110 @@ Scrapes all listings from MyHome.az API including both rental and sale announcem
 Retrieves phone numbers for each listing and saves data to CSV and Excel formats
 """
 
+import argparse
 import asyncio
-import aiohttp
+import itertools
+from collections import defaultdict
+from contextlib import asynccontextmanager
 import csv
-import json
 import time
 from datetime import datetime
 from pathlib import Path
-import pandas as pd
-from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlencode
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from typing import Iterable, List, Dict, Optional, Tuple
 import logging
-import zstandard as zstd
+
+from cassette import Cassette
+from crawl_journal import CrawlJournal
+from drift import PageDriftDetector
+from listing_index import ListingIndex, UnchangedPageTracker, content_hash
+from listing_record import ListingRecord
+from metrics import ScraperMetrics, start_metrics_server
+from parquet_export import COLUMN_TYPES, ParquetSink, to_bool, to_float, to_int
+from phone_resolver import PhoneResolver
+from rate_limiter import AdaptiveRateLimiter, parse_retry_after
+from resilience import CircuitBreaker, LatencyTracker, hedged
+from transport import TRANSPORTS, TransportConfig, make_transport
+from response_decoder import DecodeError, ResponseDecoder
+from sinks import RunCounters, make_sink, read_rows
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+
+def excel_text(value):
+    """Cell text with the control characters openpyxl refuses stripped out"""
+    if value is None:
+        return None
+    return ILLEGAL_CHARACTERS_RE.sub('', str(value))
+
+
+# Rows read back from CSV are all text, so cells are typed by the Parquet column schema
+EXCEL_CONVERTERS = {
+    'int64': to_int,
+    'int32': to_int,
+    'float64': to_float,
+    'bool': to_bool,
+    'category': excel_text,
+    'string': excel_text,
+}
+
+class StageStats:
+    """Item counter for one pipeline stage, used to report throughput"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.started = None
+        self.finished = None
+
+    def record(self, count: int = 1):
+        now = time.monotonic()
+        if self.started is None:
+            self.started = now
+        self.finished = now
+        self.count += count
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return self.finished - self.started
+
+    @property
+    def rate(self) -> float:
+        """Items per second between the first and last recorded item, 0.0 if unmeasurable"""
+        if self.count < 2 or self.elapsed <= 0:
+            return 0.0
+        return self.count / self.elapsed
+
+    def __str__(self) -> str:
+        rate = f"{self.rate:.2f}/s" if self.rate else "n/a"
+        return f"{self.name}: {self.count} items in {self.elapsed:.1f}s ({rate})"
+
+
+class PhoneLookupError(Exception):
+    """A phone request failed without a usable answer (no response, 429 or 5xx)"""
+
+
 class MyHomeScraper:
-    def __init__(self):
-        self.base_url = "https://api.myhome.az/api/announcement"
+    def __init__(self, page_workers: int = 10, phone_workers: int = 2,
+                 listing_queue_size: int = 200, result_queue_size: int = 200,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 index: Optional[ListingIndex] = None, incremental: bool = False,
+                 stop_after_unchanged_pages: int = 3,
+                 phone_cache_path: Optional[str] = None, phone_cache_ttl: float = 7 * 24 * 3600,
+                 journal: Optional[CrawlJournal] = None,
+                 sinks: Optional[List] = None, keep_listings: bool = True,
+                 base_url: str = "https://api.myhome.az/api/announcement",
+                 recorder: Optional[Cassette] = None, hedge_quantile: Optional[float] = 0.95,
+                 phone_breaker: Optional[CircuitBreaker] = None, transport: str = 'aiohttp',
+                 transport_config: Optional[TransportConfig] = None, enrich_phones: bool = True,
+                 drift_sample_every: int = 0):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder  # Cassette capturing raw responses for offline replay
 
         # Headers for listing requests
         self.headers = {
@@ -61,167 +147,227 @@ class MyHomeScraper:
             'sec-fetch-site': 'same-site',
             'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36'
         }
-        self.session = None
+        # aiohttp (HTTP/1.1 pool) or httpx (HTTP/2 multiplexing); opened by __aenter__
+        self.transport = make_transport(transport, self.headers, transport_config)
         self.all_listings = []
-        self.rate_limit_delay = 1.0  # 1 second delay between requests
+        self.rate_limiter = rate_limiter if rate_limiter is not None else AdaptiveRateLimiter(initial_rate=1.0)
+        self.decoder = ResponseDecoder()
+        self.metrics = ScraperMetrics()
+
+        # Tail latency: phone lookups slower than the recent hedge_quantile latency get a
+        # duplicate request, and a circuit breaker pauses them while the endpoint is failing
+        self.latency = defaultdict(LatencyTracker)  # Recent time to headers per endpoint
+        self.hedge_quantile = hedge_quantile
+        self.phone_breaker = phone_breaker if phone_breaker is not None else CircuitBreaker('phone')
+        self.metrics.circuit_open.set_function(lambda: float(self.phone_breaker.is_open), endpoint='phone')
+
+        # Pipeline settings for scrape_announcement_type
+        self.page_workers = page_workers  # Concurrent list page fetchers
+        self.phone_workers = phone_workers  # Concurrent phone lookups
+        self.listing_queue_size = listing_queue_size  # Raw listings waiting for a phone lookup
+        self.result_queue_size = result_queue_size  # Enriched listings waiting for the sink
+        self.stage_stats = {}
+
+        # Incremental crawl: stop paginating after a run of pages with only known,
+        # unchanged listings and reuse stored phone numbers
+        self.incremental = incremental
+        self.index = index if index is not None or not incremental else ListingIndex()
+        self.stop_after_unchanged_pages = stop_after_unchanged_pages
+        # Incremental runs only see the pages they fetched, so never name them like a full snapshot
+        self.output_prefix = 'myhome_listings_delta' if incremental else 'myhome_listings'
+
+        # Agencies share one phone across many listings, so lookups go through a per-user cache
+        self.phone_resolver = PhoneResolver(lambda listing_id: self.fetch_phone_number(listing_id),
+                                            cache_path=phone_cache_path, ttl=phone_cache_ttl)
+
+        # A listing-only pass skips phone requests; enrich_phones.py fills them in later for a subset
+        self.enrich_phones = enrich_phones
+
+        # Listings slide down while a crawl runs: re-read page 1 every drift_sample_every pages
+        # and re-fetch the pages skipped listings slid to (0 disables; incremental runs never do)
+        self.drift_sample_every = drift_sample_every
+
+        # Checkpoint journal: completed pages are skipped and journaled phones reused on resume
+        self.journal = journal
+
+        # Rows are streamed to sinks as they are enriched; keeping them in memory is optional
+        self.sinks = sinks or []
+        self.keep_listings = keep_listings
+        self.counters = RunCounters()
 
     async def __aenter__(self):
-        connector = aiohttp.TCPConnector(limit=10, limit_per_host=5)
-        timeout = aiohttp.ClientTimeout(total=30, connect=10)
-        self.session = aiohttp.ClientSession(
-            headers=self.headers,
-            connector=connector,
-            timeout=timeout,
-            auto_decompress=False  # Disable auto-decompression since we handle zstd manually
-        )
+        await self.transport.open()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
-
-    async def fetch_with_retry(self, url: str, max_retries: int = 3) -> Optional[Dict]:
+        await self.transport.close()
+        if self.index is not None:
+            self.index.close()
+        self.phone_resolver.save()
+        if self.journal is not None:
+            self.journal.close()
+        if self.recorder is not None:
+            self.recorder.save()
+
+    async def fetch_with_retry(self, url: str, max_retries: int = 3, endpoint: str = 'list',
+                               announcement_type: Optional[int] = None) -> Optional[Dict]:
         """Fetch data from URL with retry logic"""
+        type_label = self.type_label(announcement_type)
         for attempt in range(max_retries):
+            if attempt:
+                self.metrics.retries.inc(endpoint=endpoint)
             try:
-                await asyncio.sleep(self.rate_limit_delay)
-                async with self.session.get(url) as response:
+                recorded = False
+                await self.rate_limiter.acquire(endpoint)
+                started = time.monotonic()
+                async with self._request(endpoint, url) as response:
+                    latency = time.monotonic() - started
+                    self.rate_limiter.record(endpoint, response.status, latency,
+                                             parse_retry_after(response.headers.get('retry-after')))
+                    self.metrics.observe_response(endpoint, type_label, response.status, latency)
+                    recorded = True
+                    raw = await self._capture(url, response)
                     if response.status == 200:
-                        # Handle different compression types
-                        content_encoding = response.headers.get('content-encoding', '').lower()
-                        raw_data = await response.read()
-
-                        # Decompress if needed
-                        if content_encoding == 'zstd':
-                            try:
-                                decompressor = zstd.ZstdDecompressor()
-                                decompressed = decompressor.decompress(raw_data, max_output_size=100*1024*1024)  # 100MB max
-                                text = decompressed.decode('utf-8')
-                                return json.loads(text)
-                            except Exception as e:
-                                logger.error(f"Failed to decompress zstd data from {url}: {e}")
-                                return None
-                        elif content_encoding in ['gzip', 'deflate', 'br']:
-                            # aiohttp should handle these automatically, but try manual if needed
-                            try:
-                                text = await response.text()
-                                return json.loads(text)
-                            except Exception as e:
-                                logger.error(f"Failed to decode compressed data from {url}: {e}")
-                                return None
-                        else:
-                            # No compression or unknown compression
-                            try:
-                                text = raw_data.decode('utf-8')
-                                return json.loads(text)
-                            except UnicodeDecodeError:
-                                # Try different encodings
-                                for encoding in ['latin-1', 'cp1252', 'iso-8859-1']:
-                                    try:
-                                        text = raw_data.decode(encoding)
-                                        return json.loads(text)
-                                    except (UnicodeDecodeError, json.JSONDecodeError):
-                                        continue
-                                logger.error(f"Could not decode response from {url}")
-                                return None
-                            except json.JSONDecodeError as e:
-                                logger.error(f"Invalid JSON from {url}: {e}")
-                                return None
-                    elif response.status == 429:  # Rate limited
-                        wait_time = (attempt + 1) * 2
-                        logger.warning(f"Rate limited, waiting {wait_time}s before retry")
-                        await asyncio.sleep(wait_time)
+                        self.latency[endpoint].record(latency)
+                        try:
+                            body = await self._decoded_body(response, raw, endpoint)
+                            return await self.decoder.parse_json_async(body)
+                        except DecodeError as e:
+                            logger.error(f"Could not decode response from {url}: {e}")
+                            return None
+                    elif response.status == 429:  # Rate limited, the limiter slows down before the retry
+                        logger.warning(f"Rate limited on {url}, now at "
+                                       f"{self.rate_limiter.current_rate(endpoint):.2f} req/s")
                     else:
                         logger.warning(f"HTTP {response.status} for {url}")
             except Exception as e:
+                if not recorded:
+                    self.rate_limiter.record(endpoint, None, 0.0)
+                    self.metrics.errors.inc(endpoint=endpoint)
                 logger.error(f"Attempt {attempt + 1} failed for {url}: {e}")
                 if attempt == max_retries - 1:
                     return None
                 await asyncio.sleep((attempt + 1) * 2)
         return None
 
-    async def get_total_pages(self, announcement_type: int) -> int:
+    async def _capture(self, url: str, response) -> Optional[bytes]:
+        """Raw body of a response, saved to the cassette; None when not recording"""
+        if self.recorder is None:
+            return None
+        raw = await response.read()
+        self.recorder.record(url[len(self.base_url) + 1:], response.status, response.headers, raw)
+        return raw
+
+    @asynccontextmanager
+    async def _request(self, endpoint: str, url: str, **kwargs):
+        """GET through the transport, tracked as in flight until the response is released"""
+        self.metrics.in_flight.inc(endpoint=endpoint)
+        try:
+            async with self.transport.get(url, **kwargs) as response:
+                yield response
+        finally:
+            self.metrics.in_flight.dec(endpoint=endpoint)
+
+    async def _decoded_body(self, response, raw: Optional[bytes], endpoint: str) -> bytes:
+        """Decompressed body, streamed unless it was already captured"""
+        if raw is None:
+            body = await self.decoder.read_body(response)
+        else:
+            body = self.decoder.decompress(raw, response.headers.get('content-encoding', ''))
+        self.metrics.response_bytes.inc(len(body), endpoint=endpoint)
+        return body
+
+    @staticmethod
+    def type_label(announcement_type: Optional[int]) -> str:
+        if announcement_type is None:
+            return ''
+        return "Rent" if announcement_type == 2 else "Sale"
+
+    def list_url(self, announcement_type: int, page: int, filters: Optional[Dict] = None) -> str:
+        """List endpoint URL; filters are extra query parameters, e.g. {'city_id': 1}"""
+        query = {'announcementType': announcement_type, 'page': page, **(filters or {})}
+        return f"{self.base_url}/list?{urlencode(query)}"
+
+    async def fetch_list(self, announcement_type: int, page: int, filters: Optional[Dict] = None) -> Optional[Dict]:
+        """Raw list payload with its 'data' and pagination 'meta'"""
+        return await self.fetch_with_retry(self.list_url(announcement_type, page, filters),
+                                           announcement_type=announcement_type)
+
+    async def get_total_pages(self, announcement_type: int, filters: Optional[Dict] = None) -> int:
         """Get total number of pages for given announcement type"""
-        url = f"{self.base_url}/list?announcementType={announcement_type}&page=1"
-        data = await self.fetch_with_retry(url)
+        data = await self.fetch_list(announcement_type, 1, filters)
         if data and 'meta' in data:
             return data['meta']['last_page']
         return 0
 
-    async def fetch_listings_page(self, announcement_type: int, page: int) -> List[Dict]:
+    async def fetch_listings_page(self, announcement_type: int, page: int,
+                                  filters: Optional[Dict] = None) -> List[Dict]:
         """Fetch listings for a specific page"""
-        url = f"{self.base_url}/list?announcementType={announcement_type}&page={page}"
-        data = await self.fetch_with_retry(url)
+        data = await self.fetch_list(announcement_type, page, filters)
         if data and 'data' in data:
             return data['data']
         return []
 
     async def fetch_phone_number(self, listing_id: int) -> str:
-        """Fetch phone number for a specific listing"""
+        """Fetch phone number for a specific listing
+
+        Waits while the phone circuit is open. Once enough phone latencies are known, a
+        lookup still unanswered after the hedge_quantile latency is sent a second time and
+        the first answer wins.
+        """
+        probe = await self.phone_breaker.acquire()
+        success = None
+        try:
+            delay = self.latency['phone'].percentile(self.hedge_quantile) if self.hedge_quantile else None
+            phone = await hedged(lambda: self._fetch_phone_once(listing_id), delay,
+                                 on_hedge=lambda: self.metrics.hedged.inc(endpoint='phone'))
+            success = True
+            return phone
+        except PhoneLookupError as e:
+            success = False
+            logger.error(f"Error fetching phone for listing {listing_id}: {e}")
+            return ""
+        finally:
+            self.phone_breaker.record(success, probe)
+
+    async def _fetch_phone_once(self, listing_id: int) -> str:
+        """One phone request; raises PhoneLookupError for failures worth hedging or tripping the circuit"""
         url = f"{self.base_url}/phone/{listing_id}"
+        recorded = False
         try:
-            await asyncio.sleep(self.rate_limit_delay)
+            await self.rate_limiter.acquire('phone')
+            started = time.monotonic()
             # Use specific headers for phone requests
-            async with self.session.get(url, headers=self.phone_headers) as response:
+            async with self._request('phone', url, headers=self.phone_headers) as response:
+                latency = time.monotonic() - started
+                self.rate_limiter.record('phone', response.status, latency,
+                                         parse_retry_after(response.headers.get('retry-after')))
+                self.metrics.observe_response('phone', None, response.status, latency)
+                recorded = True
+                raw = await self._capture(url, response)
                 if response.status == 200:
-                    # Handle compression for phone responses too
-                    content_encoding = response.headers.get('content-encoding', '').lower()
-                    raw_data = await response.read()
-
-                    if content_encoding == 'zstd':
-                        try:
-                            decompressor = zstd.ZstdDecompressor()
-                            decompressed = decompressor.decompress(raw_data, max_output_size=10*1024*1024)  # 10MB max for phone
-                            phone_data = decompressed.decode('utf-8')
-                        except Exception as e:
-                            logger.error(f"Failed to decompress phone data for listing {listing_id}: {e}")
-                            return ""
-                    else:
-                        try:
-                            phone_data = raw_data.decode('utf-8')
-                        except UnicodeDecodeError:
-                            # Try different encodings
-                            for encoding in ['latin-1', 'cp1252', 'iso-8859-1']:
-                                try:
-                                    phone_data = raw_data.decode(encoding)
-                                    break
-                                except UnicodeDecodeError:
-                                    continue
-                            else:
-                                logger.error(f"Could not decode phone response for listing {listing_id}")
-                                return ""
+                    self.latency['phone'].record(latency)
+                    try:
+                        phone_data = self.decoder.decode_text(await self._decoded_body(response, raw, 'phone'))
+                    except DecodeError as e:
+                        logger.error(f"Could not decode phone response for listing {listing_id}: {e}")
+                        return ""
 
                     # Clean up phone number (remove whitespace, handle multiple numbers)
                     phones = phone_data.strip().split('\n')
                     return ', '.join([phone.strip() for phone in phones if phone.strip()])
+                elif response.status == 429 or response.status >= 500:
+                    raise PhoneLookupError(f"HTTP {response.status}")
                 else:
                     logger.warning(f"Failed to get phone for listing {listing_id}: HTTP {response.status}")
                     return ""
+        except PhoneLookupError:
+            raise
         except Exception as e:
-            logger.error(f"Error fetching phone for listing {listing_id}: {e}")
-            return ""
-
-    async def process_listings_batch(self, listings: List[Dict], announcement_type: int) -> List[Dict]:
-        """Process a batch of listings and get their phone numbers"""
-        processed_listings = []
-
-        # Create semaphore to limit concurrent phone requests
-        semaphore = asyncio.Semaphore(2)  # Reduced to 2 concurrent requests
-
-        async def process_single_listing(listing):
-            async with semaphore:
-                phone_number = await self.fetch_phone_number(listing['id'])
-                processed_listing = self.extract_listing_data(listing, announcement_type, phone_number)
-                return processed_listing
-
-        # Process all listings in the batch concurrently
-        tasks = [process_single_listing(listing) for listing in listings]
-        processed_listings = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Filter out exceptions
-        valid_listings = [listing for listing in processed_listings if not isinstance(listing, Exception)]
-
-        return valid_listings
+            if not recorded:
+                self.rate_limiter.record('phone', None, 0.0)
+                self.metrics.errors.inc(endpoint='phone')
+            raise PhoneLookupError(str(e) or type(e).__name__) from e
 
     def extract_listing_data(self, listing: Dict, announcement_type: int, phone_number: str) -> Dict:
         """Extract and structure relevant data from listing"""
@@ -238,7 +384,7 @@ class MyHomeScraper:
             'id': listing.get('id'),
             'title': listing.get('title', ''),
             'description': listing.get('description', ''),
-            'price': listing.get('price', ''),
+            'price': to_float(listing.get('price')),
             'announcement_type': 'Rent' if announcement_type == 2 else 'Sale',
             'area': listing.get('area', ''),
             'room_count': listing.get('room_count'),
@@ -275,7 +421,14 @@ class MyHomeScraper:
         }
 
     async def scrape_announcement_type(self, announcement_type: int) -> List[Dict]:
-        """Scrape all listings for a specific announcement type"""
+        """Scrape all listings for a specific announcement type
+
+        Runs as a pipeline of bounded queues: page fetchers push raw listings as
+        soon as each page arrives, phone workers enrich them, and a sink collects
+        the results, so the list and phone endpoints are busy at the same time.
+        Results are returned in page order, so a resumed crawl matches a clean one,
+        as compact read-only ListingRecord rows.
+        """
         type_name = "Rent" if announcement_type == 2 else "Sale"
         logger.info(f"Starting to scrape {type_name} listings...")
 
@@ -286,38 +439,197 @@ class MyHomeScraper:
 
         logger.info(f"Found {total_pages} pages for {type_name} listings")
 
+        # Listings from pages a previous run finished come straight from the journal
         all_listings = []
-        batch_size = 10  # Process pages in batches
-
-        for batch_start in range(1, total_pages + 1, batch_size):
-            batch_end = min(batch_start + batch_size - 1, total_pages)
-            logger.info(f"Processing pages {batch_start}-{batch_end} of {total_pages} for {type_name}")
-
-            # Fetch pages in the current batch
-            page_tasks = []
-            for page in range(batch_start, batch_end + 1):
-                task = self.fetch_listings_page(announcement_type, page)
-                page_tasks.append(task)
-
-            batch_results = await asyncio.gather(*page_tasks, return_exceptions=True)
-
-            # Collect all listings from this batch
-            batch_listings = []
-            for result in batch_results:
-                if not isinstance(result, Exception) and result:
-                    batch_listings.extend(result)
+        # Ids already queued for enrichment: a listing seen again on a later page is skipped
+        seen_ids = set()
+        if self.journal is not None:
+            restored = 0
+            for result in self.journal.completed_rows(announcement_type):
+                seen_ids.add(result[2]['id'])
+                self.emit(result[2])
+                if self.keep_listings:
+                    all_listings.append((result[0], result[1], ListingRecord.from_row(result[2])))
+                restored += 1
+            if restored:
+                logger.info(f"Restored {restored} {type_name} listings from the journal")
+
+        drift = None
+        if self.drift_sample_every and not self.incremental:
+            head = await self.fetch_listings_page(announcement_type, 1)
+            if head:
+                drift = PageDriftDetector(len(head))
+                drift.record_head([listing.get('id') for listing in head])
+
+        # (page to fetch, page it is recorded under); re-fetches after drift are recorded past total_pages
+        page_queue = asyncio.Queue()
+        listing_queue = asyncio.Queue(maxsize=self.listing_queue_size)
+        result_queue = asyncio.Queue(maxsize=self.result_queue_size)
+        for page in range(1, total_pages + 1):
+            if self.journal is None or not self.journal.is_page_done(announcement_type, page):
+                page_queue.put_nowait((page, page))
+        pending_per_page = {}
+        for queue_name, queue in (('listings', listing_queue), ('results', result_queue)):
+            self.metrics.queue_depth.set_function(queue.qsize, queue=queue_name, announcement_type=type_name)
+
+        stats = {
+            'pages': StageStats(f"{type_name} pages"),
+            'phones': StageStats(f"{type_name} phones"),
+            'sink': StageStats(f"{type_name} sink"),
+        }
+        self.stage_stats[announcement_type] = stats
+        tracker = UnchangedPageTracker(self.stop_after_unchanged_pages) if self.incremental else None
+        phones_reused = 0
+        duplicates = 0
+
+        async def sample_head():
+            head = await self.fetch_listings_page(announcement_type, 1)
+            if head:
+                drift.record_head([listing.get('id') for listing in head])
+
+        async def page_fetcher():
+            nonlocal duplicates
+            while True:
+                try:
+                    page, key = page_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                if tracker and tracker.stop_page is not None and page > tracker.stop_page:
+                    continue
+                unchanged = False
+                try:
+                    listings = await self.fetch_listings_page(announcement_type, page)
+                    if self.index is not None:
+                        hashes = [content_hash(listing) for listing in listings]
+                    else:
+                        hashes = [None] * len(listings)
+                    if tracker:
+                        unchanged = bool(listings) and all(
+                            self.index.is_unchanged(listing, listing_hash)
+                            for listing, listing_hash in zip(listings, hashes))
+                except Exception as e:
+                    logger.error(f"Failed to fetch {type_name} page {page}: {e}")
+                    listings, hashes = [], []
+                stats['pages'].record()
+                if tracker:
+                    if tracker.stop_page is None and tracker.record(page, unchanged) is not None:
+                        logger.info(f"{type_name}: {self.stop_after_unchanged_pages} consecutive unchanged "
+                                    f"pages, stopping pagination after page {tracker.stop_page}")
+                if drift is not None and listings and key == page:
+                    drift.record_page(page)
+                    if drift.sequence % self.drift_sample_every == 0:
+                        await sample_head()
+                fresh = []
+                for pos, (listing, listing_hash) in enumerate(zip(listings, hashes)):
+                    if listing.get('id') in seen_ids:
+                        duplicates += 1
+                        continue
+                    seen_ids.add(listing.get('id'))
+                    fresh.append((pos, listing, listing_hash))
+                # Empty pages are never journaled as done: they may be failed fetches
+                pending_per_page[key] = len(fresh)
+                if listings and not fresh and self.journal is not None:
+                    self.journal.record_page(announcement_type, key)
+                for pos, listing, listing_hash in fresh:
+                    await listing_queue.put((key, pos, listing, listing_hash))
+                if page % 10 == 0 or page == total_pages:
+                    logger.info(f"Fetched page {page} of {total_pages} for {type_name} "
+                                f"(listing queue: {listing_queue.qsize()})")
+
+        async def phone_worker():
+            nonlocal phones_reused
+            while True:
+                item = await listing_queue.get()
+                if item is None:
+                    return
+                page, pos, listing, listing_hash = item
+                try:
+                    phone_number = ''
+                    if self.journal is not None:
+                        phone_number = self.journal.stored_phone(announcement_type, listing['id'])
+                    if not phone_number and self.incremental:
+                        phone_number = self.index.get_phone(listing['id'])
+                    if phone_number:
+                        phones_reused += 1
+                    elif self.enrich_phones:
+                        phone_number = await self.phone_resolver.resolve(listing['id'], listing.get('user_id'))
+                        self.metrics.phone_lookups.inc(result='success' if phone_number else 'empty')
+                    else:
+                        phone_number = self.phone_resolver.cached(listing['id'], listing.get('user_id'))
+                    processed_listing = self.extract_listing_data(listing, announcement_type, phone_number)
+                    if self.index is not None:
+                        self.index.upsert(processed_listing, listing_hash)
+                    if self.journal is not None:
+                        self.journal.record_listing(announcement_type, page, pos, processed_listing)
+                except Exception as e:
+                    logger.error(f"Failed to process listing {listing.get('id')}: {e}")
+                    continue
+                finally:
+                    pending_per_page[page] -= 1
+                    if pending_per_page[page] == 0 and self.journal is not None:
+                        self.journal.record_page(announcement_type, page)
+                stats['phones'].record()
+                await result_queue.put((page, pos, processed_listing))
+
+        async def sink():
+            while True:
+                result = await result_queue.get()
+                if result is None:
+                    return
+                self.emit(result[2])
+                if self.keep_listings:
+                    all_listings.append((result[0], result[1], ListingRecord.from_row(result[2])))
+                stats['sink'].record()
+                if stats['sink'].count % 500 == 0:
+                    logger.info(f"Collected {stats['sink'].count} {type_name} listings")
+
+        sink_task = asyncio.create_task(sink())
+        phone_tasks = [asyncio.create_task(phone_worker()) for _ in range(self.phone_workers)]
+        page_tasks = [asyncio.create_task(page_fetcher()) for _ in range(self.page_workers)]
 
-            if batch_listings:
-                # Process listings to get phone numbers
-                processed_listings = await self.process_listings_batch(batch_listings, announcement_type)
-                all_listings.extend(processed_listings)
-                logger.info(f"Processed {len(processed_listings)} listings from batch {batch_start}-{batch_end}")
+        try:
+            await asyncio.gather(*page_tasks)
+            if drift is not None:
+                await sample_head()
+                refetch = drift.pages_to_refetch(total_pages)
+                if refetch:
+                    logger.info(f"{type_name}: {drift.inserted} listings inserted during the crawl, "
+                                f"re-fetching {len(refetch)} pages")
+                    for offset, page in enumerate(refetch, start=1):
+                        page_queue.put_nowait((page, total_pages + offset))
+                    page_tasks = [asyncio.create_task(page_fetcher()) for _ in range(self.page_workers)]
+                    await asyncio.gather(*page_tasks)
+            for _ in phone_tasks:
+                await listing_queue.put(None)
+            await asyncio.gather(*phone_tasks)
+            await result_queue.put(None)
+            await sink_task
+        finally:
+            for task in [*page_tasks, *phone_tasks, sink_task]:
+                task.cancel()
+            for queue_name in ('listings', 'results'):
+                self.metrics.queue_depth.set_function(None, queue=queue_name, announcement_type=type_name)
+
+        for stage in stats.values():
+            logger.info(f"Throughput {stage}")
+        if self.incremental:
+            logger.info(f"{type_name}: reused {phones_reused} stored phone numbers")
+        if duplicates:
+            logger.info(f"{type_name}: skipped {duplicates} listings already seen on another page")
+        all_listings.sort(key=lambda result: (result[0], result[1]))
+        logger.info(f"Completed scraping {len(all_listings)} {type_name} listings")
+        return [row for _, _, row in all_listings]
 
-            # Small delay between batches
-            await asyncio.sleep(1)
+    def emit(self, row: Dict):
+        """Hand one enriched listing to the running counters and every sink"""
+        self.counters.update(row)
+        self.metrics.listings.inc(announcement_type=row.get('announcement_type', ''))
+        for sink in self.sinks:
+            sink.write(row)
 
-        logger.info(f"Completed scraping {len(all_listings)} {type_name} listings")
-        return all_listings
+    def output_basename(self) -> str:
+        """Timestamped output name without extension, e.g. myhome_listings_20250929_003143"""
+        return f"{self.output_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
     async def scrape_all_listings(self) -> List[Dict]:
         """Scrape all listings from both rental and sale announcements"""
@@ -337,14 +649,22 @@ class MyHomeScraper:
                 all_listings.extend(result)
 
         self.all_listings = all_listings
-        logger.info(f"Total listings scraped: {len(all_listings)}")
+        logger.info(f"Total listings scraped: {self.counters.total}")
+        for endpoint, endpoint_stats in self.rate_limiter.stats().items():
+            logger.info(f"Rate limiter {endpoint}: {endpoint_stats['rate']} req/s, "
+                        f"{endpoint_stats['requests']} requests, "
+                        f"{endpoint_stats['throttle_events']} throttle events")
+        phone_stats = self.phone_resolver.stats()
+        logger.info(f"Phone resolver: {phone_stats['requests']} requests, {phone_stats['hits']} cache hits, "
+                    f"{phone_stats['coalesced']} coalesced, {phone_stats['requests_saved']} requests saved "
+                    f"({phone_stats['hit_rate']:.1%} hit rate)")
         return all_listings
 
     def save_to_csv(self, filename: str = None):
         """Save scraped data to CSV file"""
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"myhome_listings_{timestamp}.csv"
+            filename = f"{self.output_prefix}_{timestamp}.csv"
 
         if not self.all_listings:
             logger.warning("No data to save")
@@ -362,81 +682,190 @@ class MyHomeScraper:
         logger.info(f"Data saved to CSV: {filepath}")
         return filepath
 
-    def save_to_excel(self, filename: str = None):
-        """Save scraped data to Excel file"""
+    def save_to_excel(self, filename: str = None, rows: Optional[Iterable[Dict]] = None,
+                      include_all_sheet: bool = True):
+        """Save scraped data to Excel file, from self.all_listings unless rows are given
+
+        Uses a write-only workbook and a single pass over the rows, so memory stays
+        flat and each row is converted once per sheet it lands on. The duplicated
+        "All Listings" sheet can be dropped with include_all_sheet=False.
+        """
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"myhome_listings_{timestamp}.xlsx"
+            filename = f"{self.output_prefix}_{timestamp}.xlsx"
 
-        if not self.all_listings:
+        rows = iter(self.all_listings if rows is None else rows)
+        first_row = next(rows, None)
+        if first_row is None:
             logger.warning("No data to save")
             return
 
         filepath = Path(filename)
-
-        # Create DataFrame
-        df = pd.DataFrame(self.all_listings)
-
-        # Create Excel writer with multiple sheets
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-            # All listings
-            df.to_excel(writer, sheet_name='All Listings', index=False)
-
-            # Sale listings only
-            sale_df = df[df['announcement_type'] == 'Sale']
-            if not sale_df.empty:
-                sale_df.to_excel(writer, sheet_name='Sale Listings', index=False)
-
-            # Rent listings only
-            rent_df = df[df['announcement_type'] == 'Rent']
-            if not rent_df.empty:
-                rent_df.to_excel(writer, sheet_name='Rent Listings', index=False)
-
-            # Summary statistics
-            summary_data = {
-                'Metric': ['Total Listings', 'Sale Listings', 'Rent Listings', 'With Phone Numbers'],
-                'Count': [
-                    len(df),
-                    len(sale_df),
-                    len(rent_df),
-                    len(df[df['phone_number'] != ''])
-                ]
-            }
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
+        fieldnames = list(first_row.keys())
+        converters = [EXCEL_CONVERTERS.get(COLUMN_TYPES.get(name), excel_text) for name in fieldnames]
+
+        workbook = Workbook(write_only=True)
+        all_sheet = workbook.create_sheet('All Listings') if include_all_sheet else None
+        type_sheets = {
+            'Sale': workbook.create_sheet('Sale Listings'),
+            'Rent': workbook.create_sheet('Rent Listings'),
+        }
+        summary_sheet = workbook.create_sheet('Summary')
+        for sheet in [all_sheet, *type_sheets.values()]:
+            if sheet is not None:
+                sheet.append(fieldnames)
+
+        counters = RunCounters()
+        for row in itertools.chain([first_row], rows):
+            counters.update(row)
+            values = [convert(row.get(name)) for name, convert in zip(fieldnames, converters)]
+            if all_sheet is not None:
+                all_sheet.append(values)
+            type_sheet = type_sheets.get(row.get('announcement_type'))
+            if type_sheet is not None:
+                type_sheet.append(values)
+
+        # Like the DataFrame version, types without listings get no sheet
+        for type_name, count in (('Sale', counters.sale), ('Rent', counters.rent)):
+            if not count:
+                type_sheets[type_name].close()
+                workbook.remove(type_sheets[type_name])
+
+        summary_sheet.append(['Metric', 'Count'])
+        summary_sheet.append(['Total Listings', counters.total])
+        summary_sheet.append(['Sale Listings', counters.sale])
+        summary_sheet.append(['Rent Listings', counters.rent])
+        summary_sheet.append(['With Phone Numbers', counters.with_phone])
+
+        workbook.save(filepath)
 
         logger.info(f"Data saved to Excel: {filepath}")
         return filepath
 
 
-async def main():
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Scrape MyHome.az listings")
+    parser.add_argument('--base-url', default="https://api.myhome.az/api/announcement",
+                        help="API root, e.g. a local mock_server.py (default: %(default)s)")
+    parser.add_argument('--record', metavar='DIR',
+                        help="Record raw list and phone responses to a cassette for mock_server.py")
+    parser.add_argument('--metrics-port', type=int,
+                        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics during the crawl")
+    parser.add_argument('--metrics-file', default='myhome_metrics.prom',
+                        help="Prometheus textfile snapshot written at exit (default: %(default)s)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Stop after consecutive unchanged pages and reuse stored phone numbers; "
+                             "output only covers the fetched pages and is saved as myhome_listings_delta_*")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv',
+                        help="Streaming output format (default: %(default)s)")
+    parser.add_argument('--compress', action='store_true',
+                        help="Compress the streaming output with zstd (.zst)")
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help="Rows buffered before each write to the output (default: %(default)s)")
+    parser.add_argument('--parquet', metavar='DIR',
+                        help="Also stream a typed Parquet dataset partitioned by type and city (needs pyarrow)")
+    parser.add_argument('--no-excel', action='store_true',
+                        help="Skip the Excel workbook")
+    parser.add_argument('--no-all-sheet', action='store_true',
+                        help="Leave out the Excel 'All Listings' sheet, which repeats the Sale and Rent sheets")
+    parser.add_argument('--journal', default='myhome_journal.jsonl',
+                        help="Checkpoint journal written during the crawl (default: %(default)s)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted crawl from --journal instead of starting over")
+    parser.add_argument('--phone-cache', default='myhome_phone_cache.json',
+                        help="Phone numbers cached per user_id across runs (default: %(default)s)")
+    parser.add_argument('--phone-cache-ttl', type=float, default=7.0,
+                        help="Days a cached phone number stays valid (default: %(default)s)")
+    parser.add_argument('--index', default='myhome_index.sqlite',
+                        help="Listing index filled by every run and used by --incremental to detect "
+                             "unchanged listings (default: %(default)s)")
+    parser.add_argument('--no-phones', action='store_true',
+                        help="Listing-only pass: no phone requests, only phones already cached are filled in; "
+                             "add phones for a subset afterwards with enrich_phones.py")
+    parser.add_argument('--drift-sample-every', type=int, default=20,
+                        help="Re-read page 1 every N pages to detect listings sliding between pages and "
+                             "re-fetch the pages they slid to; 0 disables (default: %(default)s)")
+    parser.add_argument('--transport', choices=sorted(TRANSPORTS), default='aiohttp',
+                        help="HTTP client: aiohttp pools HTTP/1.1 connections, httpx multiplexes over "
+                             "HTTP/2 (needs httpx[http2]) (default: %(default)s)")
+    parser.add_argument('--pool-size', type=int, default=10,
+                        help="Connections open at once (default: %(default)s)")
+    parser.add_argument('--per-host', type=int, default=5,
+                        help="Connections per host (default: %(default)s)")
+    parser.add_argument('--keepalive', type=float, default=15.0,
+                        help="Seconds idle connections are kept for reuse (default: %(default)s)")
+    parser.add_argument('--dns-cache-ttl', type=int, default=300,
+                        help="Seconds DNS lookups are cached by the aiohttp transport; 0 disables "
+                             "(default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None):
     """Main function to run the scraper"""
+    args = parse_args(argv)
     start_time = time.time()
 
-    async with MyHomeScraper() as scraper:
-        # Scrape all listings
-        listings = await scraper.scrape_all_listings()
-
-        if listings:
-            # Save to both CSV and Excel
-            csv_file = scraper.save_to_csv()
-            excel_file = scraper.save_to_excel()
-
-            # Print summary
-            sale_count = len([l for l in listings if l['announcement_type'] == 'Sale'])
-            rent_count = len([l for l in listings if l['announcement_type'] == 'Rent'])
-            with_phone = len([l for l in listings if l['phone_number']])
+    index = ListingIndex(args.index)
+    journal = CrawlJournal(args.journal, resume=args.resume)
+    async with MyHomeScraper(index=index, incremental=args.incremental,
+                             phone_cache_path=args.phone_cache,
+                             phone_cache_ttl=args.phone_cache_ttl * 24 * 3600,
+                             journal=journal, keep_listings=False, base_url=args.base_url,
+                             recorder=Cassette(args.record) if args.record else None,
+                             enrich_phones=not args.no_phones, drift_sample_every=args.drift_sample_every,
+                             transport=args.transport,
+                             transport_config=TransportConfig(pool_size=args.pool_size, per_host=args.per_host,
+                                                              keepalive=args.keepalive,
+                                                              dns_cache_ttl=args.dns_cache_ttl or None)) as scraper:
+        # Rows are written while the crawl runs, so memory does not grow with the site
+        sink = make_sink(args.format, scraper.output_basename(), compress=args.compress,
+                         batch_size=args.batch_size)
+        scraper.sinks.append(sink)
+        if args.parquet:
+            scraper.sinks.append(ParquetSink(args.parquet))
+        metrics_runner = None
+        if args.metrics_port:
+            metrics_runner = await start_metrics_server(scraper.metrics, port=args.metrics_port)
+        try:
+            await scraper.scrape_all_listings()
+        finally:
+            for output in scraper.sinks:
+                output.close()
+            if args.metrics_file:
+                scraper.metrics.write_textfile(args.metrics_file)
+            if metrics_runner is not None:
+                await metrics_runner.cleanup()
+
+        counters = scraper.counters
+        if counters.total:
+            excel_file = None
+            if not args.no_excel:
+                excel_file = scraper.save_to_excel(rows=read_rows(sink.path),
+                                                   include_all_sheet=not args.no_all_sheet)
+            # Outputs are complete, so the checkpoint is no longer needed
+            journal.discard()
 
             print(f"\n{'='*50}")
             print(f"SCRAPING COMPLETED SUCCESSFULLY")
             print(f"{'='*50}")
-            print(f"Total listings scraped: {len(listings)}")
-            print(f"Sale listings: {sale_count}")
-            print(f"Rent listings: {rent_count}")
-            print(f"Listings with phone numbers: {with_phone}")
+            if args.incremental:
+                print(f"Incremental run: output holds only listings on fetched pages, "
+                      f"full state is in {args.index}")
+                print(f"Listings fetched this run: {counters.total}")
+            else:
+                print(f"Total listings scraped: {counters.total}")
+            print(f"Sale listings: {counters.sale}")
+            print(f"Rent listings: {counters.rent}")
+            print(f"Listings with phone numbers: {counters.with_phone}")
             print(f"Time taken: {time.time() - start_time:.2f} seconds")
-            print(f"CSV file: {csv_file}")
-            print(f"Excel file: {excel_file}")
+            print(f"{args.format.upper()} file: {sink.path}")
+            if args.no_phones:
+                print(f"Phones skipped; fill them in for a subset with: python enrich_phones.py {sink.path} --city ...")
+            if args.parquet:
+                print(f"Parquet dataset: {args.parquet}")
+            if excel_file:
+                print(f"Excel file: {excel_file}")
             print(f"{'='*50}")
         else:
             print("No listings were scraped. Please check the logs for errors.")
@@ -0,0 +1,211 @@
+"""
+Typed Parquet export for MyHome.az listings
+Writes an Arrow dataset partitioned by announcement_type and city
+
+Usage: python parquet_export.py myhome_listings_20250929_003143.csv listings_parquet/
+"""
+
+import argparse
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLUMNS = ['announcement_type', 'city']
+
+# Column name -> Arrow type name, in extract_listing_data order
+COLUMN_TYPES = {
+    'id': 'int64',
+    'title': 'string',
+    'description': 'string',
+    'price': 'float64',
+    'announcement_type': 'category',
+    'area': 'float64',
+    'room_count': 'int32',
+    'floor_count': 'int32',
+    'floor': 'int32',
+    'house_area': 'float64',
+    'rental_type': 'category',
+    'is_repaired': 'bool',
+    'is_vip': 'bool',
+    'is_premium': 'bool',
+    'credit_possible': 'bool',
+    'in_credit': 'bool',
+    'document_id': 'int64',
+    'status': 'int32',
+    'formatted_date': 'string',
+    'user_id': 'int64',
+    'phone_number': 'string',
+    'main_image_thumb': 'string',
+    'city': 'category',
+    'city_lat': 'float64',
+    'city_lng': 'float64',
+    'region': 'category',
+    'region_lat': 'float64',
+    'region_lng': 'float64',
+    'village': 'category',
+    'village_lat': 'float64',
+    'village_lng': 'float64',
+    'address': 'string',
+    'lat': 'float64',
+    'lng': 'float64',
+    'metro_stations': 'category',
+    'is_favorite': 'bool',
+    'is_price_decreased': 'bool',
+}
+
+_NON_NUMERIC = re.compile(r'[^\d.\-]')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def to_float(value) -> Optional[float]:
+    """Parse numbers that may arrive as text such as '120 000 AZN'"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    cleaned = _NON_NUMERIC.sub('', str(value))
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def to_int(value) -> Optional[int]:
+    number = to_float(value)
+    return int(number) if number is not None else None
+
+
+def to_bool(value) -> Optional[bool]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def to_category(value) -> Optional[str]:
+    if value is None or value == '':
+        return None
+    return str(value)
+
+
+def to_string(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+CONVERTERS = {
+    'int64': to_int,
+    'int32': to_int,
+    'float64': to_float,
+    'bool': to_bool,
+    'category': to_category,
+    'string': to_string,
+}
+
+
+def listing_schema():
+    """Explicit Arrow schema matching the rows produced by extract_listing_data"""
+    pa = _require_pyarrow()
+    arrow_types = {
+        'int64': pa.int64(),
+        'int32': pa.int32(),
+        'float64': pa.float64(),
+        'bool': pa.bool_(),
+        'category': pa.dictionary(pa.int32(), pa.string()),
+        'string': pa.string(),
+    }
+    return pa.schema([(name, arrow_types[kind]) for name, kind in COLUMN_TYPES.items()])
+
+
+def rows_to_table(rows: List[Dict]):
+    """Convert extracted listing dicts (or their CSV text form) into a typed Arrow table"""
+    pa = _require_pyarrow()
+    columns = {
+        name: [CONVERTERS[kind](row.get(name)) for row in rows]
+        for name, kind in COLUMN_TYPES.items()
+    }
+    return pa.Table.from_pydict(columns, schema=listing_schema())
+
+
+class ParquetSink:
+    """Sink writing typed Parquet files under root/announcement_type=.../city=.../"""
+
+    def __init__(self, root, batch_size: int = 50000):
+        _require_pyarrow()
+        self.path = Path(root)
+        self.batch_size = batch_size
+        self.buffer: List[Dict] = []
+        self.batches_written = 0
+        self.rows_written = 0
+        self.closed = False
+
+    def write(self, row: Dict):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        pa = _require_pyarrow()
+        table = rows_to_table(self.buffer)
+        partitioning = pa.dataset.partitioning(
+            pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS]), flavor='hive')
+        # Partition columns are dictionary encoded in the schema; plain strings are needed for paths
+        for name in PARTITION_COLUMNS:
+            index = table.schema.get_field_index(name)
+            table = table.set_column(index, name, table.column(name).cast(pa.string()))
+        pa.dataset.write_dataset(
+            table, self.path, format='parquet', partitioning=partitioning,
+            basename_template=f"part-{self.batches_written:05d}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore')
+        self.rows_written += len(self.buffer)
+        self.batches_written += 1
+        self.buffer = []
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        logger.info(f"Wrote {self.rows_written} rows to Parquet dataset {self.path}")
+
+
+def read_dataset(root, columns: Optional[List[str]] = None, filter=None):
+    """Load a partitioned listing dataset, pruning columns and partitions"""
+    pa = _require_pyarrow()
+    dataset = pa.dataset.dataset(root, format='parquet', partitioning='hive')
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Convert a CSV/JSONL snapshot into a partitioned Parquet dataset"""
+    from sinks import read_rows
+
+    parser = argparse.ArgumentParser(description="Convert a listing snapshot to partitioned Parquet")
+    parser.add_argument('snapshot', help="CSV or JSONL snapshot (optionally .zst)")
+    parser.add_argument('output', help="Output dataset directory")
+    parser.add_argument('--batch-size', type=int, default=50000)
+    args = parser.parse_args(argv)
+
+    sink = ParquetSink(args.output, batch_size=args.batch_size)
+    for row in read_rows(args.snapshot):
+        sink.write(row)
+    sink.close()
+    print(f"Wrote {sink.rows_written} rows to {sink.path}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
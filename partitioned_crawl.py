@@ -0,0 +1,250 @@
+"""
+Partitioned crawl of MyHome.az: the catalogue is split by city (and deep cities by region)
+using list query filters, each partition is paginated concurrently with its own last_page,
+and listings are merged by id before any phone is looked up.
+
+Partitions come from the city and region ids in the address objects of sampled pages and
+of previous runs (--partitions-file). When their totals do not add up to the unfiltered
+total, the unfiltered pagination is crawled as well, so nothing outside them is missed.
+The filter parameter names in PARTITION_PARAMS are the ones mock_server.py implements.
+
+Usage: python partitioned_crawl.py --types 1 2 --sample-pages 3 --max-pages 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from myhome_scraper import MyHomeScraper
+from sinks import make_sink
+
+logger = logging.getLogger(__name__)
+
+# List query parameters filtering on an address field's id
+PARTITION_PARAMS = {'city': 'city_id', 'region': 'region_id'}
+
+
+def address_id(listing: Dict, field_name: str) -> Optional[int]:
+    return ((listing.get('address') or {}).get(field_name) or {}).get('id')
+
+
+@dataclass
+class Partition:
+    """One filtered pagination, with the first page already fetched while planning"""
+    announcement_type: int
+    filters: Dict[str, int]
+    last_page: int
+    total: Optional[int]
+    first_page: List[Dict] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        filters = ', '.join(f"{name}={value}" for name, value in self.filters.items())
+        return f"{MyHomeScraper.type_label(self.announcement_type)}[{filters or 'all'}]"
+
+
+class PartitionPlanner:
+    """Chooses the partitions of one announcement type"""
+
+    def __init__(self, scraper: MyHomeScraper, sample_pages: int = 3, max_pages: int = 50,
+                 known_ids: Optional[Dict[str, Iterable[int]]] = None):
+        self.scraper = scraper
+        self.sample_pages = sample_pages
+        self.max_pages = max_pages  # Partitions deeper than this are split by region
+        self.known_ids = {name: set(ids) for name, ids in (known_ids or {}).items()}
+
+    async def probe(self, announcement_type: int, filters: Dict[str, int]) -> Optional[Partition]:
+        payload = await self.scraper.fetch_list(announcement_type, 1, filters)
+        if not payload or 'meta' not in payload:
+            return None
+        meta = payload['meta']
+        return Partition(announcement_type, filters, meta.get('last_page', 0), meta.get('total'),
+                         payload.get('data') or [])
+
+    async def plan(self, announcement_type: int) -> List[Partition]:
+        whole = await self.probe(announcement_type, {})
+        if whole is None:
+            logger.error(f"Could not read the {MyHomeScraper.type_label(announcement_type)} list")
+            return []
+        sampled = list(whole.first_page)
+        for page in await asyncio.gather(*(self.scraper.fetch_listings_page(announcement_type, page)
+                                           for page in range(2, min(self.sample_pages, whole.last_page) + 1))):
+            sampled.extend(page)
+
+        city_ids = self.known_ids.get('city', set()) | {address_id(listing, 'city') for listing in sampled}
+        city_ids.discard(None)
+        cities = await asyncio.gather(*(self.probe(announcement_type, {PARTITION_PARAMS['city']: city_id})
+                                        for city_id in sorted(city_ids)))
+        partitions = []
+        for city in cities:
+            if city is None or city.total == 0:
+                continue
+            if city.last_page > self.max_pages:
+                partitions.extend(await self.split_by_region(city))
+            else:
+                partitions.append(city)
+
+        covered = sum(partition.total or 0 for partition in partitions)
+        if whole.total is None or covered < whole.total or not partitions:
+            logger.warning(f"{whole.label}: partitions cover {covered} of {whole.total} listings, "
+                           f"also crawling the unfiltered pages")
+            partitions.append(whole)
+        return partitions
+
+    async def split_by_region(self, city: Partition) -> List[Partition]:
+        region_ids = self.known_ids.get('region', set()) | {address_id(listing, 'region')
+                                                            for listing in city.first_page}
+        region_ids.discard(None)
+        regions = await asyncio.gather(*(
+            self.probe(city.announcement_type, {**city.filters, PARTITION_PARAMS['region']: region_id})
+            for region_id in sorted(region_ids)))
+        regions = [region for region in regions if region is not None and region.total]
+        # Regions not seen yet would be lost, so split only when the totals add up
+        if city.total is None or sum(region.total or 0 for region in regions) < city.total:
+            return [city]
+        return regions
+
+
+async def crawl_partitions(scraper: MyHomeScraper, partitions: List[Partition]) -> Dict:
+    """Paginate every partition concurrently and enrich each listing id once
+
+    Rows go to scraper.emit, like the regular crawl. Returns page and dedup counts and
+    the city/region ids seen, which seed the partitions of the next run.
+    """
+    page_queue = asyncio.Queue()
+    listing_queue = asyncio.Queue(maxsize=scraper.listing_queue_size)
+    seen: Set[Tuple[int, int]] = set()
+    stats = {'partitions': len(partitions), 'pages': 0, 'listings': 0, 'duplicates': 0,
+             'address_ids': {name: set() for name in PARTITION_PARAMS}}
+
+    async def offer(partition: Partition, listings: List[Dict]):
+        for listing in listings:
+            key = (partition.announcement_type, listing.get('id'))
+            if key in seen:
+                stats['duplicates'] += 1
+                continue
+            seen.add(key)
+            for name, ids in stats['address_ids'].items():
+                ids.add(address_id(listing, name))
+            await listing_queue.put((partition.announcement_type, listing))
+
+    async def page_fetcher():
+        while True:
+            try:
+                partition, page = page_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                listings = await scraper.fetch_listings_page(partition.announcement_type, page, partition.filters)
+            except Exception as e:
+                logger.error(f"Failed to fetch {partition.label} page {page}: {e}")
+                continue
+            stats['pages'] += 1
+            await offer(partition, listings)
+
+    async def phone_worker():
+        while True:
+            item = await listing_queue.get()
+            if item is None:
+                return
+            announcement_type, listing = item
+            try:
+                if scraper.enrich_phones:
+                    phone = await scraper.phone_resolver.resolve(listing['id'], listing.get('user_id'))
+                    scraper.metrics.phone_lookups.inc(result='success' if phone else 'empty')
+                else:
+                    phone = scraper.phone_resolver.cached(listing['id'], listing.get('user_id'))
+                scraper.emit(scraper.extract_listing_data(listing, announcement_type, phone))
+                stats['listings'] += 1
+            except Exception as e:
+                logger.error(f"Failed to process listing {listing.get('id')}: {e}")
+
+    for partition in partitions:
+        for page in range(2, partition.last_page + 1):
+            page_queue.put_nowait((partition, page))
+    phone_tasks = [asyncio.create_task(phone_worker()) for _ in range(scraper.phone_workers)]
+    try:
+        for partition in partitions:
+            await offer(partition, partition.first_page)
+        await asyncio.gather(*(page_fetcher() for _ in range(scraper.page_workers)))
+        for _ in phone_tasks:
+            await listing_queue.put(None)
+        await asyncio.gather(*phone_tasks)
+    finally:
+        for task in phone_tasks:
+            task.cancel()
+    return stats
+
+
+def load_known_ids(path: Optional[Path]) -> Dict[str, List[int]]:
+    if path is None or not path.exists():
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_known_ids(path: Path, known: Dict[str, Set[int]]):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({name: sorted(ids) for name, ids in known.items()}, f)
+    os.replace(tmp_path, path)
+
+
+async def run(args):
+    start_time = time.time()
+    partitions_file = Path(args.partitions_file) if args.partitions_file else None
+    known = {name: set(ids) for name, ids in load_known_ids(partitions_file).items()}
+    kwargs = {'base_url': args.base_url} if args.base_url else {}
+    async with MyHomeScraper(page_workers=args.page_workers, phone_workers=args.phone_workers,
+                             phone_cache_path=args.phone_cache, keep_listings=False,
+                             enrich_phones=not args.no_phones, **kwargs) as scraper:
+        sink = make_sink(args.format, scraper.output_basename(), compress=args.compress)
+        scraper.sinks.append(sink)
+        planner = PartitionPlanner(scraper, sample_pages=args.sample_pages, max_pages=args.max_pages,
+                                   known_ids=known)
+        try:
+            partitions = [partition for announcement_type in args.types
+                          for partition in await planner.plan(announcement_type)]
+            for partition in partitions:
+                logger.info(f"Partition {partition.label}: {partition.last_page} pages, {partition.total} listings")
+            stats = await crawl_partitions(scraper, partitions)
+        finally:
+            sink.close()
+    for name, ids in stats['address_ids'].items():
+        known.setdefault(name, set()).update(ids - {None})
+    if partitions_file is not None:
+        save_known_ids(partitions_file, known)
+    print(f"Crawled {stats['partitions']} partitions ({stats['pages']} pages after the first): "
+          f"{stats['listings']:,} listings, {stats['duplicates']:,} duplicates skipped "
+          f"in {time.time() - start_time:.1f}s")
+    print(f"{args.format.upper()} file: {sink.path}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Crawl MyHome.az split into city/region partitions")
+    parser.add_argument('--types', type=int, nargs='+', default=[1, 2], help="Announcement types (1 sale, 2 rent)")
+    parser.add_argument('--sample-pages', type=int, default=3,
+                        help="Unfiltered pages read to discover city ids (default: %(default)s)")
+    parser.add_argument('--max-pages', type=int, default=50,
+                        help="Split a city by region when it has more pages than this (default: %(default)s)")
+    parser.add_argument('--partitions-file', default='myhome_partitions.json',
+                        help="City and region ids remembered across runs (default: %(default)s)")
+    parser.add_argument('--page-workers', type=int, default=10)
+    parser.add_argument('--phone-workers', type=int, default=2)
+    parser.add_argument('--no-phones', action='store_true', help="Skip phone lookups (see enrich_phones.py)")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument('--compress', action='store_true')
+    parser.add_argument('--phone-cache', default='myhome_phone_cache.json')
+    parser.add_argument('--base-url', help="API root, e.g. a local mock_server.py")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
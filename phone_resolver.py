@@ -0,0 +1,141 @@
+"""
+Phone number resolution for MyHome.az listings
+Coalesces concurrent lookups and caches phones per user_id across runs
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PhoneResolver:
+    """Resolves listing phones through an LRU/TTL cache keyed by user_id
+
+    Listings without a user_id fall back to a per-listing key, so they are
+    still deduplicated but never share a phone with another listing.
+    """
+
+    def __init__(self, fetch: Callable[[int], Awaitable[str]], cache_path: Optional[str] = None,
+                 ttl: float = 7 * 24 * 3600, max_entries: int = 100000):
+        self.fetch = fetch
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache: OrderedDict = OrderedDict()  # key -> (phone, stored_at)
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.coalesced = 0
+        self.requests = 0
+        if self.cache_path and self.cache_path.exists():
+            self.load()
+
+    @staticmethod
+    def cache_key(listing_id: int, user_id: Optional[int]) -> str:
+        if user_id is None or user_id == '':
+            return f"listing:{listing_id}"
+        return f"user:{user_id}"
+
+    def _get_cached(self, key: str) -> Optional[str]:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        phone, stored_at = entry
+        if time.time() - stored_at > self.ttl:
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return phone
+
+    def _store(self, key: str, phone: str, stored_at: Optional[float] = None):
+        self.cache[key] = (phone, stored_at if stored_at is not None else time.time())
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+    def cached(self, listing_id: int, user_id: Optional[int] = None) -> str:
+        """The cached phone for a listing, or '' without making a request"""
+        phone = self._get_cached(self.cache_key(listing_id, user_id))
+        if phone is None:
+            return ''
+        self.hits += 1
+        return phone
+
+    async def resolve(self, listing_id: int, user_id: Optional[int] = None) -> str:
+        """Return the phone for a listing, fetching it only if no cached or in-flight value exists"""
+        key = self.cache_key(listing_id, user_id)
+
+        phone = self._get_cached(key)
+        if phone is not None:
+            self.hits += 1
+            return phone
+
+        pending = self.in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await pending
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        self.requests += 1
+        try:
+            phone = await self.fetch(listing_id)
+        except Exception as e:
+            logger.error(f"Phone lookup failed for listing {listing_id}: {e}")
+            phone = ""
+        finally:
+            del self.in_flight[key]
+
+        # Empty results are failures, so they are not cached and the next listing retries
+        if phone:
+            self._store(key, phone)
+        future.set_result(phone)
+        return phone
+
+    @property
+    def requests_saved(self) -> int:
+        return self.hits + self.coalesced
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.coalesced + self.requests
+        return self.requests_saved / total if total else 0.0
+
+    def stats(self) -> Dict:
+        return {
+            'hits': self.hits,
+            'coalesced': self.coalesced,
+            'requests': self.requests,
+            'requests_saved': self.requests_saved,
+            'hit_rate': round(self.hit_rate, 4),
+            'cached': len(self.cache),
+        }
+
+    def load(self):
+        """Load cached phones written by a previous run, dropping expired entries"""
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable phone cache {self.cache_path}: {e}")
+            return
+        now = time.time()
+        for key, (phone, stored_at) in entries.items():
+            if now - stored_at <= self.ttl:
+                self._store(key, phone, stored_at)
+        logger.info(f"Loaded {len(self.cache)} cached phone numbers from {self.cache_path}")
+
+    def save(self):
+        """Persist the cache atomically so a crash never leaves a truncated file"""
+        if not self.cache_path:
+            return
+        tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({key: list(entry) for key, entry in self.cache.items()}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
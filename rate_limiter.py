@@ -0,0 +1,145 @@
+"""
+Adaptive rate limiting for the MyHome.az API
+Token buckets per endpoint whose refill rate follows AIMD feedback from responses
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket whose rate is tuned by additive increase / multiplicative decrease"""
+
+    def __init__(self, name: str, initial_rate: float, min_rate: float, max_rate: float,
+                 increase_step: float, decrease_factor: float, latency_tolerance: float):
+        self.name = name
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step  # Requests/s added per second of healthy responses
+        self.decrease_factor = decrease_factor  # Rate multiplier applied on throttling
+        self.latency_tolerance = latency_tolerance  # Latency above baseline * tolerance counts as congestion
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.latency_ewma = None
+        self.latency_baseline = None
+        self.throttle_events = 0
+        self.requests = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def capacity(self) -> float:
+        return max(1.0, self.rate)
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    self.requests += 1
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+    def _decrease(self, reason: str):
+        now = time.monotonic()
+        self.throttle_events += 1
+        # Empty the bucket on every throttle event so the next request always waits
+        self._refill(now)
+        self.tokens = 0.0
+        # One rate cut per second at most, so a burst of in-flight failures cuts once
+        if now - self.last_decrease < 1.0:
+            return
+        self.last_decrease = now
+        old_rate = self.rate
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        logger.warning(f"Throttling {self.name} endpoint ({reason}): {old_rate:.2f} -> {self.rate:.2f} req/s")
+
+    def record(self, status: Optional[int], latency: float, retry_after: Optional[float] = None):
+        """Feed the outcome of one request back into the rate"""
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+        if status is None or status == 429 or status >= 500:
+            self._decrease(f"HTTP {status}" if status else "request error")
+            return
+
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+        if self.latency_baseline is None or self.latency_ewma < self.latency_baseline:
+            self.latency_baseline = self.latency_ewma
+        if self.latency_ewma > self.latency_baseline * self.latency_tolerance:
+            self._decrease(f"latency {self.latency_ewma:.2f}s vs baseline {self.latency_baseline:.2f}s")
+            # Let the baseline drift up so a permanently slower server is not punished forever
+            self.latency_baseline = 0.9 * self.latency_baseline + 0.1 * self.latency_ewma
+            return
+
+        if status == 200:
+            self.rate = min(self.max_rate, self.rate + self.increase_step / self.rate)
+
+
+class AdaptiveRateLimiter:
+    """Shared rate limiter keeping a separate AIMD token bucket per endpoint"""
+
+    def __init__(self, initial_rate: float = 1.0, min_rate: float = 0.2, max_rate: float = 20.0,
+                 increase_step: float = 0.5, decrease_factor: float = 0.5, latency_tolerance: float = 3.0):
+        self.settings = {
+            'initial_rate': initial_rate,
+            'min_rate': min_rate,
+            'max_rate': max_rate,
+            'increase_step': increase_step,
+            'decrease_factor': decrease_factor,
+            'latency_tolerance': latency_tolerance,
+        }
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        if endpoint not in self.buckets:
+            self.buckets[endpoint] = TokenBucket(endpoint, **self.settings)
+        return self.buckets[endpoint]
+
+    async def acquire(self, endpoint: str):
+        await self.bucket(endpoint).acquire()
+
+    def record(self, endpoint: str, status: Optional[int], latency: float, retry_after: Optional[float] = None):
+        self.bucket(endpoint).record(status, latency, retry_after)
+
+    def current_rate(self, endpoint: str) -> float:
+        return self.bucket(endpoint).rate
+
+    def throttle_events(self, endpoint: str) -> int:
+        return self.bucket(endpoint).throttle_events
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            name: {
+                'rate': round(bucket.rate, 3),
+                'requests': bucket.requests,
+                'throttle_events': bucket.throttle_events,
+            }
+            for name, bucket in self.buckets.items()
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds; HTTP-date values are ignored"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
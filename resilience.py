@@ -0,0 +1,145 @@
+"""
+Tail-latency protection for MyHome.az endpoints
+Rolling latency percentiles per endpoint set the delay after which a request is hedged
+with a duplicate, and a circuit breaker pauses an endpoint whose error rate spikes
+until a probe request gets through again.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class LatencyTracker:
+    """Latencies of the most recent requests to one endpoint"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples  # Fewer samples give no percentile rather than a noisy one
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def record(self, latency: float):
+        self.samples.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile for q in (0, 1]; None until min_samples are recorded"""
+        if len(self.samples) < max(1, self.min_samples):
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+async def hedged(call: Callable[[], Awaitable[T]], delay: Optional[float],
+                 on_hedge: Optional[Callable[[], None]] = None) -> T:
+    """Await call(), starting a second call() if the first has not finished after delay seconds
+
+    The first attempt to succeed wins and the other is cancelled. An attempt that fails
+    while the other is still running is ignored; if both fail the last error is raised.
+    With delay None the call is simply awaited.
+    """
+    if delay is None:
+        return await call()
+    first = asyncio.ensure_future(call())
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done:
+        return first.result()
+    if on_hedge is not None:
+        on_hedge()
+    pending = {first, asyncio.ensure_future(call())}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class CircuitBreaker:
+    """Closed -> open when the error rate spikes -> half-open probe -> closed again
+
+    While open, acquire() waits out open_seconds; the first caller after that is let
+    through as the probe and the others wait for its outcome. A failed probe opens the
+    circuit again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, window: int = 20, min_calls: int = 10, failure_ratio: float = 0.5,
+                 open_seconds: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.outcomes = deque(maxlen=window)  # True for success, over the last window calls
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probe_done: Optional[asyncio.Event] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != self.CLOSED
+
+    async def acquire(self) -> bool:
+        """Wait until a call may be made; True when the caller is the half-open probe"""
+        while True:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.open_seconds - self.clock()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+                    continue
+                self.state = self.HALF_OPEN
+                self._probe_done = asyncio.Event()
+                logger.info(f"Probing {self.name} endpoint")
+                return True
+            await self._probe_done.wait()
+
+    def record(self, success: Optional[bool], probe: bool = False):
+        """Outcome of a call let through by acquire(); None when it ended without one (cancelled)
+
+        Calls that started before the circuit opened and finish later are ignored.
+        """
+        if probe:
+            if success:
+                self.state = self.CLOSED
+                self.outcomes.clear()
+                logger.info(f"Circuit for {self.name} endpoint closed")
+            else:
+                # A cancelled probe proves nothing, so the next caller probes straight away
+                self._open(self.clock() - (self.open_seconds if success is None else 0.0))
+            self._probe_done.set()
+            return
+        if success is None or self.state != self.CLOSED:
+            return
+        self.outcomes.append(success)
+        failures = self.outcomes.count(False)
+        if len(self.outcomes) >= self.min_calls and failures >= self.failure_ratio * len(self.outcomes):
+            self.trips += 1
+            logger.warning(f"Circuit for {self.name} endpoint opened after {failures}/{len(self.outcomes)} "
+                           f"failed calls; pausing {self.open_seconds:.0f}s")
+            self._open(self.clock())
+
+    def _open(self, opened_at: float):
+        self.state = self.OPEN
+        self.opened_at = opened_at
+        self.outcomes.clear()
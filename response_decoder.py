@@ -0,0 +1,154 @@
+"""
+Response body decoding for the MyHome.az API
+Streams and decompresses bodies with reused zstd contexts and parses JSON from bytes
+"""
+
+import asyncio
+import json
+import threading
+import zlib
+from typing import Any, Optional
+import logging
+import zstandard as zstd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_ENCODINGS = ['latin-1', 'cp1252', 'iso-8859-1']
+
+
+class DecodeError(Exception):
+    """Raised when a response body cannot be decompressed or parsed"""
+
+
+class ResponseDecoder:
+    """Shared decoder for list and phone responses
+
+    zstd decompression contexts are expensive to build and not thread safe, so
+    one is kept per thread and reused for every response. JSON is parsed
+    straight from bytes (with orjson when installed), and bodies larger than
+    offload_threshold are parsed in the default thread pool so the event loop
+    keeps serving other requests.
+    """
+
+    def __init__(self, offload_threshold: int = 256 * 1024, max_output_size: int = 100 * 1024 * 1024,
+                 chunk_size: int = 64 * 1024):
+        self.offload_threshold = offload_threshold
+        self.max_output_size = max_output_size
+        self.chunk_size = chunk_size
+        self._local = threading.local()
+
+    @property
+    def zstd_context(self) -> zstd.ZstdDecompressor:
+        context = getattr(self._local, 'zstd', None)
+        if context is None:
+            context = self._local.zstd = zstd.ZstdDecompressor()
+        return context
+
+    def _decompressobj(self, encoding: str):
+        if encoding == 'zstd':
+            return self.zstd_context.decompressobj()
+        if encoding == 'gzip':
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if encoding == 'deflate':
+            return zlib.decompressobj()
+        if encoding == 'br':
+            if brotli is None:
+                raise DecodeError("Brotli response received but the brotli package is not installed")
+            return brotli.Decompressor()
+        return None
+
+    @staticmethod
+    def _feed(decompressor, chunk: bytes) -> bytes:
+        if hasattr(decompressor, 'decompress'):
+            return decompressor.decompress(chunk)
+        return decompressor.process(chunk)  # brotli.Decompressor
+
+    def decompress(self, raw: bytes, encoding: str) -> bytes:
+        """Decompress a fully buffered body"""
+        encoding = (encoding or '').lower()
+        decompressor = self._decompressobj(encoding)
+        if decompressor is None:
+            return raw
+        try:
+            data = self._feed(decompressor, raw)
+        except Exception as e:
+            raise DecodeError(f"Failed to decompress {encoding} body: {e}") from e
+        if len(data) > self.max_output_size:
+            raise DecodeError(f"Decompressed body exceeds {self.max_output_size} bytes")
+        return data
+
+    async def read_body(self, response) -> bytes:
+        """Read and decompress a response body chunk by chunk as it arrives"""
+        encoding = response.headers.get('content-encoding', '').lower()
+        decompressor = self._decompressobj(encoding)
+        parts = []
+        size = 0
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            if decompressor is not None:
+                try:
+                    chunk = self._feed(decompressor, chunk)
+                except Exception as e:
+                    raise DecodeError(f"Failed to decompress {encoding} body: {e}") from e
+            size += len(chunk)
+            if size > self.max_output_size:
+                raise DecodeError(f"Decompressed body exceeds {self.max_output_size} bytes")
+            parts.append(chunk)
+        return b''.join(parts)
+
+    @staticmethod
+    def parse_json(body: bytes) -> Any:
+        """Parse JSON from bytes, falling back to legacy text encodings"""
+        try:
+            if orjson is not None:
+                return orjson.loads(body)
+            return json.loads(body)
+        except (ValueError, UnicodeDecodeError) as first_error:
+            for encoding in FALLBACK_ENCODINGS:
+                try:
+                    return json.loads(body.decode(encoding))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    continue
+            raise DecodeError(f"Invalid JSON: {first_error}") from first_error
+
+    @staticmethod
+    def decode_text(body: bytes) -> str:
+        try:
+            return body.decode('utf-8')
+        except UnicodeDecodeError:
+            for encoding in FALLBACK_ENCODINGS:
+                try:
+                    return body.decode(encoding)
+                except UnicodeDecodeError:
+                    continue
+        raise DecodeError("Could not decode text body")
+
+    async def parse_json_async(self, body: bytes) -> Any:
+        """Parse JSON, in a worker thread when the body is large"""
+        if len(body) < self.offload_threshold:
+            return self.parse_json(body)
+        return await asyncio.get_running_loop().run_in_executor(None, self.parse_json, body)
+
+    async def read_json(self, response) -> Any:
+        return await self.parse_json_async(await self.read_body(response))
+
+    async def read_text(self, response) -> str:
+        return self.decode_text(await self.read_body(response))
+
+
+def legacy_decode(raw: bytes, encoding: str, max_output_size: int = 100 * 1024 * 1024) -> Optional[Any]:
+    """The previous per-response path, kept as the benchmark baseline"""
+    if encoding == 'zstd':
+        decompressor = zstd.ZstdDecompressor()
+        decompressed = decompressor.decompress(raw, max_output_size=max_output_size)
+        return json.loads(decompressed.decode('utf-8'))
+    return json.loads(raw.decode('utf-8'))
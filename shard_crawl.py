@@ -0,0 +1,283 @@
+"""
+Sharded MyHome.az crawl over a shared lease queue
+A coordinator splits the page space into leases, any number of worker processes
+(on one host or several hosts sharing a volume) fetch pages and enrich phones,
+and a merge step deduplicates the parts by listing id into one output.
+
+Usage: python shard_crawl.py plan   --queue crawl.sqlite --pages-per-lease 20
+       python shard_crawl.py worker --queue crawl.sqlite --parts parts/ --processes 4
+       python shard_crawl.py merge  --queue crawl.sqlite --output myhome_listings.csv
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+from myhome_scraper import MyHomeScraper
+from sinks import CsvSink, JsonlSink
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseQueue:
+    """SQLite-backed task queue where workers lease tasks for a limited time
+
+    A task is either a page range ('pages') or the phone enrichment of one page
+    range's listings ('phones'). Leases that are not completed before they
+    expire become available again, so a crashed worker only delays its task.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 600):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                announcement_type INTEGER NOT NULL,
+                start_page INTEGER NOT NULL,
+                end_page INTEGER NOT NULL,
+                input_path TEXT,
+                result_path TEXT,
+                state TEXT NOT NULL DEFAULT 'pending',
+                owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+
+    def add(self, kind: str, announcement_type: int, start_page: int, end_page: int,
+            input_path: Optional[str] = None):
+        self.conn.execute(
+            'INSERT INTO tasks (kind, announcement_type, start_page, end_page, input_path) VALUES (?, ?, ?, ?, ?)',
+            (kind, announcement_type, start_page, end_page, input_path))
+
+    def acquire(self, owner: str) -> Optional[Dict]:
+        """Lease the oldest pending or expired task; page ranges are served before phones"""
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute('''
+                SELECT id, kind, announcement_type, start_page, end_page, input_path, attempts FROM tasks
+                WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?)
+                ORDER BY kind = 'phones', id LIMIT 1
+            ''', (now,)).fetchone()
+            if row is None:
+                self.conn.execute('COMMIT')
+                return None
+            self.conn.execute(
+                "UPDATE tasks SET state = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE id = ?", (owner, now + self.lease_seconds, row[0]))
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        keys = ('id', 'kind', 'announcement_type', 'start_page', 'end_page', 'input_path', 'attempts')
+        task = dict(zip(keys, row))
+        if task['attempts']:
+            logger.info(f"Re-issuing expired lease for task {task['id']}")
+        return task
+
+    def renew(self, task_id: int, owner: str) -> bool:
+        cursor = self.conn.execute(
+            "UPDATE tasks SET lease_expires = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+            (time.time() + self.lease_seconds, task_id, owner))
+        return cursor.rowcount == 1
+
+    def complete(self, task: Dict, owner: str, result_path: str, follow_up: Optional[Dict] = None) -> bool:
+        """Mark a task done if this owner still holds it, optionally queueing the next stage atomically"""
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = self.conn.execute(
+                "UPDATE tasks SET state = 'done', result_path = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+                (result_path, task['id'], owner))
+            if cursor.rowcount != 1:
+                self.conn.execute('ROLLBACK')
+                logger.warning(f"Lease on task {task['id']} was lost, discarding its result")
+                return False
+            if follow_up:
+                self.add(**follow_up)
+            self.conn.execute('COMMIT')
+            return True
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def release(self, task: Dict, owner: str):
+        """Hand a task back immediately, e.g. after the worker hit an error"""
+        self.conn.execute(
+            "UPDATE tasks SET state = 'pending', owner = NULL WHERE id = ? AND owner = ? AND state = 'leased'",
+            (task['id'], owner))
+
+    def counts(self) -> Dict[str, int]:
+        rows = self.conn.execute('SELECT kind, state, COUNT(*) FROM tasks GROUP BY kind, state').fetchall()
+        return {f"{kind}:{state}": count for kind, state, count in rows}
+
+    def unfinished(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM tasks WHERE state != 'done'").fetchone()[0]
+
+    def results(self, kind: str = 'phones') -> List[str]:
+        rows = self.conn.execute(
+            "SELECT result_path FROM tasks WHERE kind = ? AND state = 'done' "
+            "ORDER BY announcement_type, start_page", (kind,)).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def write_part(path: Path, rows: List[Dict]):
+    """Write a part file under a temporary name first, so readers never see half of it"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with JsonlSink(tmp_path) as sink:
+        for row in rows:
+            sink.write(row)
+    os.replace(tmp_path, path)
+
+
+def read_part(path) -> List[Dict]:
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def plan(queue: LeaseQueue, pages_per_lease: int, **scraper_kwargs):
+    """Coordinator: split each announcement type's pages into leases"""
+    async with MyHomeScraper(**scraper_kwargs) as scraper:
+        for announcement_type in (1, 2):
+            total_pages = await scraper.get_total_pages(announcement_type)
+            for start in range(1, total_pages + 1, pages_per_lease):
+                queue.add('pages', announcement_type, start, min(start + pages_per_lease - 1, total_pages))
+            logger.info(f"Planned {total_pages} {scraper.type_label(announcement_type)} pages "
+                        f"in leases of {pages_per_lease}")
+
+
+async def run_task(scraper: MyHomeScraper, queue: LeaseQueue, task: Dict, owner: str, parts_dir: Path) -> bool:
+    announcement_type = task['announcement_type']
+    part_name = f"{task['kind']}-{announcement_type}-{task['start_page']:06d}-{task['end_page']:06d}.jsonl"
+    part_path = parts_dir / part_name
+
+    if task['kind'] == 'pages':
+        rows = []
+        for page in range(task['start_page'], task['end_page'] + 1):
+            listings = await scraper.fetch_listings_page(announcement_type, page)
+            rows.extend(scraper.extract_listing_data(listing, announcement_type, '') for listing in listings)
+            queue.renew(task['id'], owner)
+        write_part(part_path, rows)
+        follow_up = {'kind': 'phones', 'announcement_type': announcement_type, 'start_page': task['start_page'],
+                     'end_page': task['end_page'], 'input_path': str(part_path)}
+        return queue.complete(task, owner, str(part_path), follow_up)
+
+    rows = read_part(task['input_path'])
+    semaphore = asyncio.Semaphore(scraper.phone_workers)
+
+    async def enrich(row):
+        async with semaphore:
+            row['phone_number'] = await scraper.phone_resolver.resolve(row['id'], row.get('user_id'))
+
+    await asyncio.gather(*(enrich(row) for row in rows))
+    write_part(part_path, rows)
+    return queue.complete(task, owner, str(part_path))
+
+
+async def work(queue_path: str, parts_dir: str, lease_seconds: float = 600, idle_wait: float = 5.0,
+               **scraper_kwargs):
+    """Worker loop: lease tasks until none are left unfinished"""
+    queue = LeaseQueue(queue_path, lease_seconds)
+    parts = Path(parts_dir)
+    parts.mkdir(parents=True, exist_ok=True)
+    owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    completed = 0
+    async with MyHomeScraper(**scraper_kwargs) as scraper:
+        while True:
+            task = queue.acquire(owner)
+            if task is None:
+                if not queue.unfinished():
+                    break
+                # Other workers hold the remaining leases; wait in case one of them expires
+                await asyncio.sleep(idle_wait)
+                continue
+            try:
+                if await run_task(scraper, queue, task, owner, parts):
+                    completed += 1
+            except Exception as e:
+                logger.error(f"Task {task['id']} failed, handing it back: {e}")
+                queue.release(task, owner)
+    queue.close()
+    logger.info(f"Worker {owner} finished after {completed} tasks")
+    return completed
+
+
+def _work_process(kwargs: Dict):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    return asyncio.run(work(**kwargs))
+
+
+def merge(queue: LeaseQueue, output: str) -> int:
+    """Combine enriched parts into one CSV or JSONL file, keeping the first row seen per id"""
+    seen = set()
+    sink = JsonlSink(output) if output.endswith('.jsonl') else CsvSink(output)
+    with sink:
+        for path in queue.results('phones'):
+            for row in read_part(path):
+                if row['id'] in seen:
+                    continue
+                seen.add(row['id'])
+                sink.write(row)
+    return len(seen)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Sharded MyHome.az crawl over a shared lease queue")
+    parser.add_argument('command', choices=['plan', 'worker', 'merge', 'status'])
+    parser.add_argument('--queue', default='myhome_crawl_queue.sqlite', help="Shared lease queue")
+    parser.add_argument('--parts', default='myhome_parts', help="Shared directory for part files")
+    parser.add_argument('--pages-per-lease', type=int, default=20)
+    parser.add_argument('--lease-seconds', type=float, default=600)
+    parser.add_argument('--processes', type=int, default=1, help="Worker processes on this host")
+    parser.add_argument('--phone-cache', help="Per-process phone cache file prefix")
+    parser.add_argument('--base-url', help="API root, e.g. a local mock_server.py")
+    parser.add_argument('--output', default='myhome_listings_merged.csv')
+    args = parser.parse_args(argv)
+
+    scraper_kwargs = {'base_url': args.base_url} if args.base_url else {}
+    if args.command == 'plan':
+        queue = LeaseQueue(args.queue, args.lease_seconds)
+        asyncio.run(plan(queue, args.pages_per_lease, **scraper_kwargs))
+        print(queue.counts())
+    elif args.command == 'worker':
+        jobs = [{
+            'queue_path': args.queue,
+            'parts_dir': args.parts,
+            'lease_seconds': args.lease_seconds,
+            'phone_cache_path': f"{args.phone_cache}.{index}.json" if args.phone_cache else None,
+            **scraper_kwargs,
+        } for index in range(args.processes)]
+        if args.processes == 1:
+            completed = [_work_process(jobs[0])]
+        else:
+            with multiprocessing.Pool(args.processes) as pool:
+                completed = pool.map(_work_process, jobs)
+        print(f"Completed {sum(completed)} tasks")
+    elif args.command == 'merge':
+        queue = LeaseQueue(args.queue, args.lease_seconds)
+        if queue.unfinished():
+            logger.warning(f"{queue.unfinished()} tasks are not finished yet; merging what is done")
+        print(f"Merged {merge(queue, args.output)} unique listings into {args.output}")
+    else:
+        print(LeaseQueue(args.queue, args.lease_seconds).counts())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
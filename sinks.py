@@ -0,0 +1,162 @@
+"""
+Streaming output sinks for scraped MyHome.az listings
+Rows are written in batches while the crawl runs, optionally zstd-compressed
+"""
+
+import csv
+import io
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import logging
+import zstandard as zstd
+
+logger = logging.getLogger(__name__)
+
+
+def open_text_output(path: Path, compress: bool = False, level: int = 3, append: bool = False):
+    """Open a text stream for writing, compressing with zstd on the fly if asked
+
+    Appending to a .zst file adds a new zstd frame, which readers decode as one stream.
+    """
+    if not compress:
+        return open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+    raw = open(path, 'ab' if append else 'wb')
+    writer = zstd.ZstdCompressor(level=level).stream_writer(raw, closefd=True)
+    return io.TextIOWrapper(writer, encoding='utf-8', newline='')
+
+
+def open_text_input(path: Path):
+    """Open a sink output for reading, transparently decompressing .zst files"""
+    path = Path(path)
+    if path.suffix == '.zst':
+        reader = zstd.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8', newline='')
+    return open(path, newline='', encoding='utf-8')
+
+
+def read_rows(path) -> Iterator[Dict]:
+    """Stream rows back from a CSV or JSONL sink output (optionally .zst)"""
+    path = Path(path)
+    fmt = Path(path.stem).suffix if path.suffix == '.zst' else path.suffix
+    with open_text_input(path) as f:
+        if fmt == '.jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+class RunCounters:
+    """Running totals for the end-of-run summary, so no row list is needed"""
+
+    def __init__(self):
+        self.total = 0
+        self.sale = 0
+        self.rent = 0
+        self.with_phone = 0
+
+    def update(self, row: Dict):
+        self.total += 1
+        if row.get('announcement_type') == 'Sale':
+            self.sale += 1
+        elif row.get('announcement_type') == 'Rent':
+            self.rent += 1
+        if row.get('phone_number'):
+            self.with_phone += 1
+
+
+class ListSink:
+    """Keeps rows in memory; used when callers want the rows back"""
+
+    def __init__(self):
+        self.rows: List[Dict] = []
+
+    def write(self, row: Dict):
+        self.rows.append(row)
+
+    def close(self):
+        pass
+
+
+class _BatchedFileSink:
+    """Buffers rows and writes them to a file every batch_size rows"""
+
+    extension = ''
+
+    def __init__(self, path, batch_size: int = 500, compress: bool = False, append: bool = False):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.compress = compress
+        self.buffer: List[Dict] = []
+        self.rows_written = 0
+        self.file = open_text_output(self.path, compress, append=append)
+
+    def write(self, row: Dict):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self._write_batch(self.buffer)
+            self.rows_written += len(self.buffer)
+            self.buffer = []
+            self.file.flush()
+
+    def _write_batch(self, rows: List[Dict]):
+        raise NotImplementedError
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+        logger.info(f"Wrote {self.rows_written} rows to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CsvSink(_BatchedFileSink):
+    """CSV output; the header comes from fieldnames or the first row"""
+
+    extension = '.csv'
+
+    def __init__(self, path, fieldnames: Optional[List[str]] = None, batch_size: int = 500,
+                 compress: bool = False):
+        super().__init__(path, batch_size, compress)
+        self.fieldnames = fieldnames
+        self.writer = None
+
+    def _write_batch(self, rows: List[Dict]):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames or list(rows[0].keys()))
+            self.writer.writeheader()
+        self.writer.writerows(rows)
+
+
+class JsonlSink(_BatchedFileSink):
+    """JSON-lines output, one listing per line"""
+
+    extension = '.jsonl'
+
+    def _write_batch(self, rows: List[Dict]):
+        self.file.write(''.join(json.dumps(row, ensure_ascii=False, default=str) + '\n' for row in rows))
+
+
+SINKS = {
+    'csv': CsvSink,
+    'jsonl': JsonlSink,
+}
+
+
+def make_sink(fmt: str, base_name: str, compress: bool = False, batch_size: int = 500):
+    """Create a file sink named <base_name>.<fmt>[.zst]"""
+    sink_class = SINKS[fmt]
+    path = base_name + sink_class.extension + ('.zst' if compress else '')
+    return sink_class(path, batch_size=batch_size, compress=compress)
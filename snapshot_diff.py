@@ -0,0 +1,234 @@
+"""
+Diff of two listing snapshots: new, removed, repriced and re-flagged listings
+Both snapshots are hash-partitioned by listing id into spill files and each partition
+is then joined in memory, so memory is bounded by one partition, not the snapshot.
+Deltas are streamed to a JSONL file and appended to a SQLite price-history store.
+
+Usage: python snapshot_diff.py                       # the two latest snapshots
+       python snapshot_diff.py OLD.csv NEW.csv --output deltas.jsonl --history myhome_price_history.sqlite
+"""
+
+import argparse
+import json
+import sqlite3
+import tempfile
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+import logging
+
+from parquet_export import to_bool, to_float, to_int
+from sinks import JsonlSink, read_rows
+from snapshots import list_snapshots, snapshot_time
+
+logger = logging.getLogger(__name__)
+
+# Fields compared between snapshots besides the price
+TRACKED_FIELDS = {
+    'status': to_int,
+    'is_price_decreased': to_bool,
+    'is_vip': to_bool,
+    'is_premium': to_bool,
+    'credit_possible': to_bool,
+    'in_credit': to_bool,
+}
+# Carried on new and removed deltas so they can be read without the snapshots
+CONTEXT_FIELDS = ('announcement_type', 'city', 'region', 'room_count')
+
+
+def _compact(row: Dict) -> List:
+    """[id, price, tracked values, context values] as written to the spill files"""
+    return [
+        to_int(row.get('id')),
+        to_float(row.get('price')),
+        [convert(row.get(name)) for name, convert in TRACKED_FIELDS.items()],
+        [row.get(name) for name in CONTEXT_FIELDS],
+    ]
+
+
+def _partition(path, directory: Path, prefix: str, partitions: int) -> List[Path]:
+    paths = [directory / f"{prefix}-{index:03d}.jsonl" for index in range(partitions)]
+    files = [open(p, 'w', encoding='utf-8') for p in paths]
+    try:
+        for row in read_rows(path):
+            record = _compact(row)
+            if record[0] is None:
+                continue
+            files[record[0] % partitions].write(json.dumps(record, ensure_ascii=False) + '\n')
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def _read_partition(path: Path) -> Iterator[List]:
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _listing_delta(change: str, record: List, price_key: str) -> Dict:
+    delta = {'id': record[0], 'change': change, price_key: record[1]}
+    delta.update(zip(CONTEXT_FIELDS, record[3]))
+    return delta
+
+
+def diff_snapshots(old_path, new_path, partitions: int = 16) -> Iterator[Dict]:
+    """Stream deltas between two CSV/JSONL snapshots (optionally .zst)
+
+    Yields {'id', 'change': 'new' | 'removed' | 'price' | 'flags', ...}; a listing whose
+    price and flags both changed yields one delta of each kind.
+    """
+    with tempfile.TemporaryDirectory(prefix='myhome_diff_') as tmp:
+        workdir = Path(tmp)
+        old_parts = _partition(old_path, workdir, 'old', partitions)
+        new_parts = _partition(new_path, workdir, 'new', partitions)
+        for old_part, new_part in zip(old_parts, new_parts):
+            # A listing repeated within a snapshot (seen again after page drift) counts once, first row wins
+            old = {}
+            for record in _read_partition(old_part):
+                old.setdefault(record[0], record)
+            seen = set()
+            for record in _read_partition(new_part):
+                listing_id = record[0]
+                if listing_id in seen:
+                    continue
+                seen.add(listing_id)
+                before = old.pop(listing_id, None)
+                if before is None:
+                    yield _listing_delta('new', record, 'new_price')
+                    continue
+                if before[1] != record[1]:
+                    yield {'id': listing_id, 'change': 'price', 'old_price': before[1], 'new_price': record[1]}
+                changes = {name: [old_value, new_value]
+                           for name, old_value, new_value in zip(TRACKED_FIELDS, before[2], record[2])
+                           if old_value != new_value}
+                if changes:
+                    yield {'id': listing_id, 'change': 'flags', 'changes': changes}
+            for record in old.values():
+                yield _listing_delta('removed', record, 'old_price')
+
+
+class PriceHistory:
+    """Append-only SQLite store of snapshot deltas, queryable per listing"""
+
+    def __init__(self, path: str = 'myhome_price_history.sqlite', batch_size: int = 5000):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS price_history (
+                id INTEGER NOT NULL,
+                observed_at TEXT NOT NULL,
+                change TEXT NOT NULL,
+                old_price REAL,
+                new_price REAL,
+                details TEXT
+            );
+            CREATE INDEX IF NOT EXISTS price_history_id ON price_history (id, observed_at);
+            CREATE TABLE IF NOT EXISTS diffs (
+                old_snapshot TEXT NOT NULL,
+                new_snapshot TEXT NOT NULL,
+                observed_at TEXT NOT NULL,
+                PRIMARY KEY (old_snapshot, new_snapshot)
+            );
+        ''')
+        self.conn.commit()
+
+    def has_diff(self, old_snapshot: str, new_snapshot: str) -> bool:
+        return self.conn.execute('SELECT 1 FROM diffs WHERE old_snapshot = ? AND new_snapshot = ?',
+                                 (old_snapshot, new_snapshot)).fetchone() is not None
+
+    def append(self, deltas: Iterable[Dict], observed_at: str, old_snapshot: str = '',
+               new_snapshot: str = '') -> Iterator[Dict]:
+        """Store deltas as they stream past and pass them through, so one diff feeds several outputs
+
+        The whole diff is committed in one transaction with its diffs row, so an
+        interrupted run leaves nothing behind and can simply be repeated.
+        """
+        batch = []
+        for delta in deltas:
+            details = delta.get('changes')
+            if details is None and delta['change'] in ('new', 'removed'):
+                details = {name: delta.get(name) for name in CONTEXT_FIELDS}
+            batch.append((delta['id'], observed_at, delta['change'], delta.get('old_price'),
+                          delta.get('new_price'), json.dumps(details, ensure_ascii=False) if details else None))
+            if len(batch) >= self.batch_size:
+                self._insert(batch)
+                batch = []
+            yield delta
+        self._insert(batch)
+        if old_snapshot or new_snapshot:
+            self.conn.execute('INSERT OR REPLACE INTO diffs VALUES (?, ?, ?)',
+                              (old_snapshot, new_snapshot, observed_at))
+        self.conn.commit()
+
+    def _insert(self, batch: List):
+        if batch:
+            self.conn.executemany('INSERT INTO price_history VALUES (?, ?, ?, ?, ?, ?)', batch)
+
+    def history(self, listing_id: int) -> List[Dict]:
+        rows = self.conn.execute(
+            'SELECT observed_at, change, old_price, new_price, details FROM price_history '
+            'WHERE id = ? ORDER BY observed_at, rowid', (listing_id,)).fetchall()
+        return [{'observed_at': observed_at, 'change': change, 'old_price': old_price, 'new_price': new_price,
+                 'details': json.loads(details) if details else None}
+                for observed_at, change, old_price, new_price, details in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Diff two listing snapshots and record price history")
+    parser.add_argument('old', nargs='?', help="Older snapshot (default: second latest in --dir)")
+    parser.add_argument('new', nargs='?', help="Newer snapshot (default: latest in --dir)")
+    parser.add_argument('--dir', default='.', help="Where to look for snapshots when none are given")
+    parser.add_argument('--output', help="Deltas JSONL (default: myhome_deltas_<new timestamp>.jsonl)")
+    parser.add_argument('--history', default='myhome_price_history.sqlite', help="Price-history store")
+    parser.add_argument('--no-history', action='store_true', help="Only write the deltas file")
+    parser.add_argument('--partitions', type=int, default=16,
+                        help="Spill partitions; raise for larger snapshots to lower peak memory")
+    args = parser.parse_args(argv)
+
+    if args.old and args.new:
+        old_path, new_path = Path(args.old), Path(args.new)
+    elif args.old or args.new:
+        parser.error("give both snapshots or neither")
+    else:
+        snapshots = list_snapshots(args.dir)
+        if len(snapshots) < 2:
+            parser.error(f"need two myhome_listings_<timestamp>.csv snapshots in {args.dir}")
+        old_path, new_path = snapshots[-2:]
+
+    observed = snapshot_time(new_path) or datetime.now()
+    output = args.output or f"myhome_deltas_{observed.strftime('%Y%m%d_%H%M%S')}.jsonl"
+    deltas = diff_snapshots(old_path, new_path, args.partitions)
+
+    history = None if args.no_history else PriceHistory(args.history)
+    if history is not None:
+        if history.has_diff(old_path.name, new_path.name):
+            logger.warning(f"{old_path.name} -> {new_path.name} is already in {args.history}; not appending again")
+            history.close()
+            history = None
+        else:
+            deltas = history.append(deltas, observed.isoformat(timespec='seconds'), old_path.name, new_path.name)
+
+    counts = Counter()
+    with JsonlSink(output) as sink:
+        for delta in deltas:
+            counts[delta['change']] += 1
+            sink.write(delta)
+    if history is not None:
+        history.close()
+
+    print(f"{old_path.name} -> {new_path.name}: {counts['new']:,} new, {counts['removed']:,} removed, "
+          f"{counts['price']:,} price changes, {counts['flags']:,} flag changes")
+    print(f"Deltas: {output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,94 @@
+"""
+Typed, column-pruned loading of listing snapshots
+Reads myhome_listings_*.csv[.zst] with an explicit dtype schema instead of generic objects,
+and finds the latest snapshot so consumers do not hard-code file names.
+"""
+
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+import logging
+
+import pandas as pd
+
+from parquet_export import COLUMN_TYPES
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATTERN = re.compile(r'^myhome_listings_(\d{8}_\d{6})\.csv(\.zst)?$')
+
+# parquet_export kind -> pandas dtype; nullable ints/bools keep missing values without falling back to object
+PANDAS_DTYPES = {
+    'int64': 'Int64',
+    'int32': 'Int32',
+    'float64': 'float64',
+    'bool': 'boolean',
+    'category': 'category',
+    'string': 'string',
+}
+
+SNAPSHOT_DTYPES = {name: PANDAS_DTYPES[kind] for name, kind in COLUMN_TYPES.items()}
+
+_NON_NUMERIC = r'[^\d.\-]'
+
+
+def _csv_engine() -> str:
+    try:
+        import pyarrow  # noqa: F401
+        return 'pyarrow'
+    except ImportError:
+        return 'c'
+
+
+def list_snapshots(directory='.') -> List[Path]:
+    """Full snapshots oldest first, by the timestamp in their names; incremental delta files are ignored"""
+    snapshots = [(match.group(1), path) for path in Path(directory).iterdir()
+                 if (match := SNAPSHOT_PATTERN.match(path.name))]
+    return [path for _, path in sorted(snapshots)]
+
+
+def snapshot_time(path) -> Optional[datetime]:
+    match = SNAPSHOT_PATTERN.match(Path(path).name)
+    return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S') if match else None
+
+
+def latest_snapshot(directory='.') -> Path:
+    snapshots = list_snapshots(directory)
+    if not snapshots:
+        raise FileNotFoundError(f"No myhome_listings_<timestamp>.csv snapshot in {Path(directory).absolute()}")
+    return snapshots[-1]
+
+
+def load_snapshot(path=None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load a CSV snapshot (latest one when path is None) with typed columns
+
+    Only the requested columns are parsed. Snapshots written before prices were
+    normalized at scrape time, or with otherwise untyped values, are coerced
+    column by column instead.
+    """
+    path = Path(path) if path is not None else latest_snapshot()
+    dtypes = {name: SNAPSHOT_DTYPES[name] for name in (columns or SNAPSHOT_DTYPES) if name in SNAPSHOT_DTYPES}
+    try:
+        df = pd.read_csv(path, usecols=columns, dtype=dtypes, engine=_csv_engine())
+    except (ValueError, TypeError) as e:
+        logger.info(f"Typed read of {path} failed ({e}), coercing columns")
+        df = _coerce(pd.read_csv(path, usecols=columns, dtype=str, keep_default_na=False), dtypes)
+    logger.info(f"Loaded {len(df):,} rows x {len(df.columns)} columns from {path}")
+    return df
+
+
+def _coerce(df: pd.DataFrame, dtypes) -> pd.DataFrame:
+    for name, dtype in dtypes.items():
+        if name not in df:
+            continue
+        values = df[name].replace('', None)
+        if dtype in ('Int64', 'Int32', 'float64'):
+            numbers = pd.to_numeric(values.str.replace(_NON_NUMERIC, '', regex=True), errors='coerce')
+            df[name] = numbers.astype('float64') if dtype == 'float64' else numbers.round().astype(dtype)
+        elif dtype == 'boolean':
+            df[name] = values.str.strip().str.lower().isin(['1', 'true', 'yes']).astype('boolean').mask(
+                values.isna())
+        else:
+            df[name] = values.astype(dtype)
+    return df
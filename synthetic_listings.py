@@ -0,0 +1,65 @@
+"""
+Synthetic MyHome.az payloads for benchmarks
+Listings are shaped like real /announcement/list items
+"""
+
+import json
+import random
+from typing import Dict, List
+
+CITIES = ['Bakı', 'Sumqayıt', 'Gəncə', 'Xırdalan', 'Lənkəran', 'Şəki', 'Quba', 'Mingəçevir']
+REGIONS = ['Yasamal', 'Nəsimi', 'Xətai', 'Nərimanov', 'Binəqədi', 'Səbail', 'Sabunçu', 'Suraxanı',
+           'Nizami', 'Qaradağ', 'Xəzər', 'Pirallahı']
+METROS = ['Elmlər Akademiyası', '28 May', 'Gənclik', 'Nizami', 'İnşaatçılar', 'Nəriman Nərimanov']
+
+
+def make_listing(listing_id: int, rng: random.Random) -> Dict:
+    city = rng.choice(CITIES) if rng.random() < 0.2 else 'Bakı'
+    rooms = rng.choice([1, 2, 2, 3, 3, 3, 4, 5])
+    return {
+        'id': listing_id,
+        'title': f"{rooms} otaqlı mənzil, {rng.randint(40, 250)} m²",
+        'description': 'Təmirli, əşyalı mənzil satılır. ' * rng.randint(2, 12),
+        'price': rng.randint(30, 900) * 1000,
+        'area': rng.randint(30, 300),
+        'room_count': rooms,
+        'floor_count': rng.randint(5, 25),
+        'floor': rng.randint(1, 20),
+        'house_area': None,
+        'rental_type': None,
+        'is_repaired': rng.random() < 0.7,
+        'is_vip': rng.random() < 0.05,
+        'is_premium': rng.random() < 0.03,
+        'credit_possible': rng.random() < 0.2,
+        'in_credit': False,
+        'document_id': rng.randint(1, 3),
+        'status': 1,
+        'formatted_date': f"{rng.randint(1, 28):02d}.09.2025",
+        'user_id': rng.randint(1, max(1, listing_id // 20)),
+        'main_image_thumb': f"https://img.myhome.az/thumb/{listing_id}.jpg",
+        'is_favorite': False,
+        'is_price_decreased': rng.random() < 0.004,
+        'address': {
+            'city': {'id': CITIES.index(city) + 1, 'name': city, 'lat': 40.4093, 'lng': 49.8671},
+            'region': {'id': rng.randint(1, 12), 'name': rng.choice(REGIONS), 'lat': 40.39, 'lng': 49.82},
+            'village': None,
+            'address': f"{rng.choice(REGIONS)} küç. {rng.randint(1, 200)}",
+            'lat': 40.3 + rng.random() / 5,
+            'lng': 49.7 + rng.random() / 5,
+        },
+        'metro_stations': [{'name': rng.choice(METROS)}] if rng.random() < 0.6 else [],
+    }
+
+
+def make_listings(count: int, seed: int = 0, start_id: int = 1) -> List[Dict]:
+    rng = random.Random(seed)
+    return [make_listing(start_id + i, rng) for i in range(count)]
+
+
+def make_page(page: int, last_page: int, per_page: int = 20, seed: int = 0) -> Dict:
+    listings = make_listings(per_page, seed=seed * 100003 + page, start_id=page * per_page)
+    return {'data': listings, 'meta': {'current_page': page, 'last_page': last_page, 'per_page': per_page}}
+
+
+def page_bytes(page: int, last_page: int, per_page: int = 20, seed: int = 0) -> bytes:
+    return json.dumps(make_page(page, last_page, per_page, seed), ensure_ascii=False).encode('utf-8')
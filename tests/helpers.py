@@ -0,0 +1,69 @@
+"""Shared fakes for scraper tests: synthetic listings and stubbed fetch methods"""
+
+import asyncio
+import random
+
+
+def make_listing(listing_id, price=100000, user_id=None, city='Bakı', region='Yasamal'):
+    return {
+        'id': listing_id,
+        'title': f'Listing {listing_id}',
+        'description': 'desc',
+        'price': price,
+        'room_count': listing_id % 5 + 1,
+        'user_id': user_id if user_id is not None else listing_id,
+        'formatted_date': '01.10.2025',
+        'is_vip': 0,
+        'is_premium': 0,
+        'credit_possible': 1,
+        'in_credit': 0,
+        'is_price_decreased': 0,
+        'is_favorite': False,
+        'address': {
+            'city': {'id': 1, 'name': city, 'lat': 40.4, 'lng': 49.8},
+            'region': {'id': 2, 'name': region, 'lat': 40.4, 'lng': 49.8},
+            'village': None,
+            'address': 'street',
+            'lat': 40.41,
+            'lng': 49.86,
+        },
+        'metro_stations': [{'name': 'Elmlər'}],
+    }
+
+
+class FakeSite:
+    """In-memory catalogue that replaces the scraper's network methods"""
+
+    def __init__(self, pages=5, per_page=10, jitter=0.0):
+        self.pages = pages
+        self.per_page = per_page
+        self.jitter = jitter
+        self.page_calls = []
+        self.phone_calls = []
+
+    def listings(self, announcement_type, page):
+        if page > self.pages:
+            return []
+        base = announcement_type * 100000 + page * 1000
+        return [make_listing(base + i) for i in range(self.per_page)]
+
+    def install(self, scraper):
+        async def get_total_pages(announcement_type):
+            return self.pages
+
+        async def fetch_listings_page(announcement_type, page):
+            self.page_calls.append((announcement_type, page))
+            if self.jitter:
+                await asyncio.sleep(random.random() * self.jitter)
+            return self.listings(announcement_type, page)
+
+        async def fetch_phone_number(listing_id):
+            self.phone_calls.append(listing_id)
+            if self.jitter:
+                await asyncio.sleep(random.random() * self.jitter)
+            return f'050-{listing_id}'
+
+        scraper.get_total_pages = get_total_pages
+        scraper.fetch_listings_page = fetch_listings_page
+        scraper.fetch_phone_number = fetch_phone_number
+        return scraper
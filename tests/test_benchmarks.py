@@ -0,0 +1,25 @@
+import json
+
+from benchmarks.run_benchmarks import TRANSPORT_SETUPS, bench_hedging, bench_transports, run_size
+
+
+def test_small_run_reports_every_requested_stage():
+    results = run_size(100, ['decode', 'extract', 'memory', 'save_csv', 'crawl'], crawl_limit=40)
+    assert set(results) == {'decode', 'extract', 'memory', 'save_csv', 'crawl', 'peak_rss_mb'}
+    assert results['memory']['record_bytes_per_listing'] < results['memory']['dict_bytes_per_listing']
+    assert results['crawl']['listings'] == 40
+    json.dumps(results)
+
+
+def test_hedging_stage_compares_both_modes():
+    result = bench_hedging(40, tail_latency=0.1)
+    assert result['lookups'] == 40
+    assert result['unhedged']['hedged_requests'] == 0
+    assert set(result['hedged']) == {'seconds', 'p50', 'p99', 'hedged_requests'}
+
+
+def test_transport_stage_covers_every_setup():
+    results = bench_transports(40, latency=0.0)
+    assert set(results) == set(TRANSPORT_SETUPS)
+    assert results['aiohttp']['listings'] == 40
+    assert all('listings' in result or 'skipped' in result for result in results.values())
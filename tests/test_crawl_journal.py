@@ -0,0 +1,62 @@
+import asyncio
+
+from crawl_journal import CrawlJournal
+from helpers import FakeSite
+from myhome_scraper import MyHomeScraper
+
+
+def crawl(site, journal):
+    scraper = site.install(MyHomeScraper(page_workers=3, phone_workers=2, journal=journal))
+    return asyncio.run(scraper.scrape_announcement_type(1))
+
+
+def test_rows_come_back_in_page_order(tmp_path):
+    site = FakeSite(pages=6, jitter=0.002)
+    rows = crawl(site, CrawlJournal(str(tmp_path / 'journal.jsonl')))
+    assert [row['id'] for row in rows] == [row['id'] for page in range(1, 7) for row in site.listings(1, page)]
+
+
+def test_resume_skips_finished_pages_and_matches_clean_run(tmp_path):
+    clean = crawl(FakeSite(pages=6), None)
+
+    path = str(tmp_path / 'journal.jsonl')
+    crashing = FakeSite(pages=6)
+    scraper = crashing.install(MyHomeScraper(page_workers=1, phone_workers=1, journal=CrawlJournal(path)))
+    original = scraper.fetch_phone_number
+
+    async def dies_on_page_4(listing_id):
+        if listing_id // 1000 % 100 == 4:
+            raise KeyboardInterrupt
+        return await original(listing_id)
+
+    scraper.fetch_phone_number = dies_on_page_4
+    try:
+        asyncio.run(scraper.scrape_announcement_type(1))
+    except KeyboardInterrupt:
+        pass
+    scraper.journal.close()
+
+    journal = CrawlJournal(path, resume=True)
+    assert journal.completed_pages[1] == {1, 2, 3}
+    resumed_site = FakeSite(pages=6)
+    resumed = crawl(resumed_site, journal)
+    assert [page for _, page in resumed_site.page_calls] == [4, 5, 6]
+    assert len(resumed_site.phone_calls) == 30
+    assert resumed == clean
+
+
+def test_partial_page_reuses_journaled_phones_and_torn_line_is_ignored(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = CrawlJournal(str(path))
+    row = MyHomeScraper().extract_listing_data(FakeSite().listings(1, 1)[0], 1, '050-x')
+    journal.record_listing(1, 1, 0, row)
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "listing", "ty')
+
+    site = FakeSite(pages=1)
+    rows = crawl(site, CrawlJournal(str(path), resume=True))
+    assert len(rows) == 10
+    assert rows[0]['phone_number'] == '050-x'
+    assert row['id'] not in site.phone_calls
+    assert len(site.phone_calls) == 9
@@ -0,0 +1,93 @@
+import asyncio
+import random
+
+import pytest
+
+from drift import PageDriftDetector, inserted_above
+from mock_server import MockMyHomeAPI, start_mock_server
+from myhome_scraper import MyHomeScraper
+from rate_limiter import AdaptiveRateLimiter
+from sinks import ListSink
+
+
+def test_inserted_above_counts_new_items_at_the_top():
+    assert inserted_above([1, 2, 3], [9, 8, 1, 2]) == 2
+    assert inserted_above([1, 2, 3], [7, 2, 3]) == 0  # 1 was removed, 2 kept its place
+    assert inserted_above([1, 2], [5, 6]) is None
+
+
+def page_of(items, page, per_page):
+    return items[(page - 1) * per_page:page * per_page]
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_refetched_pages_cover_every_skipped_listing(seed):
+    rng = random.Random(seed)
+    per_page, pages = 10, 12
+    items = list(range(pages * per_page))
+    original = set(items)
+    next_id = 1000
+    detector = PageDriftDetector(per_page)
+    detector.record_head(page_of(items, 1, per_page))
+    seen = set()
+    order = list(range(1, pages + 1))
+    rng.shuffle(order)
+    for page in order:
+        for _ in range(rng.randint(0, 3)):
+            items.insert(0, next_id)
+            next_id += 1
+        seen.update(page_of(items, page, per_page))
+        detector.record_page(page)
+        if detector.sequence % 3 == 0:
+            detector.record_head(page_of(items, 1, per_page))
+    detector.record_head(page_of(items, 1, per_page))
+
+    refetched = {listing_id for page in detector.pages_to_refetch(pages)
+                 for listing_id in page_of(items, page, per_page)}
+    assert original - seen <= refetched
+    assert set(items) <= seen | refetched
+
+
+def test_no_refetch_without_drift():
+    detector = PageDriftDetector(10)
+    detector.record_head(list(range(10)))
+    for page in (3, 1, 2):
+        detector.record_page(page)
+    detector.record_head(list(range(10)))
+    assert detector.pages_to_refetch(3) == []
+
+
+def crawl(api, **scraper_kwargs):
+    async def scenario():
+        runner, base_url = await start_mock_server(api)
+        try:
+            limiter = AdaptiveRateLimiter(initial_rate=1000.0, max_rate=1000.0)
+            sink = ListSink()
+            async with MyHomeScraper(base_url=base_url, rate_limiter=limiter, sinks=[sink], keep_listings=False,
+                                     **scraper_kwargs) as scraper:
+                await scraper.scrape_announcement_type(1)
+            return sink.rows
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(scenario())
+
+
+def test_drifting_catalogue_is_crawled_completely_without_duplicates():
+    api = MockMyHomeAPI(pages=20, per_page=10, insert_every=2, insert_limit=12)
+    original = {listing['id'] for listing in api.catalogue(1)}
+    rows = crawl(api, page_workers=4, drift_sample_every=4)
+    ids = [row['id'] for row in rows]
+    assert len(ids) == len(set(ids))
+    assert original <= set(ids)
+    assert set(api.inserted) <= set(ids)
+    assert api.requests['phone'] <= len(ids)
+
+
+def test_repeated_listing_is_enriched_once():
+    api = MockMyHomeAPI(pages=10, per_page=10, insert_every=1, insert_limit=5)
+    rows = crawl(api, page_workers=1)
+    ids = [row['id'] for row in rows]
+    # One page at a time: every insertion pushes a listing already read onto the next page
+    assert len(ids) == len(set(ids))
+    assert api.requests['phone'] <= len(ids)
@@ -0,0 +1,93 @@
+import asyncio
+
+from enrich_phones import ListingFilter, enrich_snapshot, main, merge_phones, select_listings, snapshot_format
+from mock_server import MockMyHomeAPI, start_mock_server
+from myhome_scraper import MyHomeScraper
+from rate_limiter import AdaptiveRateLimiter
+from sinks import CsvSink, JsonlSink, read_rows
+
+
+def row(listing_id, **values):
+    base = {'id': str(listing_id), 'announcement_type': 'Sale', 'city': 'Bakı', 'region': 'Yasamal',
+            'room_count': '2', 'price': '150000.0', 'user_id': str(listing_id), 'phone_number': ''}
+    base.update(values)
+    return base
+
+
+def write_snapshot(path, rows):
+    with CsvSink(path) as sink:
+        for values in rows:
+            sink.write(values)
+
+
+def test_filter_matches_snapshot_text_values():
+    listing_filter = ListingFilter(cities={'bakı'}, room_counts={2, 3}, min_price=100000, max_price=200000,
+                                   announcement_types={'Sale'})
+    assert listing_filter.matches(row(1))
+    assert not listing_filter.matches(row(2, city='Sumqayıt'))
+    assert not listing_filter.matches(row(3, room_count='5'))
+    assert not listing_filter.matches(row(4, price='250000.0'))
+    assert not listing_filter.matches(row(5, price=''))
+    assert not listing_filter.matches(row(6, announcement_type='Rent'))
+    assert ListingFilter().matches(row(7, price=''))
+
+
+def test_only_listings_without_phone_are_selected(tmp_path):
+    path = tmp_path / 'myhome_listings_20250101_000000.csv'
+    write_snapshot(path, [row(1), row(2, phone_number='050'), row(3, region='Xətai'), row(1)])
+    total, targets = select_listings(path, ListingFilter(regions={'Yasamal'}))
+    assert total == 4
+    assert targets == {1: 1}
+    assert select_listings(path, ListingFilter(regions={'Yasamal'}), refresh=True)[1] == {1: 1, 2: 2}
+
+
+def test_merge_keeps_other_rows_and_format(tmp_path):
+    path = tmp_path / 'myhome_listings_20250101_000000.jsonl.zst'
+    assert snapshot_format(path) == ('jsonl', True)
+    with JsonlSink(path, compress=True) as sink:
+        sink.write({'id': 1, 'phone_number': ''})
+        sink.write({'id': 2, 'phone_number': 'kept'})
+    assert merge_phones(path, {1: '050 111', 2: ''}) == 1
+    assert list(read_rows(path)) == [{'id': 1, 'phone_number': '050 111'}, {'id': 2, 'phone_number': 'kept'}]
+    assert not (tmp_path / (path.name + '.tmp')).exists()
+
+
+def test_listing_only_crawl_then_filtered_enrichment(tmp_path):
+    snapshot = tmp_path / 'myhome_listings_20250101_000000.csv'
+
+    async def scenario():
+        api = MockMyHomeAPI(pages=5, per_page=20)
+        runner, base_url = await start_mock_server(api)
+        try:
+            limiter = AdaptiveRateLimiter(initial_rate=1000.0, max_rate=1000.0)
+            sink = CsvSink(snapshot)
+            async with MyHomeScraper(base_url=base_url, rate_limiter=limiter, sinks=[sink], keep_listings=False,
+                                     enrich_phones=False) as scraper:
+                await scraper.scrape_announcement_type(1)
+            sink.close()
+            listing_phase = dict(api.requests)
+
+            async with MyHomeScraper(base_url=base_url, rate_limiter=limiter) as scraper:
+                result = await enrich_snapshot(scraper, snapshot, ListingFilter(cities={'Sumqayıt', 'Gəncə'}))
+            return listing_phase, result, api.requests['phone']
+        finally:
+            await runner.cleanup()
+
+    listing_phase, result, phone_requests = asyncio.run(scenario())
+    assert listing_phase['phone'] == 0
+    assert result['rows'] == 100
+    assert 0 < result['matched'] < 100
+    assert phone_requests == result['requests'] <= result['matched']
+
+    rows = list(read_rows(snapshot))
+    assert len(rows) == 100
+    enriched = [r for r in rows if r['phone_number']]
+    assert len(enriched) == result['updated'] == result['matched']
+    assert all(r['city'] in ('Sumqayıt', 'Gəncə') for r in enriched)
+
+
+def test_dry_run_makes_no_requests(tmp_path, capsys):
+    path = tmp_path / 'myhome_listings_20250101_000000.csv'
+    write_snapshot(path, [row(1), row(2, room_count='4')])
+    main([str(path), '--rooms', '4', '--type', 'sale', '--dry-run'])
+    assert '1 of 2 listings would be enriched' in capsys.readouterr().out
@@ -0,0 +1,43 @@
+from openpyxl import load_workbook
+
+from helpers import make_listing
+from myhome_scraper import MyHomeScraper
+from sinks import CsvSink, read_rows
+
+
+def row_count(sheet):
+    return sum(1 for _ in sheet.iter_rows(values_only=True))
+
+
+def sample_rows():
+    scraper = MyHomeScraper()
+    rows = [scraper.extract_listing_data(make_listing(i), 1, '050' if i % 2 else '') for i in range(3)]
+    rows.append(scraper.extract_listing_data(make_listing(9), 2, '051'))
+    return rows
+
+
+def test_single_pass_workbook_with_summary(tmp_path):
+    path = MyHomeScraper().save_to_excel(str(tmp_path / 'out.xlsx'), rows=iter(sample_rows()))
+    workbook = load_workbook(path, read_only=True)
+    assert workbook.sheetnames == ['All Listings', 'Sale Listings', 'Rent Listings', 'Summary']
+    assert row_count(workbook['All Listings']) == 5
+    assert row_count(workbook['Sale Listings']) == 4
+    assert row_count(workbook['Rent Listings']) == 2
+    summary = {metric: count for metric, count in workbook['Summary'].iter_rows(min_row=2, values_only=True)}
+    assert summary == {'Total Listings': 4, 'Sale Listings': 3, 'Rent Listings': 1, 'With Phone Numbers': 2}
+
+
+def test_csv_rows_are_typed_and_all_sheet_can_be_dropped(tmp_path):
+    with CsvSink(tmp_path / 'out.csv') as sink:
+        for row in sample_rows()[:3]:
+            sink.write(dict(row, description='bad\x0bchar'))
+    path = MyHomeScraper().save_to_excel(str(tmp_path / 'out.xlsx'), rows=read_rows(tmp_path / 'out.csv'),
+                                         include_all_sheet=False)
+    workbook = load_workbook(path, read_only=True)
+    assert workbook.sheetnames == ['Sale Listings', 'Summary']
+    header, first = list(workbook['Sale Listings'].iter_rows(max_row=2, values_only=True))
+    row = dict(zip(header, first))
+    assert row['id'] == 0
+    assert row['price'] == 100000
+    assert row['is_vip'] is False
+    assert row['description'] == 'badchar'
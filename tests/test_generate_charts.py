@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+import generate_charts
+from market_stats import aggregate
+from myhome_scraper import MyHomeScraper
+from synthetic_listings import make_listings
+
+
+@pytest.fixture(scope='module')
+def stats():
+    scraper = MyHomeScraper()
+    rows = [scraper.extract_listing_data(listing, 1 + listing['id'] % 3 // 2, '')
+            for listing in make_listings(600, seed=5)]
+    return aggregate(pd.DataFrame(rows))
+
+
+def test_every_chart_is_registered_with_a_unique_number():
+    charts = generate_charts.select_charts()
+    assert [c.number for c in charts] == list(range(1, 13))
+    assert charts[0].filename == '01_market_composition.png'
+
+
+def test_select_charts_by_number_or_name():
+    selected = generate_charts.select_charts(['12', '04', 'room_distribution', 'regional_pricing'])
+    assert [c.name for c in selected] == ['room_distribution', 'regional_pricing', 'regional_performance']
+    with pytest.raises(ValueError):
+        generate_charts.select_charts(['13'])
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_render_subset(tmp_path, stats, workers):
+    charts = generate_charts.select_charts(['1', '4', '10'])
+    report = generate_charts.render_charts(stats, charts, tmp_path, dpi=30, workers=workers)
+    assert sorted(p.name for p in tmp_path.glob('*.png')) == [
+        '01_market_composition.png', '04_regional_pricing.png', '10_price_distribution.png']
+    assert report == {'rendered': ['market_composition', 'regional_pricing', 'price_distribution'],
+                      'skipped': []}
+
+
+def test_all_charts_render_from_a_scraped_snapshot(tmp_path, stats):
+    generate_charts.render_charts(stats, generate_charts.select_charts(), tmp_path, dpi=20, workers=1)
+    assert len(list(tmp_path.glob('*.png'))) == 12
+
+
+def test_unchanged_charts_are_skipped(tmp_path, stats):
+    charts = generate_charts.select_charts(['1', '9', '11'])
+    generate_charts.render_charts(stats, charts, tmp_path, dpi=20, workers=1)
+    assert generate_charts.render_charts(stats, charts, tmp_path, dpi=20, workers=1) == {
+        'rendered': [], 'skipped': ['market_composition', 'premium_features', 'sale_vs_rent_rooms']}
+
+    # Only the flag totals moved: the VIP chart re-renders, the others keep their PNGs
+    stats.by_type_flags.loc['Sale', 'is_vip'] += 1
+    try:
+        report = generate_charts.render_charts(stats, charts, tmp_path, dpi=20, workers=1)
+    finally:
+        stats.by_type_flags.loc['Sale', 'is_vip'] -= 1
+    assert report == {'rendered': ['premium_features'], 'skipped': ['market_composition', 'sale_vs_rent_rooms']}
+
+    # A style parameter change, a missing PNG or --force re-render
+    assert generate_charts.render_charts(stats, charts, tmp_path, dpi=25, workers=1)['skipped'] == []
+    (tmp_path / '01_market_composition.png').unlink()
+    assert generate_charts.render_charts(stats, charts, tmp_path, dpi=25, workers=1)['rendered'] == [
+        'market_composition']
+    assert len(generate_charts.render_charts(stats, charts, tmp_path, dpi=25, workers=1, force=True)['rendered']) == 3
@@ -0,0 +1,71 @@
+import asyncio
+
+from helpers import FakeSite, make_listing
+from listing_index import ListingIndex, UnchangedPageTracker, content_hash
+from myhome_scraper import MyHomeScraper
+
+
+def test_content_hash_ignores_volatile_fields():
+    listing = make_listing(1)
+    favourite = dict(listing, is_favorite=True)
+    repriced = dict(listing, price=1)
+    assert content_hash(listing) == content_hash(favourite)
+    assert content_hash(listing) != content_hash(repriced)
+
+
+def test_upsert_keeps_stored_phone_when_new_one_is_empty(tmp_path):
+    index = ListingIndex(str(tmp_path / 'index.sqlite'))
+    scraper = MyHomeScraper()
+    row = scraper.extract_listing_data(make_listing(7), 1, '050-7')
+    index.upsert(row, 'hash-a')
+    index.upsert(dict(row, phone_number=''), 'hash-b')
+    assert index.get_phone(7) == '050-7'
+    assert index.get(7)['content_hash'] == 'hash-b'
+    assert index.count() == 1
+    index.close()
+
+
+def test_empty_index_is_kept():
+    index = ListingIndex(':memory:')
+    scraper = MyHomeScraper(index=index, incremental=True)
+    assert scraper.index is index
+
+
+def test_tracker_stops_after_consecutive_unchanged_pages_out_of_order():
+    tracker = UnchangedPageTracker(stop_after=2)
+    assert tracker.record(3, True) is None
+    assert tracker.record(4, True) is None
+    assert tracker.record(2, False) is None
+    # Page 1 arrives last and completes the run 3-4
+    assert tracker.record(1, True) == 4
+
+
+def test_tracker_resets_run_on_changed_page():
+    tracker = UnchangedPageTracker(stop_after=2)
+    for page, unchanged in [(1, True), (2, False), (3, True)]:
+        tracker.record(page, unchanged)
+    assert tracker.stop_page is None
+    assert tracker.record(4, True) == 4
+
+
+def test_second_incremental_run_stops_early_and_reuses_phones(tmp_path):
+    path = str(tmp_path / 'index.sqlite')
+
+    async def crawl(site):
+        scraper = site.install(MyHomeScraper(index=ListingIndex(path), incremental=True,
+                                             page_workers=1, stop_after_unchanged_pages=2))
+        try:
+            return await scraper.scrape_announcement_type(1)
+        finally:
+            scraper.index.close()
+
+    first = FakeSite(pages=10)
+    rows = asyncio.run(crawl(first))
+    assert len(rows) == 100
+    assert len(first.phone_calls) == 100
+
+    second = FakeSite(pages=10)
+    rows = asyncio.run(crawl(second))
+    assert [page for _, page in second.page_calls] == [1, 2]
+    assert second.phone_calls == []
+    assert all(row['phone_number'] for row in rows)
@@ -0,0 +1,49 @@
+import csv
+import pickle
+
+from listing_record import FIELDS, ListingRecord, records_to_frame
+from myhome_scraper import MyHomeScraper
+from synthetic_listings import make_listings
+
+
+def extracted(count=20):
+    scraper = MyHomeScraper()
+    return [scraper.extract_listing_data(listing, 1 + listing['id'] % 2, f'050-{listing["id"]}')
+            for listing in make_listings(count, seed=4)]
+
+
+def test_record_reads_like_the_dict_row():
+    row = extracted(1)[0]
+    record = ListingRecord.from_row(row)
+    assert record == row
+    assert record['city'] == row['city'] and record.get('missing') is None
+    assert list(record) == list(row) == list(FIELDS)
+    assert record.to_dict() == row
+    assert pickle.loads(pickle.dumps(record)) == record
+    assert not hasattr(record, '__dict__')
+
+
+def test_category_strings_are_shared():
+    rows = extracted(200)
+    records = [ListingRecord.from_row(dict(row, city=''.join(row['city']))) for row in rows]
+    bakus = [record.city for record in records if record.city == 'Bakı']
+    assert len(bakus) > 1 and all(city is bakus[0] for city in bakus)
+
+
+def test_records_write_csv_and_frames(tmp_path):
+    rows = extracted()
+    records = [ListingRecord.from_row(row) for row in rows]
+
+    scraper = MyHomeScraper()
+    scraper.all_listings = records
+    path = scraper.save_to_csv(str(tmp_path / 'records.csv'))
+    with open(path, encoding='utf-8') as f:
+        written = list(csv.DictReader(f))
+    assert [r['id'] for r in written] == [str(row['id']) for row in rows]
+    assert written[0]['phone_number'] == rows[0]['phone_number']
+
+    df = records_to_frame(records)
+    assert list(df.columns) == list(FIELDS)
+    assert len(df) == 20
+    assert df['city'].dtype == 'category'
+    assert df['price'].tolist() == [row['price'] for row in rows]
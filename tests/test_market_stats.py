@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_stats import SALE_PRICE_BINS, SALE_PRICE_LABELS, aggregate
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    rng = np.random.default_rng(7)
+    size = 5000
+    df = pd.DataFrame({
+        'announcement_type': rng.choice(['Sale', 'Rent'], size, p=[0.8, 0.2]),
+        'room_count': rng.integers(1, 8, size).astype(float),
+        'city': rng.choice(['Bakı', 'Sumqayıt', 'Gəncə'], size, p=[0.8, 0.1, 0.1]),
+        'region': rng.choice(['Yasamal', 'Nəsimi', 'Xətai', 'Səbail', 'Sabunçu', 'Binəqədi'], size),
+        'price': rng.integers(200, 900000, size).astype(float),
+        'is_vip': rng.integers(0, 2, size),
+        'is_premium': rng.integers(0, 2, size),
+        'is_price_decreased': rng.integers(0, 2, size),
+        'credit_possible': rng.integers(0, 2, size),
+    })
+    df.loc[::97, 'price'] = np.nan
+    df.loc[::89, 'room_count'] = np.nan
+    df.loc[::83, 'region'] = np.nan
+    return df
+
+
+def test_counts_match_per_chart_value_counts(snapshot):
+    stats = aggregate(snapshot)
+    baku = snapshot[snapshot['city'] == 'Bakı']
+
+    assert stats.total == len(snapshot)
+    assert stats.type_counts().to_dict() == snapshot['announcement_type'].value_counts().to_dict()
+    assert stats.room_counts().to_dict() == snapshot['room_count'].value_counts().to_dict()
+    assert stats.city_counts().to_dict() == snapshot['city'].value_counts().to_dict()
+    assert stats.regions('Bakı')['listings'].to_dict() == baku['region'].value_counts().to_dict()
+    rent_rooms = snapshot[snapshot['announcement_type'] == 'Rent']['room_count'].value_counts()
+    assert stats.room_counts('Rent').to_dict() == rent_rooms.to_dict()
+
+
+def test_medians_match_filtered_frames(snapshot):
+    stats = aggregate(snapshot)
+    baku = snapshot[snapshot['city'] == 'Bakı']
+    for region, row in stats.regions('Bakı').iterrows():
+        assert row['median'] == baku[baku['region'] == region]['price'].median()
+
+    sale = snapshot[snapshot['announcement_type'] == 'Sale']
+    expected = sale.groupby('room_count')['price'].agg(['median', 'count'])
+    pd.testing.assert_frame_equal(stats.room_prices('Sale'), expected, check_dtype=False, check_names=False)
+
+
+def test_flags_and_price_bins(snapshot):
+    stats = aggregate(snapshot)
+    sale = snapshot[snapshot['announcement_type'] == 'Sale']
+
+    assert stats.flag_total('is_vip') == snapshot['is_vip'].sum()
+    assert stats.flags('Sale')['credit_possible'] == sale['credit_possible'].sum()
+    assert stats.flags('Sale')['no_credit'] == (sale['credit_possible'] == 0).sum()
+    assert stats.flags('Sale')['listings'] == len(sale)
+
+    prices = sale['price'].dropna()
+    prices = prices[(prices > 0) & (prices < 1000000)]
+    expected = pd.cut(prices, bins=SALE_PRICE_BINS, labels=SALE_PRICE_LABELS).value_counts().sort_index()
+    assert stats.sale_price_bins.to_dict() == expected.to_dict()
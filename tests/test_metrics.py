@@ -0,0 +1,55 @@
+import asyncio
+
+import aiohttp
+
+from metrics import Counter, Histogram, ScraperMetrics, start_metrics_server
+from mock_server import MockMyHomeAPI, start_mock_server
+from myhome_scraper import MyHomeScraper
+from rate_limiter import AdaptiveRateLimiter
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency_seconds', 'test', ('endpoint',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, endpoint='list')
+    text = '\n'.join(histogram.render())
+    assert 'latency_seconds_bucket{endpoint="list",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{endpoint="list",le="1"} 3' in text
+    assert 'latency_seconds_bucket{endpoint="list",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{endpoint="list"} 4' in text
+
+
+def test_label_values_are_escaped():
+    counter = Counter('things_total', 'test', ('city',))
+    counter.inc(city='Ba"kı')
+    assert 'things_total{city="Ba\\"kı"} 1' in counter.render()
+
+
+def test_crawl_populates_metrics_and_serves_them(tmp_path):
+    async def scenario():
+        api = MockMyHomeAPI(pages=2, per_page=5, rate_429=0.3, retry_after=0, seed=1)
+        mock_runner, base_url = await start_mock_server(api)
+        limiter = AdaptiveRateLimiter(initial_rate=2000.0, max_rate=2000.0)
+        try:
+            async with MyHomeScraper(base_url=base_url, rate_limiter=limiter) as scraper:
+                await scraper.scrape_announcement_type(2)
+                metrics_runner = await start_metrics_server(scraper.metrics, port=0)
+                port = metrics_runner.addresses[0][1]
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(f'http://127.0.0.1:{port}/metrics') as response:
+                        body = await response.text()
+                await metrics_runner.cleanup()
+                return scraper.metrics, body
+        finally:
+            await mock_runner.cleanup()
+
+    metrics, body = asyncio.run(scenario())
+    assert metrics.requests.get(endpoint='list', announcement_type='Rent', status=200) == 3
+    assert metrics.latency.count(endpoint='phone', announcement_type='') > 0
+    assert metrics.response_bytes.get(endpoint='list') > 0
+    assert metrics.in_flight.get(endpoint='phone') == 0
+    assert metrics.listings.get(announcement_type='Rent') == 10
+    assert 'myhome_request_duration_seconds_bucket' in body
+
+    metrics.write_textfile(tmp_path / 'scrape.prom')
+    assert (tmp_path / 'scrape.prom').read_text() == metrics.render()
@@ -0,0 +1,49 @@
+import asyncio
+
+from cassette import Cassette
+from mock_server import MockMyHomeAPI, start_mock_server
+from myhome_scraper import MyHomeScraper
+from rate_limiter import AdaptiveRateLimiter
+
+
+def fast_limiter():
+    return AdaptiveRateLimiter(initial_rate=2000.0, max_rate=2000.0)
+
+
+async def crawl(api, **scraper_kwargs):
+    runner, base_url = await start_mock_server(api)
+    try:
+        async with MyHomeScraper(base_url=base_url, rate_limiter=fast_limiter(), **scraper_kwargs) as scraper:
+            return await scraper.scrape_announcement_type(1)
+    finally:
+        await runner.cleanup()
+
+
+def test_synthetic_crawl_with_429s():
+    api = MockMyHomeAPI(pages=4, per_page=5, rate_429=0.2, retry_after=0, seed=3)
+    rows = asyncio.run(crawl(api, page_workers=2, phone_workers=4))
+    assert len({row['id'] for row in rows}) == 20
+    assert api.requests['429'] > 0
+
+
+def test_recorded_cassette_replays_identically(tmp_path):
+    live = asyncio.run(crawl(MockMyHomeAPI(pages=3, per_page=4), recorder=Cassette(tmp_path / 'tape')))
+
+    cassette = Cassette(tmp_path / 'tape')
+    assert 'list?announcementType=1&page=2' in cassette.keys()
+    assert cassette.lookup('list?announcementType=1&page=2')['headers']['content-encoding'] == 'zstd'
+
+    replay_api = MockMyHomeAPI(cassette=Cassette(tmp_path / 'tape'))
+    replayed = asyncio.run(crawl(replay_api))
+    assert replayed == live
+    assert all(row['phone_number'] for row in replayed)
+
+
+def test_cassette_replays_sequences_in_order(tmp_path):
+    cassette = Cassette(tmp_path)
+    cassette.record('phone/1', 429, {'retry-after': '1'}, b'')
+    cassette.record('phone/1', 200, {}, b'050')
+    assert cassette.lookup('phone/1')['status'] == 429
+    assert cassette.lookup('phone/1')['body'] == b'050'
+    assert cassette.lookup('phone/1')['status'] == 200
+    assert cassette.lookup('phone/2') is None
@@ -0,0 +1,45 @@
+import pytest
+
+from helpers import make_listing
+from myhome_scraper import MyHomeScraper
+from parquet_export import COLUMN_TYPES, ParquetSink, read_dataset, rows_to_table, to_bool, to_float
+
+pa = pytest.importorskip('pyarrow')
+pytest.importorskip('pyarrow.dataset')
+
+
+def extracted(listing_id, announcement_type=1, **overrides):
+    return MyHomeScraper().extract_listing_data(make_listing(listing_id, **overrides), announcement_type, '050')
+
+
+def test_schema_covers_every_extracted_column():
+    assert list(extracted(1).keys()) == list(COLUMN_TYPES)
+
+
+def test_text_values_are_typed():
+    assert to_float('120 000 AZN') == 120000.0
+    assert to_float('') is None
+    assert to_bool('True') is True
+    assert to_bool(0) is False
+    table = rows_to_table([dict(extracted(1), price='95 000', lat='')])
+    assert table.column('price').to_pylist() == [95000.0]
+    assert table.column('lat').to_pylist() == [None]
+    assert pa.types.is_dictionary(table.schema.field('city').type)
+
+
+def test_partitioned_dataset_prunes_by_type_and_city(tmp_path):
+    import pyarrow.dataset as ds
+
+    sink = ParquetSink(tmp_path / 'dataset', batch_size=2)
+    sink.write(extracted(1, city='Bakı'))
+    sink.write(extracted(2, announcement_type=2, city='Bakı'))
+    sink.write(extracted(3, city='Gəncə'))
+    sink.close()
+
+    partitions = sorted(p.relative_to(tmp_path / 'dataset').parent.as_posix()
+                        for p in (tmp_path / 'dataset').rglob('*.parquet'))
+    assert len(partitions) == 3
+    table = read_dataset(tmp_path / 'dataset', columns=['id', 'price'],
+                         filter=(ds.field('announcement_type') == 'Sale') & (ds.field('city') == 'Bakı'))
+    assert table.column('id').to_pylist() == [1]
+    assert table.column('price').type == pa.float64()
@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+from mock_server import MockMyHomeAPI, start_mock_server
+from myhome_scraper import MyHomeScraper
+from partitioned_crawl import PartitionPlanner, crawl_partitions, main
+from rate_limiter import AdaptiveRateLimiter
+from sinks import ListSink, read_rows
+
+
+def run_with_mock(api, scenario, **scraper_kwargs):
+    async def wrapper():
+        runner, base_url = await start_mock_server(api)
+        try:
+            limiter = AdaptiveRateLimiter(initial_rate=1000.0, max_rate=1000.0)
+            sink = ListSink()
+            async with MyHomeScraper(base_url=base_url, rate_limiter=limiter, sinks=[sink], keep_listings=False,
+                                     **scraper_kwargs) as scraper:
+                return await scenario(scraper), sink.rows
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(wrapper())
+
+
+def test_mock_filters_paginate_a_subset():
+    api = MockMyHomeAPI(pages=5, per_page=20)
+    bakı = [listing for listing in api.catalogue(1) if listing['address']['city']['id'] == 1]
+
+    async def scenario(scraper):
+        first = await scraper.fetch_list(1, 1, {'city_id': 1})
+        second = await scraper.fetch_listings_page(1, 2, {'city_id': 1})
+        return first, second
+
+    (first, second), _ = run_with_mock(api, scenario)
+    assert first['meta']['total'] == len(bakı)
+    assert first['meta']['last_page'] == -(-len(bakı) // 20)
+    assert [listing['id'] for listing in first['data'] + second] == [listing['id'] for listing in bakı[:40]]
+
+
+def test_deep_city_is_split_by_region_when_totals_add_up():
+    api = MockMyHomeAPI(pages=10, per_page=20)
+
+    async def scenario(scraper):
+        planner = PartitionPlanner(scraper, sample_pages=2, max_pages=3,
+                                   known_ids={'city': range(1, 9), 'region': range(1, 13)})
+        return await planner.plan(1)
+
+    partitions, _ = run_with_mock(api, scenario)
+    assert all(partition.filters for partition in partitions)
+    assert sum(partition.total for partition in partitions) == 200
+    assert any('region_id' in partition.filters for partition in partitions)
+    assert all(partition.last_page <= 3 for partition in partitions if 'region_id' in partition.filters)
+
+
+def test_partitioned_crawl_covers_the_catalogue_once():
+    api = MockMyHomeAPI(pages=10, per_page=20)
+
+    async def scenario(scraper):
+        planner = PartitionPlanner(scraper, sample_pages=1, max_pages=3)
+        partitions = await planner.plan(1)
+        stats = await crawl_partitions(scraper, partitions)
+        return partitions, stats
+
+    (partitions, stats), rows = run_with_mock(api, scenario)
+    expected = {listing['id'] for listing in api.catalogue(1)}
+    assert len(rows) == stats['listings'] == len(expected)
+    assert {row['id'] for row in rows} == expected
+    assert all(row['phone_number'] for row in rows)
+    # Cities never sampled are only reachable through the unfiltered pages, which then come along
+    if sum(partition.total for partition in partitions if partition.filters) < 200:
+        assert any(not partition.filters for partition in partitions)
+        assert stats['duplicates'] > 0
+    # First pages fetched while planning are reused, not requested again
+    assert stats['pages'] == sum(partition.last_page - 1 for partition in partitions)
+
+
+def test_cli_remembers_partition_ids(tmp_path, monkeypatch):
+    api = MockMyHomeAPI(pages=2, per_page=10)
+
+    async def serve():
+        runner, base_url = await start_mock_server(api)
+        try:
+            await asyncio.to_thread(main, ['--types', '1', '--no-phones', '--base-url', base_url,
+                                           '--partitions-file', str(tmp_path / 'partitions.json'),
+                                           '--phone-cache', str(tmp_path / 'phones.json')])
+        finally:
+            await runner.cleanup()
+
+    monkeypatch.chdir(tmp_path)
+    asyncio.run(serve())
+    known = json.loads((tmp_path / 'partitions.json').read_text())
+    assert set(known['city']) == {listing['address']['city']['id'] for listing in api.catalogue(1)}
+    snapshot = next(tmp_path.glob('myhome_listings_*.csv'))
+    assert len(list(read_rows(snapshot))) == 20
+    assert api.requests['phone'] == 0
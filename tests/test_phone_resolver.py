@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from helpers import FakeSite
+from myhome_scraper import MyHomeScraper
+from phone_resolver import PhoneResolver
+
+
+class CountingFetch:
+    def __init__(self, delay=0.01, phone='050-1'):
+        self.calls = []
+        self.delay = delay
+        self.phone = phone
+
+    async def __call__(self, listing_id):
+        self.calls.append(listing_id)
+        await asyncio.sleep(self.delay)
+        return self.phone
+
+
+def test_concurrent_lookups_for_same_user_are_coalesced():
+    fetch = CountingFetch()
+    resolver = PhoneResolver(fetch)
+
+    async def scenario():
+        return await asyncio.gather(*[resolver.resolve(i, user_id=42) for i in range(5)])
+
+    assert asyncio.run(scenario()) == ['050-1'] * 5
+    assert len(fetch.calls) == 1
+    assert resolver.coalesced == 4
+    assert resolver.requests_saved == 4
+
+
+def test_cache_hits_and_missing_user_id_falls_back_to_listing():
+    fetch = CountingFetch(delay=0)
+    resolver = PhoneResolver(fetch)
+
+    async def scenario():
+        await resolver.resolve(1, user_id=7)
+        await resolver.resolve(2, user_id=7)
+        await resolver.resolve(3, user_id=None)
+        await resolver.resolve(4, user_id=None)
+
+    asyncio.run(scenario())
+    assert fetch.calls == [1, 3, 4]
+    assert resolver.hits == 1
+    assert resolver.stats()['hit_rate'] == 0.25
+
+
+def test_empty_phone_is_not_cached():
+    fetch = CountingFetch(delay=0, phone='')
+    resolver = PhoneResolver(fetch)
+    asyncio.run(resolver.resolve(1, user_id=7))
+    asyncio.run(resolver.resolve(2, user_id=7))
+    assert len(fetch.calls) == 2
+
+
+def test_lru_eviction_and_ttl():
+    resolver = PhoneResolver(CountingFetch(delay=0), max_entries=2, ttl=60)
+    resolver._store('user:1', 'a')
+    resolver._store('user:2', 'b')
+    resolver._get_cached('user:1')
+    resolver._store('user:3', 'c')
+    assert list(resolver.cache) == ['user:1', 'user:3']
+    resolver._store('user:4', 'd', stored_at=time.time() - 120)
+    assert resolver._get_cached('user:4') is None
+
+
+def test_cache_persists_across_runs(tmp_path):
+    path = str(tmp_path / 'phones.json')
+    first = PhoneResolver(CountingFetch(delay=0), cache_path=path)
+    asyncio.run(first.resolve(1, user_id=9))
+    first.save()
+
+    fetch = CountingFetch(delay=0)
+    second = PhoneResolver(fetch, cache_path=path)
+    assert asyncio.run(second.resolve(2, user_id=9)) == '050-1'
+    assert fetch.calls == []
+
+
+def test_pipeline_fetches_one_phone_per_agency():
+    site = FakeSite(pages=3)
+    original = site.listings
+    site.listings = lambda t, p: [dict(listing, user_id=listing['id'] % 3) for listing in original(t, p)]
+    scraper = site.install(MyHomeScraper(page_workers=2, phone_workers=4))
+    rows = asyncio.run(scraper.scrape_announcement_type(1))
+    assert len(rows) == 30
+    assert len(site.phone_calls) == 3
+
+
+def test_cached_lookup_never_fetches():
+    fetch = CountingFetch(delay=0)
+    resolver = PhoneResolver(fetch)
+    assert resolver.cached(1, user_id=7) == ''
+    asyncio.run(resolver.resolve(1, user_id=7))
+    assert resolver.cached(2, user_id=7) == '050-1'
+    assert fetch.calls == [1]
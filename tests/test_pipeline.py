@@ -0,0 +1,58 @@
+import asyncio
+
+from helpers import FakeSite
+from myhome_scraper import MyHomeScraper, StageStats
+
+
+def run_pipeline(site, **kwargs):
+    scraper = site.install(MyHomeScraper(**kwargs))
+    return scraper, asyncio.run(scraper.scrape_announcement_type(1))
+
+
+def test_pipeline_returns_every_listing_once_with_phones():
+    site = FakeSite(pages=25, jitter=0.002)
+    scraper, rows = run_pipeline(site, page_workers=4, phone_workers=3)
+    ids = [row['id'] for row in rows]
+    assert len(ids) == 250
+    assert len(set(ids)) == 250
+    assert all(row['phone_number'] == f"050-{row['id']}" for row in rows)
+    stats = scraper.stage_stats[1]
+    assert stats['pages'].count == 25
+    assert stats['phones'].count == 250
+    assert stats['sink'].count == 250
+
+
+def test_pipeline_drains_through_tiny_queues():
+    # Queues of size 1 force every stage to wait on the next one; shutdown
+    # must still deliver everything instead of deadlocking on the sentinels
+    site = FakeSite(pages=6, jitter=0.001)
+    _, rows = asyncio.run(asyncio.wait_for(_crawl(site, listing_queue_size=1, result_queue_size=1,
+                                                  page_workers=3, phone_workers=2), timeout=10))
+    assert len(rows) == 60
+
+
+async def _crawl(site, **kwargs):
+    scraper = site.install(MyHomeScraper(**kwargs))
+    return scraper, await scraper.scrape_announcement_type(1)
+
+
+def test_pipeline_skips_listing_whose_processing_fails():
+    site = FakeSite(pages=2)
+    scraper = site.install(MyHomeScraper(page_workers=1, phone_workers=1))
+    original = scraper.extract_listing_data
+
+    def flaky_extract(listing, announcement_type, phone_number):
+        if listing['id'] % 10 == 3:
+            raise ValueError('malformed listing')
+        return original(listing, announcement_type, phone_number)
+
+    scraper.extract_listing_data = flaky_extract
+    rows = asyncio.run(scraper.scrape_announcement_type(2))
+    assert len(rows) == 18
+
+
+def test_stage_stats_rate_needs_two_samples():
+    stats = StageStats('phones')
+    stats.record()
+    assert stats.rate == 0.0
+    assert 'n/a' in str(stats)
@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+from myhome_scraper import MyHomeScraper
+from rate_limiter import AdaptiveRateLimiter, TokenBucket, parse_retry_after
+
+
+def make_bucket(rate=10.0):
+    return TokenBucket('list', initial_rate=rate, min_rate=0.5, max_rate=20.0,
+                       increase_step=1.0, decrease_factor=0.5, latency_tolerance=3.0)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('-1') == 0.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') is None
+    assert parse_retry_after(None) is None
+
+
+def test_additive_increase_on_success_and_capped():
+    bucket = make_bucket(rate=10.0)
+    bucket.record(200, 0.1)
+    assert bucket.rate == 10.1
+    for _ in range(10000):
+        bucket.record(200, 0.1)
+    assert bucket.rate == 20.0
+
+
+def test_multiplicative_decrease_once_per_second_but_every_event_counted():
+    bucket = make_bucket(rate=10.0)
+    bucket.record(429, 0.1)
+    bucket.record(503, 0.1)
+    assert bucket.rate == 5.0
+    assert bucket.throttle_events == 2
+
+
+def test_throttle_empties_bucket():
+    bucket = make_bucket(rate=10.0)
+    bucket.tokens = 5.0
+    bucket.record(429, 0.1)
+    assert bucket.tokens == 0.0
+
+
+def test_latency_spike_counts_as_congestion():
+    bucket = make_bucket(rate=10.0)
+    for _ in range(5):
+        bucket.record(200, 0.1)
+    rate = bucket.rate
+    bucket.record(200, 5.0)
+    assert bucket.rate < rate
+    assert bucket.throttle_events == 1
+
+
+def test_retry_after_blocks_acquire():
+    async def scenario():
+        bucket = make_bucket(rate=100.0)
+        bucket.record(429, 0.1, retry_after=0.2)
+        started = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.19
+
+
+def test_limiter_keeps_endpoints_separate():
+    limiter = AdaptiveRateLimiter(initial_rate=4.0)
+    limiter.record('phone', 429, 0.1)
+    assert limiter.current_rate('phone') == 2.0
+    assert limiter.current_rate('list') == 4.0
+    assert limiter.throttle_events('phone') == 1
+    assert limiter.throttle_events('list') == 0
+
+
+class _BrokenBodyResponse:
+    status = 200
+    headers = {'content-encoding': ''}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self):
+        raise ConnectionResetError('body lost')
+
+
+class _FakeTransport:
+    def get(self, url, **kwargs):
+        return _BrokenBodyResponse()
+
+
+def test_failed_body_read_is_recorded_once():
+    async def scenario():
+        limiter = AdaptiveRateLimiter(initial_rate=1000.0, max_rate=1000.0)
+        scraper = MyHomeScraper(rate_limiter=limiter)
+        scraper.transport = _FakeTransport()
+        assert await scraper.fetch_phone_number(1) == ''
+        return limiter.bucket('phone')
+
+    bucket = asyncio.run(scenario())
+    assert bucket.requests == 1
+    assert bucket.throttle_events == 0
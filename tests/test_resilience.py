@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+from mock_server import MockMyHomeAPI, start_mock_server
+from myhome_scraper import MyHomeScraper
+from rate_limiter import AdaptiveRateLimiter
+from resilience import CircuitBreaker, LatencyTracker, hedged
+
+
+def test_percentile_needs_min_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for latency in range(1, 10):
+        tracker.record(latency / 100)
+    assert tracker.percentile(0.95) is None
+    tracker.record(1.0)
+    assert tracker.percentile(0.95) == 1.0
+    assert tracker.percentile(0.5) == 0.05
+
+
+def test_percentile_follows_the_window():
+    tracker = LatencyTracker(window=10, min_samples=1)
+    for _ in range(10):
+        tracker.record(5.0)
+    for _ in range(10):
+        tracker.record(0.1)
+    assert tracker.percentile(0.99) == 0.1
+
+
+def test_hedge_not_sent_when_first_answers_in_time():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return 'fast'
+
+    assert asyncio.run(hedged(call, 0.5)) == 'fast'
+    assert len(calls) == 1
+
+
+def test_hedge_wins_and_slow_attempt_is_cancelled():
+    cancelled = []
+    hedges = []
+
+    async def scenario():
+        delays = iter([5.0, 0.01])
+
+        async def call():
+            delay = next(delays)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        return await asyncio.wait_for(hedged(call, 0.05, on_hedge=lambda: hedges.append(1)), timeout=2)
+
+    assert asyncio.run(scenario()) == 0.01
+    assert cancelled == [5.0]
+    assert hedges == [1]
+
+
+def test_failed_attempt_waits_for_the_other():
+    async def scenario():
+        attempts = iter([(0.1, ValueError('boom')), (0.2, None)])
+
+        async def call():
+            delay, error = next(attempts)
+            await asyncio.sleep(delay)
+            if error:
+                raise error
+            return 'second'
+
+        return await hedged(call, 0.05)
+
+    assert asyncio.run(scenario()) == 'second'
+
+
+def test_both_attempts_failing_raises():
+    async def call():
+        await asyncio.sleep(0.1)
+        raise ValueError('down')
+
+    with pytest.raises(ValueError):
+        asyncio.run(hedged(call, 0.01))
+
+
+def test_breaker_opens_on_error_spike_and_closes_after_probe():
+    async def scenario():
+        breaker = CircuitBreaker('phone', window=10, min_calls=4, failure_ratio=0.5, open_seconds=0.1)
+        for success in (True, False, True, False):
+            assert await breaker.acquire() is False
+            breaker.record(success)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.trips == 1
+
+        probe = await asyncio.wait_for(breaker.acquire(), timeout=1)
+        assert probe is True and breaker.state == CircuitBreaker.HALF_OPEN
+        # Other callers wait for the probe instead of piling onto a failing endpoint
+        waiter = asyncio.ensure_future(breaker.acquire())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        breaker.record(True, probe=True)
+        assert await asyncio.wait_for(waiter, timeout=1) is False
+        return breaker.state
+
+    assert asyncio.run(scenario()) == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens_and_late_results_are_ignored():
+    async def scenario():
+        breaker = CircuitBreaker('phone', window=4, min_calls=2, failure_ratio=0.5, open_seconds=0.05)
+        breaker.record(False)
+        breaker.record(False)
+        probe = await breaker.acquire()
+        breaker.record(True)  # A call from before the trip finishing late
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.record(False, probe=probe)
+        assert breaker.state == CircuitBreaker.OPEN
+        # A cancelled probe hands the probe to the next caller at once
+        probe = await breaker.acquire()
+        breaker.record(None, probe=probe)
+        return await asyncio.wait_for(breaker.acquire(), timeout=0.03)
+
+    assert asyncio.run(scenario()) is True
+
+
+def run_lookups(api, ids, **scraper_kwargs):
+    async def scenario():
+        runner, base_url = await start_mock_server(api)
+        try:
+            limiter = AdaptiveRateLimiter(initial_rate=1000.0, max_rate=1000.0)
+            async with MyHomeScraper(base_url=base_url, rate_limiter=limiter, **scraper_kwargs) as scraper:
+                phones = [await scraper.fetch_phone_number(listing_id) for listing_id in ids]
+                return scraper, phones
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(scenario())
+
+
+def test_slow_phone_lookups_are_hedged():
+    # Hedging only helps a tail rarer than the hedge quantile, so keep it under 5%
+    api = MockMyHomeAPI(phone_latency=0.005, tail_rate=0.03, tail_latency=0.5, seed=0)
+    scraper, phones = run_lookups(api, range(1, 101))
+    hedges = scraper.metrics.hedged.get(endpoint='phone')
+    assert all(phones)
+    assert hedges > 0
+    # A hedge still waiting for a connection when the first answer lands never reaches the server
+    assert 100 < api.requests['phone'] <= 100 + hedges
+
+
+def test_failing_phone_endpoint_trips_the_breaker():
+    api = MockMyHomeAPI(rate_500=1.0)
+    breaker = CircuitBreaker('phone', window=5, min_calls=5, open_seconds=60)
+    scraper, phones = run_lookups(api, range(1, 6), phone_breaker=breaker)
+    assert phones == [''] * 5
+    assert breaker.is_open
+    assert scraper.metrics.circuit_open.get(endpoint='phone') == 1.0
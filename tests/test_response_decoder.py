@@ -0,0 +1,60 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+import zstandard as zstd
+
+from response_decoder import DecodeError, ResponseDecoder
+
+PAYLOAD = {'data': [{'id': 1, 'title': 'Bakı mənzil'}], 'meta': {'last_page': 3}}
+BODY = json.dumps(PAYLOAD, ensure_ascii=False).encode('utf-8')
+
+
+class FakeContent:
+    def __init__(self, body, chunk):
+        self.body = body
+        self.chunk = chunk
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self.body), self.chunk):
+            yield self.body[start:start + self.chunk]
+
+
+class FakeResponse:
+    def __init__(self, body, encoding='', chunk=7):
+        self.headers = {'content-encoding': encoding}
+        self.content = FakeContent(body, chunk)
+
+
+@pytest.mark.parametrize('encoding, body', [
+    ('zstd', zstd.ZstdCompressor().compress(BODY)),
+    ('gzip', gzip.compress(BODY)),
+    ('', BODY),
+])
+def test_streamed_bodies_decode_to_json(encoding, body):
+    decoder = ResponseDecoder()
+    assert asyncio.run(decoder.read_json(FakeResponse(body, encoding))) == PAYLOAD
+
+
+def test_zstd_context_is_reused_per_thread():
+    decoder = ResponseDecoder()
+    assert decoder.zstd_context is decoder.zstd_context
+
+
+def test_large_bodies_are_parsed_off_loop():
+    decoder = ResponseDecoder(offload_threshold=1)
+    assert asyncio.run(decoder.parse_json_async(BODY)) == PAYLOAD
+
+
+def test_output_limit_and_bad_json():
+    decoder = ResponseDecoder(max_output_size=10)
+    with pytest.raises(DecodeError):
+        asyncio.run(decoder.read_body(FakeResponse(BODY)))
+    with pytest.raises(DecodeError):
+        decoder.parse_json(b'{not json')
+
+
+def test_latin1_fallback():
+    assert ResponseDecoder.parse_json('{"a": "é"}'.encode('latin-1')) == {'a': 'é'}
+    assert ResponseDecoder.decode_text(b'\xe9') == 'é'
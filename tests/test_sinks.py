@@ -0,0 +1,55 @@
+import asyncio
+
+from helpers import FakeSite
+from myhome_scraper import MyHomeScraper
+from sinks import CsvSink, JsonlSink, ListSink, RunCounters, make_sink, read_rows
+
+
+ROWS = [
+    {'id': 1, 'announcement_type': 'Sale', 'phone_number': '050', 'city': 'Bakı'},
+    {'id': 2, 'announcement_type': 'Rent', 'phone_number': '', 'city': 'Sumqayıt'},
+]
+
+
+def test_csv_roundtrip_with_zstd(tmp_path):
+    sink = make_sink('csv', str(tmp_path / 'out'), compress=True, batch_size=1)
+    for row in ROWS:
+        sink.write(row)
+    sink.close()
+    assert sink.path.name == 'out.csv.zst'
+    rows = list(read_rows(sink.path))
+    assert [row['city'] for row in rows] == ['Bakı', 'Sumqayıt']
+    assert rows[0]['id'] == '1'
+
+
+def test_jsonl_keeps_types(tmp_path):
+    with JsonlSink(tmp_path / 'out.jsonl') as sink:
+        for row in ROWS:
+            sink.write(row)
+    assert list(read_rows(tmp_path / 'out.jsonl')) == ROWS
+
+
+def test_rows_are_buffered_until_batch_is_full(tmp_path):
+    sink = CsvSink(tmp_path / 'out.csv', batch_size=2)
+    sink.write(ROWS[0])
+    assert sink.rows_written == 0
+    sink.write(ROWS[1])
+    assert sink.rows_written == 2
+    sink.close()
+
+
+def test_counters():
+    counters = RunCounters()
+    for row in ROWS:
+        counters.update(row)
+    assert (counters.total, counters.sale, counters.rent, counters.with_phone) == (2, 1, 1, 1)
+
+
+def test_pipeline_streams_without_keeping_rows(tmp_path):
+    site = FakeSite(pages=4)
+    sink = ListSink()
+    scraper = site.install(MyHomeScraper(sinks=[sink], keep_listings=False))
+    assert asyncio.run(scraper.scrape_announcement_type(1)) == []
+    assert len(sink.rows) == 40
+    assert scraper.counters.total == 40
+    assert scraper.counters.with_phone == 40
@@ -0,0 +1,83 @@
+import json
+
+from myhome_scraper import MyHomeScraper
+from sinks import CsvSink, JsonlSink
+from snapshot_diff import PriceHistory, diff_snapshots, main
+from synthetic_listings import make_listings
+
+
+def write_snapshot(path, rows, sink_class=CsvSink, compress=False):
+    with sink_class(path, compress=compress) as sink:
+        for row in rows:
+            sink.write(row)
+    return path
+
+
+def snapshot_rows(count=200):
+    scraper = MyHomeScraper()
+    return [scraper.extract_listing_data(dict(listing, status=1, is_price_decreased=0), 1, '')
+            for listing in make_listings(count, seed=2)]
+
+
+def changed_snapshot(rows):
+    rows = [dict(row) for row in rows]
+    rows[10]['price'] = rows[10]['price'] - 5000
+    rows[10]['is_price_decreased'] = 1
+    rows[20]['status'] = 2
+    removed = rows.pop(30)
+    added = dict(rows[0], id=999999, price=150000.0)
+    return rows + [added, dict(rows[40])], removed, added
+
+
+def by_change(deltas):
+    grouped = {}
+    for delta in deltas:
+        grouped.setdefault(delta['change'], []).append(delta)
+    return grouped
+
+
+def test_diff_reports_each_kind_of_change(tmp_path):
+    rows = snapshot_rows()
+    new_rows, removed, added = changed_snapshot(rows)
+    old = write_snapshot(tmp_path / 'old.csv', rows)
+    # Formats and compression may differ between the two snapshots
+    new = write_snapshot(tmp_path / 'new.jsonl.zst', new_rows, JsonlSink, compress=True)
+
+    for partitions in (1, 7):
+        deltas = by_change(diff_snapshots(old, new, partitions=partitions))
+        assert [d['id'] for d in deltas['new']] == [999999]
+        assert deltas['new'][0]['new_price'] == 150000.0
+        assert [d['id'] for d in deltas['removed']] == [removed['id']]
+        assert deltas['removed'][0]['city'] == removed['city']
+        assert deltas['price'] == [{'id': rows[10]['id'], 'change': 'price',
+                                    'old_price': rows[10]['price'], 'new_price': rows[10]['price'] - 5000}]
+        assert sorted((d['id'], tuple(d['changes'])) for d in deltas['flags']) == sorted([
+            (rows[10]['id'], ('is_price_decreased',)), (rows[20]['id'], ('status',))])
+
+
+def test_identical_snapshots_have_no_deltas(tmp_path):
+    rows = snapshot_rows(50)
+    old = write_snapshot(tmp_path / 'a.csv', rows)
+    new = write_snapshot(tmp_path / 'b.csv', rows)
+    assert list(diff_snapshots(old, new, partitions=3)) == []
+
+
+def test_cli_diffs_latest_snapshots_into_history_once(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    rows = snapshot_rows()
+    new_rows, _, _ = changed_snapshot(rows)
+    write_snapshot(tmp_path / 'myhome_listings_20250101_000000.csv', rows)
+    write_snapshot(tmp_path / 'myhome_listings_20250102_000000.csv', new_rows)
+
+    main([])
+    deltas = [json.loads(line) for line in open(tmp_path / 'myhome_deltas_20250102_000000.jsonl')]
+    assert len(deltas) == 5
+    assert '1 new, 1 removed, 1 price changes, 2 flag changes' in capsys.readouterr().out
+
+    main([])  # the same pair is not appended twice
+    history = PriceHistory(tmp_path / 'myhome_price_history.sqlite')
+    entries = history.history(rows[10]['id'])
+    assert [entry['change'] for entry in entries] == ['price', 'flags']
+    assert entries[0]['observed_at'] == '2025-01-02T00:00:00'
+    assert entries[1]['details'] == {'is_price_decreased': [False, True]}
+    assert history.history(999999)[0]['details']['city'] == rows[0]['city']
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from myhome_scraper import MyHomeScraper
+from sinks import CsvSink
+from snapshots import latest_snapshot, load_snapshot
+from synthetic_listings import make_listings
+
+
+def write_snapshot(path, rows, compress=False):
+    with CsvSink(path, compress=compress) as sink:
+        for row in rows:
+            sink.write(row)
+    return path
+
+
+@pytest.fixture
+def rows():
+    scraper = MyHomeScraper()
+    return [scraper.extract_listing_data(listing, 1 + listing['id'] % 2, '') for listing in make_listings(30)]
+
+
+def test_price_is_numeric_at_scrape_time():
+    scraper = MyHomeScraper()
+    listing = make_listings(1)[0]
+    assert scraper.extract_listing_data(dict(listing, price='95 000'), 1, '')['price'] == 95000.0
+    assert scraper.extract_listing_data(dict(listing, price=None), 1, '')['price'] is None
+
+
+def test_latest_snapshot_skips_deltas_and_other_files(tmp_path, rows):
+    write_snapshot(tmp_path / 'myhome_listings_20250101_000000.csv', rows)
+    newest = write_snapshot(tmp_path / 'myhome_listings_20250301_000000.csv.zst', rows, compress=True)
+    write_snapshot(tmp_path / 'myhome_listings_delta_20250401_000000.csv', rows)
+    (tmp_path / 'myhome_listings_20250501_000000.xlsx').write_bytes(b'')
+    assert latest_snapshot(tmp_path) == newest
+
+    empty = tmp_path / 'empty'
+    empty.mkdir()
+    with pytest.raises(FileNotFoundError):
+        latest_snapshot(empty)
+
+
+def test_typed_pruned_load(tmp_path, rows):
+    path = write_snapshot(tmp_path / 'myhome_listings_20250101_000000.csv.zst', rows, compress=True)
+    df = load_snapshot(path, columns=['price', 'city', 'room_count', 'is_vip'])
+    assert sorted(df.columns) == ['city', 'is_vip', 'price', 'room_count']
+    assert df['price'].dtype == 'float64'
+    assert isinstance(df['city'].dtype, pd.CategoricalDtype)
+    assert df['room_count'].dtype == 'Int32'
+    assert df['is_vip'].dtype == 'boolean'
+    assert len(df) == 30
+
+
+def test_legacy_text_prices_are_coerced(tmp_path, rows):
+    rows[0]['price'] = '120 000 AZN'
+    rows[1]['price'] = ''
+    path = write_snapshot(tmp_path / 'legacy.csv', rows)
+    df = load_snapshot(path, columns=['price', 'room_count', 'is_vip', 'announcement_type'])
+    assert df['price'].dtype == 'float64'
+    assert df['price'][0] == 120000.0
+    assert pd.isna(df['price'][1])
+    assert df['room_count'].dtype == 'Int32'
+    assert isinstance(df['announcement_type'].dtype, pd.CategoricalDtype)
@@ -0,0 +1,83 @@
+import asyncio
+import importlib.util
+
+import pytest
+
+from mock_server import MockMyHomeAPI, start_mock_server
+from myhome_scraper import MyHomeScraper, parse_args
+from rate_limiter import AdaptiveRateLimiter
+from response_decoder import ResponseDecoder
+from transport import AiohttpTransport, TransportConfig, _HttpxResponse, make_transport
+
+HTTPX_AVAILABLE = importlib.util.find_spec('httpx') is not None and importlib.util.find_spec('h2') is not None
+
+
+def test_unknown_transport_is_rejected():
+    with pytest.raises(ValueError, match='aiohttp'):
+        make_transport('curl', {})
+
+
+@pytest.mark.skipif(HTTPX_AVAILABLE, reason="httpx[http2] is installed")
+def test_httpx_transport_explains_missing_dependency():
+    with pytest.raises(ImportError, match='httpx'):
+        MyHomeScraper(transport='httpx')
+
+
+def test_aiohttp_connector_follows_config():
+    async def scenario():
+        transport = AiohttpTransport({}, TransportConfig(pool_size=20, per_host=8, keepalive=5.0,
+                                                         dns_cache_ttl=None))
+        await transport.open()
+        try:
+            connector = transport.session.connector
+            return connector.limit, connector.limit_per_host, connector.use_dns_cache
+        finally:
+            await transport.close()
+
+    assert asyncio.run(scenario()) == (20, 8, False)
+
+
+def test_cli_transport_options():
+    args = parse_args(['--transport', 'aiohttp', '--pool-size', '32', '--per-host', '16', '--dns-cache-ttl', '0'])
+    assert (args.transport, args.pool_size, args.per_host, args.dns_cache_ttl) == ('aiohttp', 32, 16, 0)
+
+
+def test_crawl_through_configured_transport():
+    async def scenario():
+        api = MockMyHomeAPI(pages=3, per_page=5)
+        runner, base_url = await start_mock_server(api)
+        try:
+            limiter = AdaptiveRateLimiter(initial_rate=1000.0, max_rate=1000.0)
+            async with MyHomeScraper(base_url=base_url, rate_limiter=limiter, keep_listings=False,
+                                     transport_config=TransportConfig(pool_size=4, per_host=4)) as scraper:
+                await scraper.scrape_announcement_type(1)
+                return scraper.counters.total
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(scenario()) == 15
+
+
+class _FakeHttpxResponse:
+    status_code = 200
+    http_version = 'HTTP/2'
+
+    def __init__(self, body: bytes):
+        self.headers = {'content-encoding': 'gzip'}
+        self.body = body
+
+    async def aiter_raw(self, chunk_size=None):
+        size = chunk_size or len(self.body)
+        for start in range(0, len(self.body), size):
+            yield self.body[start:start + size]
+
+
+def test_httpx_response_is_read_like_aiohttp():
+    import gzip
+
+    payload = b'{"data": []}'
+    response = _HttpxResponse(_FakeHttpxResponse(gzip.compress(payload)))
+    decoder = ResponseDecoder(chunk_size=4)
+    assert response.status == 200
+    assert asyncio.run(decoder.read_body(response)) == payload
+    assert decoder.decompress(asyncio.run(response.read()), 'gzip') == payload
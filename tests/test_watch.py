@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from helpers import make_listing
+from myhome_scraper import MyHomeScraper
+from sinks import JsonlSink
+from watch import ListingWatcher, SeenSet
+
+
+class FrontPages:
+    """Newest-first listing feed; new listings are pushed onto page 1"""
+
+    def __init__(self, count=30, per_page=10):
+        self.per_page = per_page
+        self.ids = list(range(count, 0, -1))
+        self.page_calls = []
+        self.phone_calls = []
+
+    def publish(self, *listing_ids):
+        self.ids[:0] = listing_ids
+
+    def install(self, scraper):
+        async def fetch_listings_page(announcement_type, page):
+            self.page_calls.append((announcement_type, page))
+            start = (page - 1) * self.per_page
+            return [make_listing(announcement_type * 100000 + i)
+                    for i in self.ids[start:start + self.per_page]]
+
+        async def fetch_phone_number(listing_id):
+            self.phone_calls.append(listing_id)
+            return f'050-{listing_id}'
+
+        scraper.fetch_listings_page = fetch_listings_page
+        scraper.fetch_phone_number = fetch_phone_number
+        return scraper
+
+
+def test_only_unseen_listings_are_enriched_and_emitted(tmp_path):
+    feed = FrontPages()
+    sink = JsonlSink(tmp_path / 'new.jsonl', batch_size=1)
+    received = []
+
+    async def on_listing(row):
+        received.append(row['id'])
+
+    async def run():
+        scraper = feed.install(MyHomeScraper(sinks=[sink], keep_listings=False))
+        watcher = ListingWatcher(scraper, pages=2, interval=0, on_listing=on_listing)
+        assert await watcher.poll_once() == []  # baseline
+        feed.publish(31, 32)
+        first = await watcher.poll_once()
+        second = await watcher.poll_once()
+        return watcher, first, second
+
+    watcher, first, second = asyncio.run(run())
+    sink.close()
+    assert sorted(row['id'] for row in first) == [100031, 100032, 200031, 200032]
+    assert second == []
+    assert sorted(feed.phone_calls) == [100031, 100032, 200031, 200032]
+    assert sorted(received) == sorted(row['id'] for row in first)
+    assert watcher.emitted == 4
+    lines = [json.loads(line) for line in open(tmp_path / 'new.jsonl', encoding='utf-8')]
+    assert {line['phone_number'] for line in lines} == {'050-100031', '050-100032', '050-200031', '050-200032'}
+    # Only the first K pages are polled
+    assert {page for _, page in feed.page_calls} == {1, 2}
+
+
+def test_emit_initial_and_run_loop(tmp_path):
+    feed = FrontPages(count=5)
+
+    async def run():
+        scraper = feed.install(MyHomeScraper(keep_listings=False))
+        watcher = ListingWatcher(scraper, pages=1, interval=0.01, emit_initial=True, announcement_types=(1,))
+        await watcher.run(max_polls=3)
+        return watcher
+
+    watcher = asyncio.run(run())
+    assert watcher.polls == 3
+    assert watcher.emitted == 5
+
+
+def test_seen_set_persists_and_evicts_oldest(tmp_path):
+    seen = SeenSet(tmp_path / 'seen.json', max_entries=3)
+    seen.add([1, 2, 3])
+    seen.add([1, 4])
+    assert 2 not in seen and 1 in seen and 4 in seen
+    seen.save()
+
+    restored = SeenSet(tmp_path / 'seen.json')
+    assert list(restored.ids) == [3, 1, 4]
+
+
+def test_appending_sink_keeps_earlier_rows(tmp_path):
+    for listing_id in (1, 2):
+        with JsonlSink(tmp_path / 'watch.jsonl', batch_size=1, append=True) as sink:
+            sink.write({'id': listing_id})
+    assert [json.loads(line)['id'] for line in open(tmp_path / 'watch.jsonl')] == [1, 2]
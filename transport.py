@@ -0,0 +1,155 @@
+"""
+HTTP transports for the MyHome.az client
+The scraper sends every request through one transport: AiohttpTransport pools HTTP/1.1
+connections, and HttpxTransport multiplexes requests over HTTP/2 connections when
+httpx[http2] is installed.
+"""
+
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional
+import logging
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TransportConfig:
+    """Connection settings shared by the transports"""
+    pool_size: int = 10  # Connections open at once across all hosts
+    per_host: int = 5  # Connections per host; HTTP/2 multiplexes many requests over each
+    keepalive: float = 15.0  # Seconds an idle connection is kept for reuse
+    dns_cache_ttl: Optional[int] = 300  # Seconds resolved addresses are cached; None to resolve every time
+    connect_timeout: float = 10.0
+    total_timeout: float = 30.0
+
+
+class Transport:
+    """Opens connections and performs GETs whose responses expose status, headers, read() and content"""
+
+    name = ''
+
+    def __init__(self, headers: Dict[str, str], config: Optional[TransportConfig] = None):
+        self.headers = headers
+        self.config = config or TransportConfig()
+
+    async def open(self):
+        raise NotImplementedError
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None):
+        """Async context manager yielding the response, released on exit"""
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+
+class AiohttpTransport(Transport):
+    """HTTP/1.1 over an aiohttp connection pool"""
+
+    name = 'aiohttp'
+
+    def __init__(self, headers: Dict[str, str], config: Optional[TransportConfig] = None):
+        super().__init__(headers, config)
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def open(self):
+        config = self.config
+        connector = aiohttp.TCPConnector(limit=config.pool_size, limit_per_host=config.per_host,
+                                         keepalive_timeout=config.keepalive,
+                                         use_dns_cache=config.dns_cache_ttl is not None,
+                                         ttl_dns_cache=config.dns_cache_ttl)
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=config.total_timeout, connect=config.connect_timeout),
+            auto_decompress=False  # ResponseDecoder handles zstd, gzip, deflate and br itself
+        )
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None):
+        return self.session.get(url, headers=headers)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+
+class _HttpxContent:
+    def __init__(self, response):
+        self._response = response
+
+    def iter_chunked(self, size: int):
+        return self._response.aiter_raw(size)
+
+
+class _HttpxResponse:
+    """An httpx streaming response seen through the aiohttp attributes the scraper reads"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status = response.status_code
+        self.headers = response.headers
+        self.http_version = response.http_version
+        self.content = _HttpxContent(response)
+
+    async def read(self) -> bytes:
+        # Raw bytes: decompression stays with ResponseDecoder, as with aiohttp
+        return b''.join([chunk async for chunk in self._response.aiter_raw()])
+
+
+def _require_httpx():
+    try:
+        import httpx
+        import h2  # noqa: F401
+    except ImportError as e:
+        raise ImportError("The httpx transport needs httpx with HTTP/2 support: pip install 'httpx[http2]'") from e
+    return httpx
+
+
+class HttpxTransport(Transport):
+    """HTTP/2 over httpx: concurrent requests to a host share its connections as streams
+
+    HTTP/2 is negotiated over TLS; plain-http servers such as the local mock are spoken
+    to over HTTP/1.1. httpx has no DNS cache, so dns_cache_ttl does not apply.
+    """
+
+    name = 'httpx'
+
+    def __init__(self, headers: Dict[str, str], config: Optional[TransportConfig] = None):
+        super().__init__(headers, config)
+        self.httpx = _require_httpx()
+        self.client = None
+
+    async def open(self):
+        config = self.config
+        httpx = self.httpx
+        self.client = httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            limits=httpx.Limits(max_connections=config.pool_size, max_keepalive_connections=config.per_host,
+                                keepalive_expiry=config.keepalive),
+            timeout=httpx.Timeout(config.total_timeout, connect=config.connect_timeout),
+        )
+
+    @asynccontextmanager
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None):
+        async with self.client.stream('GET', url, headers=headers) as response:
+            yield _HttpxResponse(response)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+
+
+TRANSPORTS = {
+    AiohttpTransport.name: AiohttpTransport,
+    HttpxTransport.name: HttpxTransport,
+}
+
+
+def make_transport(name: str, headers: Dict[str, str], config: Optional[TransportConfig] = None) -> Transport:
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown transport {name!r}; choose from {', '.join(TRANSPORTS)}")
+    return TRANSPORTS[name](headers, config)
@@ -0,0 +1,183 @@
+"""
+Watch mode: poll the first pages of MyHome.az and emit listings as soon as they appear
+Only ids missing from the seen-set are enriched with phones, so a quiet poll costs
+just K list requests per announcement type.
+
+Usage: python watch.py --pages 3 --interval 120 --output myhome_new_listings.jsonl
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+import logging
+
+from myhome_scraper import MyHomeScraper
+from sinks import JsonlSink
+
+logger = logging.getLogger(__name__)
+
+
+class SeenSet:
+    """Recently seen listing ids, oldest evicted first, optionally kept in a JSON file across restarts"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 200000):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.ids: OrderedDict = OrderedDict()
+        if self.path and self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                self.add(json.load(f))
+
+    def __contains__(self, listing_id) -> bool:
+        return listing_id in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, listing_ids: Iterable[int]):
+        for listing_id in listing_ids:
+            self.ids[listing_id] = None
+            self.ids.move_to_end(listing_id)
+        while len(self.ids) > self.max_entries:
+            self.ids.popitem(last=False)
+
+    def save(self):
+        if self.path is None:
+            return
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(list(self.ids), f)
+        os.replace(tmp_path, self.path)
+
+
+class ListingWatcher:
+    """Polls the first pages of each announcement type and emits unseen listings
+
+    Rows go through scraper.emit, so they reach the scraper's sinks and metrics, and
+    to on_listing (a plain or async callable) when given. Without a stored seen-set
+    the first poll only records what is already listed, unless emit_initial is set.
+    """
+
+    def __init__(self, scraper: MyHomeScraper, pages: int = 3, interval: float = 120.0,
+                 seen: Optional[SeenSet] = None, on_listing: Optional[Callable[[Dict], object]] = None,
+                 emit_initial: bool = False, announcement_types=(1, 2)):
+        self.scraper = scraper
+        self.pages = pages
+        self.interval = interval
+        self.seen = seen if seen is not None else SeenSet()
+        self.on_listing = on_listing
+        self.announcement_types = announcement_types
+        self.baseline_pending = not emit_initial and len(self.seen) == 0
+        self.polls = 0
+        self.emitted = 0
+        self._stop = asyncio.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    async def poll_once(self) -> List[Dict]:
+        """One pass over the first pages; returns the rows emitted"""
+        emitted = []
+        for announcement_type in self.announcement_types:
+            pages = await asyncio.gather(*(self.scraper.fetch_listings_page(announcement_type, page)
+                                           for page in range(1, self.pages + 1)))
+            fresh = {}
+            for listing in (listing for page in pages for listing in page):
+                listing_id = listing.get('id')
+                if listing_id is not None and listing_id not in self.seen:
+                    fresh.setdefault(listing_id, listing)
+            if self.baseline_pending:
+                self.seen.add(fresh)
+                continue
+            if fresh:
+                emitted.extend(await self._enrich(list(fresh.values()), announcement_type))
+        if self.baseline_pending:
+            logger.info(f"Watching from a baseline of {len(self.seen)} listings")
+            self.baseline_pending = False
+        self.polls += 1
+        return emitted
+
+    async def _enrich(self, listings: List[Dict], announcement_type: int) -> List[Dict]:
+        semaphore = asyncio.Semaphore(self.scraper.phone_workers)
+
+        async def enrich(listing):
+            async with semaphore:
+                phone = await self.scraper.phone_resolver.resolve(listing['id'], listing.get('user_id'))
+            row = self.scraper.extract_listing_data(listing, announcement_type, phone)
+            await self._emit(row)
+            return row
+
+        rows = await asyncio.gather(*(enrich(listing) for listing in listings))
+        logger.info(f"{len(rows)} new {self.scraper.type_label(announcement_type)} listings")
+        return rows
+
+    async def _emit(self, row: Dict):
+        self.scraper.emit(row)
+        if self.on_listing is not None:
+            result = self.on_listing(row)
+            if inspect.isawaitable(result):
+                await result
+        self.seen.add([row['id']])
+        self.emitted += 1
+
+    async def run(self, max_polls: Optional[int] = None):
+        """Poll every interval seconds until stop() is called or max_polls is reached"""
+        while not self._stop.is_set() and (max_polls is None or self.polls < max_polls):
+            started = time.monotonic()
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Watch poll failed: {e}")
+            self.seen.save()
+            remaining = self.interval - (time.monotonic() - started)
+            if remaining > 0 and (max_polls is None or self.polls < max_polls):
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+
+async def watch(args):
+    kwargs = {'base_url': args.base_url} if args.base_url else {}
+    # One row per batch, appended, so consumers tailing the file see each listing at once
+    sink = JsonlSink(args.output, batch_size=1, append=True)
+    seen = SeenSet(args.seen)
+    async with MyHomeScraper(sinks=[sink], keep_listings=False, phone_cache_path=args.phone_cache,
+                             **kwargs) as scraper:
+        watcher = ListingWatcher(scraper, pages=args.pages, interval=args.interval, seen=seen,
+                                 emit_initial=args.emit_initial)
+        try:
+            await watcher.run(max_polls=args.max_polls)
+        finally:
+            sink.close()
+            seen.save()
+    print(f"Emitted {watcher.emitted} new listings over {watcher.polls} polls to {args.output}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Watch MyHome.az for new listings")
+    parser.add_argument('--pages', type=int, default=3, help="Leading pages polled per announcement type")
+    parser.add_argument('--interval', type=float, default=120.0, help="Seconds between polls")
+    parser.add_argument('--output', default='myhome_new_listings.jsonl', help="JSONL file new listings go to")
+    parser.add_argument('--seen', default='myhome_seen_ids.json', help="Seen-set kept across restarts")
+    parser.add_argument('--emit-initial', action='store_true',
+                        help="Emit what is listed at start instead of taking it as the baseline")
+    parser.add_argument('--max-polls', type=int, help="Stop after this many polls")
+    parser.add_argument('--phone-cache', default='myhome_phone_cache.json')
+    parser.add_argument('--base-url', help="API root, e.g. a local mock_server.py")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(watch(args))
+    except KeyboardInterrupt:
+        print("Watch stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()